@@ -9,6 +9,8 @@ from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from config import config, Config
 from routes.api import api_bp
+from backend.utils.metrics import instrument_app
+from backend.utils.profiling import init_profiling
 from supabase_client import authenticate_user, register_user
 
 # Configure logging
@@ -51,6 +53,12 @@ def create_app(config_name='default'):
     
     # Register blueprints
     app.register_blueprint(api_bp, url_prefix='/api')
+
+    # Request timing and Prometheus /metrics endpoint
+    instrument_app(app)
+
+    # Opt-in per-request profiling (only when PROFILE_TOKEN is configured)
+    init_profiling(app)
     
     # Main route - requires login
     @app.route('/')
@@ -0,0 +1,255 @@
+"""
+ASGI entry point: the same API, served from an event loop
+
+Run from the backend folder:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Connections wait on the event loop instead of holding a worker thread:
+- /api/stream/prices is served natively; idle stream clients cost an
+  asyncio event, not a thread.
+- Polled price routes (live-price, all-prices, calculator) are answered on
+  the loop straight from the price cache. When it is stale, one refresh per
+  metal runs in the thread pool and every concurrent request awaits it.
+- Every other route (predictions, history, pages) runs the Flask app in the
+  thread pool, so model work never blocks the loop. Streamed responses
+  (/api/export) are sent chunk by chunk as the pool produces them.
+Responses are produced by the same Flask views, so JSON contracts match.
+"""
+
+import io
+import os
+import sys
+import asyncio
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from app import create_app
+from routes.api import price_broadcaster, price_service
+from backend.config import Config
+from backend.models.metals import DEFAULT_METAL, get_metal
+from backend.utils.deadline import deadline
+
+logger = logging.getLogger(__name__)
+
+# Routes that only read the live price cache once it is fresh
+CACHED_PRICE_ROUTES = ('/api/live-price', '/api/all-prices', '/api/calculator')
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ for an ASGI HTTP request"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def call_wsgi(wsgi_app, environ):
+    """
+    Start a WSGI app; returns (status code, ASGI headers, first body chunk,
+    iterator over the rest or None). Responses with a Content-Length that
+    the first chunk completes need no further reads.
+    """
+    response = {}
+    written = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        return written.append
+
+    result = wsgi_app(environ, start_response)
+    chunks = iter(result)
+    try:
+        first = b''.join(written) + next(chunks, b'')
+    except BaseException:
+        close_wsgi(result)
+        raise
+    length = dict(response['headers']).get(b'content-length')
+    if length is not None and len(first) >= int(length):
+        close_wsgi(result)
+        return response['status'], response['headers'], first, None
+    return response['status'], response['headers'], first, _rest(result, chunks)
+
+
+def _rest(result, chunks):
+    try:
+        yield from chunks
+    finally:
+        close_wsgi(result)
+
+
+def close_wsgi(result):
+    if hasattr(result, 'close'):
+        result.close()
+
+
+class AsyncApi:
+    """ASGI application wrapping the Flask app (see module docstring)"""
+
+    def __init__(self, flask_app, max_threads=32):
+        self.flask_app = flask_app
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='asgi')
+        # metal -> future of the price refresh in flight
+        self._refreshing = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        path = scope['path']
+        if path == '/api/stream/prices':
+            return await self.stream_prices(scope, receive, send)
+
+        body = await self.read_body(receive)
+        environ = wsgi_environ(scope, body)
+        if path in CACHED_PRICE_ROUTES and scope['method'] == 'GET' and await self.refresh_prices(scope):
+            # Cache is fresh: the view only does arithmetic, so run it on the loop
+            status, headers, content, rest = call_wsgi(self.flask_app, environ)
+            if rest is not None:
+                content += b''.join(rest)
+                rest = None
+        else:
+            status, headers, content, rest = await self.run_in_thread(call_wsgi, self.flask_app, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        if rest is None:
+            await send({'type': 'http.response.body', 'body': content})
+        else:
+            await self.stream_body(content, rest, receive, send)
+
+    async def stream_body(self, first, rest, receive, send):
+        """
+        Send a streamed response (bulk exports) chunk by chunk as the thread
+        pool produces it, so the body is never held in memory; stops early
+        when the client disconnects.
+        """
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            chunk = first
+            while chunk is not None and not disconnected.done():
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await self.run_in_thread(next, rest, None)
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            try:
+                await self.run_in_thread(rest.close)
+            except ValueError:
+                pass  # Cancelled mid-chunk: the generator is still running in its thread
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    def run_in_thread(self, func, *args):
+        """Run blocking work in the pool, keeping the caller's context (deadlines, metrics labels)"""
+        context = contextvars.copy_context()
+        return asyncio.get_running_loop().run_in_executor(self.executor, lambda: context.run(func, *args))
+
+    async def refresh_prices(self, scope):
+        """
+        Make sure the requested metal's price and the FX table are cached.
+        Concurrent callers share one refresh. True if the cache is now fresh.
+        """
+        params = parse_qs(scope['query_string'].decode('latin-1'))
+        try:
+            metal = get_metal(params.get('metal', [DEFAULT_METAL])[0])
+        except ValueError:
+            return False  # Let the view report the bad parameter
+        if price_service.is_fresh([metal]):
+            return True
+
+        future = self._refreshing.get(metal)
+        if future is None:
+            def refresh():
+                with deadline(Config.LIVE_PRICE_DEADLINE):
+                    price_service.get_best_live_prices([metal])
+                    price_service.get_fx_rates()
+
+            future = asyncio.ensure_future(self.run_in_thread(refresh))
+            self._refreshing[metal] = future
+            future.add_done_callback(lambda _: self._refreshing.pop(metal, None))
+        try:
+            await asyncio.shield(future)
+        except Exception as e:
+            logger.warning(f"Live price refresh failed: {e}")
+        return price_service.is_fresh([metal])
+
+    async def stream_prices(self, scope, receive, send):
+        """Server-Sent Events stream of live price changes; waits without a thread"""
+        headers = dict(scope['headers'])
+        last_event_id = headers.get(b'last-event-id', b'').decode('latin-1') or \
+            parse_qs(scope['query_string'].decode('latin-1')).get('last_event_id', [None])[0]
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]
+        })
+
+        async def pump():
+            async for chunk in price_broadcaster.astream(last_event_id):
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(self.wait_disconnect(receive))]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+app = AsyncApi(create_app(os.getenv('FLASK_CONFIG', 'production')), max_threads=int(os.getenv('ASGI_THREADS', '32')))
@@ -0,0 +1,148 @@
+"""
+Load generator for the Flask endpoints
+
+Sends concurrent requests to a running server and reports throughput and
+tail latency per endpoint. With --with-simulator it starts the market
+simulator and the app in-process, so the whole provider chain is exercised
+offline.
+
+Usage (from the backend folder):
+    python benchmarks/load_test.py --with-simulator --duration 30 --concurrency 32
+    python benchmarks/load_test.py --base-url http://127.0.0.1:5000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+DEFAULT_ENDPOINTS = [
+    '/api/live-price',
+    '/api/all-prices',
+    '/api/calculator?karat=22K&weight=10',
+    '/api/historical-prices',
+]
+
+
+def start_stack(simulator_profiles, cache_seconds):
+    """Start the simulator and the Flask app on background threads; return the app URL"""
+    from benchmarks.market_simulator import start_in_thread
+    _, simulator_url = start_in_thread(profiles=simulator_profiles)
+    os.environ['MARKET_SIMULATOR_URL'] = simulator_url
+
+    from werkzeug.serving import make_server
+    from app import create_app
+    app = create_app('production')
+
+    import routes.api
+    routes.api.price_service.cache_duration = cache_seconds
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='flask-under-test', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", simulator_url
+
+
+def run_load(base_url, endpoints, duration, concurrency):
+    latencies = {endpoint: [] for endpoint in endpoints}
+    errors = {endpoint: 0 for endpoint in endpoints}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        session = requests.Session()
+        i = index
+        while time.perf_counter() < deadline:
+            endpoint = endpoints[i % len(endpoints)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                ok = session.get(base_url + endpoint, timeout=60).status_code < 500
+            except requests.RequestException:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies[endpoint].append(elapsed)
+                if not ok:
+                    errors[endpoint] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    report = {}
+    for endpoint, samples in latencies.items():
+        if not samples:
+            continue
+        ms = np.array(samples)
+        report[endpoint] = {
+            'requests': len(ms),
+            'errors': errors[endpoint],
+            'throughput_rps': round(len(ms) / wall, 2),
+            'p50_ms': round(float(np.percentile(ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(ms, 95)), 2),
+            'p99_ms': round(float(np.percentile(ms, 99)), 2),
+            'max_ms': round(float(ms.max()), 2),
+        }
+    total = sum(len(s) for s in latencies.values())
+    report['total'] = {'requests': total, 'throughput_rps': round(total / wall, 2), 'seconds': round(wall, 2)}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', help='Server to load (default: start one with --with-simulator)')
+    parser.add_argument('--with-simulator', action='store_true', help='Run simulator and app in-process')
+    parser.add_argument('--endpoint', action='append', help='Endpoint path to hit (repeatable)')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--cache-seconds', type=int, default=300, help='Live price cache duration for the in-process app')
+    parser.add_argument('--latency-ms', type=float, default=80, help='Simulator median latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Simulator server error share')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Simulator quota error share')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    if args.with_simulator:
+        profile = {'latency_ms': args.latency_ms, 'error_rate': args.error_rate,
+                   'rate_limit_rate': args.rate_limit_rate}
+        from benchmarks.market_simulator import PROVIDERS
+        base_url, simulator_url = start_stack({name: dict(profile) for name in PROVIDERS}, args.cache_seconds)
+        print(f"Simulator: {simulator_url} | App: {base_url}")
+    elif args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        parser.error('Pass --base-url or --with-simulator')
+
+    endpoints = args.endpoint or DEFAULT_ENDPOINTS
+    print(f"Loading {len(endpoints)} endpoints for {args.duration}s with {args.concurrency} workers...")
+    report = run_load(base_url, endpoints, args.duration, args.concurrency)
+
+    print("\n" + "=" * 96)
+    print(f"{'Endpoint':40s} {'req':>7s} {'err':>5s} {'rps':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}")
+    for endpoint, stats in report.items():
+        if endpoint == 'total':
+            continue
+        print(f"{endpoint:40s} {stats['requests']:>7d} {stats['errors']:>5d} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+    print("=" * 96)
+    print(f"Total: {report['total']['requests']} requests, {report['total']['throughput_rps']} req/s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Login latency under concurrent load
+
+Drives authenticate_user from many threads against an in-process stand-in
+for the Supabase users table and reports p50/p99 latency.
+
+Usage (from the backend folder):
+    python benchmarks/login_load.py --threads 32 --requests 400
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+import supabase_client
+
+
+class FakeUsersTable:
+    """Minimal query builder that mimics supabase.table('users') with network latency"""
+
+    def __init__(self, users, latency):
+        self.users = users
+        self.latency = latency
+        self.email = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.email = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        time.sleep(self.latency)
+        record = self.users.get(self.email)
+
+        class Result:
+            data = [record] if record else []
+        return Result()
+
+
+class FakeClient:
+    def __init__(self, users, latency):
+        self.users = users
+        self.latency = latency
+
+    def table(self, name):
+        return FakeUsersTable(self.users, self.latency)
+
+
+def run(threads, total_requests, latency, known_ratio):
+    users = {
+        f"user{i}@example.com": {
+            'id': i,
+            'email': f"user{i}@example.com",
+            'password_hash': supabase_client.hash_password('secret'),
+            'created_at': '2025-01-01T00:00:00'
+        }
+        for i in range(20)
+    }
+    client = FakeClient(users, latency)
+    supabase_client.get_supabase_client = lambda use_service_role=False: client
+
+    rng = np.random.default_rng(42)
+    emails = [
+        f"user{rng.integers(20)}@example.com" if rng.random() < known_ratio else f"ghost{rng.integers(50)}@example.com"
+        for _ in range(total_requests)
+    ]
+    latencies = []
+    lock = threading.Lock()
+    cursor = iter(emails)
+
+    def worker():
+        while True:
+            with lock:
+                email = next(cursor, None)
+            if email is None:
+                return
+            start = time.perf_counter()
+            supabase_client.authenticate_user(email, 'secret')
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    wall = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    print(f"Requests: {len(ms)} | Threads: {threads} | bcrypt workers: {supabase_client.AUTH_BCRYPT_WORKERS}")
+    print(f"Throughput: {len(ms) / wall:.1f} logins/s")
+    print(f"p50: {np.percentile(ms, 50):.1f} ms | p99: {np.percentile(ms, 99):.1f} ms | max: {ms.max():.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--db-latency', type=float, default=0.03, help='Simulated Supabase round trip in seconds')
+    parser.add_argument('--known-ratio', type=float, default=0.8, help='Share of logins for existing users')
+    args = parser.parse_args()
+    run(args.threads, args.requests, args.db_latency, args.known_ratio)
@@ -0,0 +1,315 @@
+"""
+Local market-data provider simulator
+
+Serves GoldAPI, Metals-API, exchangerate-api, Alpha Vantage and Yahoo
+Finance chart responses in each provider's own format, driven by gold,
+silver and platinum price random walks. Latency, error rate and rate-limit
+responses are configurable per provider, so LiveGoldPriceService can be
+load tested without spending real API quota.
+
+Start it, then point the app at it:
+    python benchmarks/market_simulator.py --port 8765
+    MARKET_SIMULATOR_URL=http://127.0.0.1:8765 python app.py
+
+Per-provider settings can be given as JSON with --config, e.g.
+    {"goldapi": {"latency_ms": 250, "error_rate": 0.05, "rate_limit_rate": 0.1}}
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PROVIDERS = ('goldapi', 'metals', 'exchangerate', 'alphavantage', 'yahoo')
+TROY_OZ_GRAMS = 31.1035
+
+DEFAULT_PROFILE = {
+    'latency_ms': 80.0,     # Median response time
+    'latency_sigma': 0.5,   # Log-normal spread; 0 gives constant latency
+    'error_rate': 0.0,      # Share of requests answered with a server error
+    'rate_limit_rate': 0.0  # Share of requests answered with the provider's quota error
+}
+
+# Starting spot prices in USD per troy ounce, with their yearly volatility
+METAL_START = {'XAU': (2650.0, 0.15), 'XAG': (31.0, 0.25), 'XPT': (960.0, 0.22)}
+YAHOO_TICKERS = {'GC=F': 'XAU', 'SI=F': 'XAG', 'PL=F': 'XPT'}
+ETF_OZ_PER_SHARE = {'GLD': ('XAU', 0.1), 'SLV': ('XAG', 0.87), 'PPLT': ('XPT', 0.095)}
+
+FX_BASE_RATES = {
+    'USD': 1.0, 'INR': 83.2, 'EUR': 0.92, 'GBP': 0.79, 'AED': 3.6725,
+    'SAR': 3.75, 'SGD': 1.34, 'JPY': 151.5, 'CNY': 7.23, 'AUD': 1.52, 'CAD': 1.36
+}
+
+
+class RandomWalk:
+    """Geometric random walk advanced lazily by wall-clock time"""
+
+    def __init__(self, start, annual_vol, rng):
+        self.value = start
+        self.annual_vol = annual_vol
+        self.rng = rng
+        self.updated = time.time()
+        self.lock = threading.Lock()
+
+    def current(self):
+        with self.lock:
+            now = time.time()
+            dt_years = (now - self.updated) / (365 * 86400)
+            if dt_years > 0:
+                shock = self.rng.gauss(0, 1) * self.annual_vol * math.sqrt(dt_years)
+                self.value *= math.exp(shock - 0.5 * (self.annual_vol ** 2) * dt_years)
+                self.updated = now
+            return self.value
+
+
+class MarketSimulator:
+    """Shared state for all simulated providers"""
+
+    def __init__(self, profiles=None, seed=42, gold_usd_per_oz=2650.0):
+        self.rng = random.Random(seed)
+        self.profiles = {name: dict(DEFAULT_PROFILE) for name in PROVIDERS}
+        for name, overrides in (profiles or {}).items():
+            self.profiles[name].update(overrides)
+        self.metals = {symbol: RandomWalk(start, vol, self.rng) for symbol, (start, vol) in METAL_START.items()}
+        self.metals['XAU'] = self.gold = RandomWalk(gold_usd_per_oz, METAL_START['XAU'][1], self.rng)
+        self.fx = {code: RandomWalk(rate, 0.05, self.rng) for code, rate in FX_BASE_RATES.items() if code != 'USD'}
+        self.requests = {name: 0 for name in PROVIDERS}
+        self.lock = threading.Lock()
+
+    def outcome(self, provider):
+        """Sleep for a sampled latency and decide between ok, error and rate_limited"""
+        profile = self.profiles[provider]
+        with self.lock:
+            self.requests[provider] += 1
+            sigma = profile['latency_sigma']
+            latency = profile['latency_ms'] * (math.exp(self.rng.gauss(0, sigma)) if sigma else 1.0)
+            roll = self.rng.random()
+        time.sleep(latency / 1000)
+        if roll < profile['rate_limit_rate']:
+            return 'rate_limited'
+        if roll < profile['rate_limit_rate'] + profile['error_rate']:
+            return 'error'
+        return 'ok'
+
+    def fx_rates(self):
+        rates = {'USD': 1.0}
+        rates.update({code: round(walk.current(), 4) for code, walk in self.fx.items()})
+        return rates
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    simulator = None  # Set by make_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        routes = {
+            '/metals/api/latest': self.metals,
+            '/exchangerate/v4/latest/USD': self.exchangerate,
+            '/alphavantage/query': self.alphavantage,
+            '/_stats': self.stats,
+        }
+        for symbol in METAL_START:
+            routes[f'/goldapi/api/{symbol}/USD'] = lambda params, symbol=symbol: self.goldapi(params, symbol)
+        for ticker in YAHOO_TICKERS:
+            routes[f'/yahoo/v8/finance/chart/{ticker}'] = lambda params, ticker=ticker: self.yahoo(params, ticker)
+        handler = routes.get(url.path)
+        if handler is None:
+            return self.send_json(404, {'error': f'Unknown path {url.path}'})
+        handler(params)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def stats(self, params):
+        self.send_json(200, {'requests': self.simulator.requests, 'profiles': self.simulator.profiles})
+
+    def goldapi(self, params, symbol='XAU'):
+        outcome = self.simulator.outcome('goldapi')
+        if outcome == 'rate_limited':
+            return self.send_json(429, {'error': 'You have exceeded your monthly quota', 'message': 'Quota exceeded'})
+        if outcome == 'error':
+            return self.send_json(500, {'error': 'Internal error', 'message': 'Upstream unavailable'})
+        price = self.simulator.metals[symbol].current()
+        now = int(time.time())
+        self.send_json(200, {
+            'timestamp': now,
+            'metal': symbol,
+            'currency': 'USD',
+            'exchange': 'FOREXCOM',
+            'symbol': f'FOREXCOM:{symbol}USD',
+            'open_time': now - now % 86400,
+            'price': round(price, 2),
+            'ch': 0.0,
+            'ask': round(price + 0.3, 2),
+            'bid': round(price - 0.3, 2),
+            'price_gram_24k': round(price / TROY_OZ_GRAMS, 4),
+        })
+
+    def metals(self, params):
+        outcome = self.simulator.outcome('metals')
+        if outcome == 'rate_limited':
+            return self.send_json(200, {'success': False, 'error': {
+                'code': 104, 'type': 'usage_limit_reached',
+                'info': 'Your monthly API request volume has been reached. Please upgrade your plan.'}})
+        if outcome == 'error':
+            return self.send_json(200, {'success': False, 'error': {
+                'code': 500, 'type': 'server_error', 'info': 'Internal error.'}})
+        base = params.get('base', 'USD')
+        if base in self.simulator.metals:
+            rates = {'USD': round(self.simulator.metals[base].current(), 4)}
+        else:
+            symbols = [s for s in params.get('symbols', 'XAU').split(',') if s in self.simulator.metals]
+            rates = {s: 1 / self.simulator.metals[s].current() for s in symbols}
+        self.send_json(200, {
+            'success': True,
+            'timestamp': int(time.time()),
+            'date': datetime.utcnow().strftime('%Y-%m-%d'),
+            'base': base,
+            'rates': rates,
+            'unit': 'per ounce',
+        })
+
+    def exchangerate(self, params):
+        outcome = self.simulator.outcome('exchangerate')
+        if outcome == 'rate_limited':
+            return self.send_json(429, {'result': 'error', 'error-type': 'quota-reached'})
+        if outcome == 'error':
+            return self.send_json(500, {'result': 'error', 'error-type': 'unknown-code'})
+        now = int(time.time())
+        self.send_json(200, {
+            'provider': 'https://www.exchangerate-api.com',
+            'base': 'USD',
+            'date': datetime.utcnow().strftime('%Y-%m-%d'),
+            'time_last_updated': now - now % 86400,
+            'rates': self.simulator.fx_rates(),
+        })
+
+    def alphavantage(self, params):
+        outcome = self.simulator.outcome('alphavantage')
+        if outcome == 'rate_limited':
+            return self.send_json(200, {'Note': 'Thank you for using Alpha Vantage! Our standard API rate limit '
+                                                'is 25 requests per day. Please subscribe to any of the premium plans.'})
+        if outcome == 'error':
+            return self.send_json(200, {'Error Message': 'Invalid API call.'})
+        price = self.simulator.gold.current()
+        if params.get('function') == 'GLOBAL_QUOTE':
+            symbol, oz_per_share = ETF_OZ_PER_SHARE.get(params.get('symbol', 'GLD'), ETF_OZ_PER_SHARE['GLD'])
+            share = self.simulator.metals[symbol].current() * oz_per_share
+            return self.send_json(200, {'Global Quote': {
+                '01. symbol': params.get('symbol', 'GLD'),
+                '02. open': f"{share:.4f}",
+                '03. high': f"{share * 1.005:.4f}",
+                '04. low': f"{share * 0.995:.4f}",
+                '05. price': f"{share:.4f}",
+                '06. volume': '7350120',
+                '07. latest trading day': datetime.utcnow().strftime('%Y-%m-%d'),
+                '08. previous close': f"{share:.4f}",
+                '09. change': '0.0000',
+                '10. change percent': '0.0000%',
+            }})
+        # Daily history ending at the current simulated price
+        series = {}
+        value = price
+        day = datetime.utcnow().date()
+        for _ in range(365):
+            series[day.strftime('%Y-%m-%d')] = {
+                '1. open': f"{value:.4f}",
+                '2. high': f"{value * 1.004:.4f}",
+                '3. low': f"{value * 0.996:.4f}",
+                '4. close': f"{value:.4f}",
+            }
+            value /= math.exp(self.simulator.rng.gauss(0, 0.01))
+            day -= timedelta(days=1)
+        self.send_json(200, {
+            'Meta Data': {'1. Information': 'Daily Prices', '2. Symbol': 'XAU'},
+            'Time Series (Daily)': series,
+        })
+
+    def yahoo(self, params, ticker='GC=F'):
+        outcome = self.simulator.outcome('yahoo')
+        if outcome == 'rate_limited':
+            payload = b'Too Many Requests'
+            self.send_response(429)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            return self.wfile.write(payload)
+        if outcome == 'error':
+            return self.send_json(500, {'chart': {'result': None, 'error': {
+                'code': 'Internal Server Error', 'description': 'Simulated failure'}}})
+        price = self.simulator.metals[YAHOO_TICKERS[ticker]].current()
+        now = int(time.time())
+        stamps = [now - 60 * i for i in range(30)][::-1]
+        closes = [round(price * math.exp(self.simulator.rng.gauss(0, 0.0005) * (30 - i)), 2)
+                  for i in range(30)]
+        self.send_json(200, {'chart': {'result': [{
+            'meta': {'currency': 'USD', 'symbol': ticker, 'regularMarketPrice': closes[-1],
+                     'regularMarketTime': stamps[-1], 'dataGranularity': '1m', 'range': '1d'},
+            'timestamp': stamps,
+            'indicators': {'quote': [{'open': closes, 'high': closes, 'low': closes,
+                                      'close': closes, 'volume': [0] * len(closes)}]},
+        }], 'error': None}})
+
+
+def make_server(host='127.0.0.1', port=8765, profiles=None, seed=42):
+    """Build a ready-to-serve simulator (call serve_forever on the result)"""
+    handler = type('BoundSimulatorHandler', (SimulatorHandler,), {
+        'simulator': MarketSimulator(profiles, seed=seed)
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_in_thread(host='127.0.0.1', port=0, profiles=None, seed=42):
+    """Start a simulator on a background thread and return (server, base_url)"""
+    server = make_server(host, port, profiles, seed)
+    threading.Thread(target=server.serve_forever, name='market-simulator', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, help='Median latency for every provider')
+    parser.add_argument('--error-rate', type=float, help='Server error share for every provider')
+    parser.add_argument('--rate-limit-rate', type=float, help='Quota error share for every provider')
+    parser.add_argument('--config', help='JSON file with per-provider settings')
+    args = parser.parse_args()
+
+    profiles = {}
+    for name in PROVIDERS:
+        overrides = {}
+        if args.latency_ms is not None:
+            overrides['latency_ms'] = args.latency_ms
+        if args.error_rate is not None:
+            overrides['error_rate'] = args.error_rate
+        if args.rate_limit_rate is not None:
+            overrides['rate_limit_rate'] = args.rate_limit_rate
+        profiles[name] = overrides
+    if args.config:
+        with open(args.config, encoding='utf-8') as f:
+            for name, overrides in json.load(f).items():
+                profiles.setdefault(name, {}).update(overrides)
+
+    server = make_server(args.host, args.port, profiles, args.seed)
+    print(f"Market simulator listening on http://{args.host}:{args.port}")
+    print(f"Point the app at it with MARKET_SIMULATOR_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,118 @@
+"""
+Payload size and encode time of /api/historical-prices response formats
+
+Encodes 1, 5 and 10 years of daily prices the way the endpoint does:
+the previous row-by-row build (DataFrame.iterrows + jsonify's encoder),
+the current JSON path, and the columnar npz / Arrow bodies. Arrow is
+skipped when pyarrow is not installed.
+
+Usage (from the backend folder):
+    python benchmarks/payload_formats.py [--output results/payload_formats.json]
+"""
+
+import os
+import sys
+import json
+import time
+import gzip
+import argparse
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+from backend.utils.serialization import dumps, encode_columns, orjson, pyarrow, records
+
+TRADING_DAYS_PER_YEAR = 252
+INR_RATE = 83.0
+
+
+def history(years, seed=7):
+    """Synthetic daily USD per gram prices, most recent first like the endpoint returns"""
+    rng = np.random.default_rng(seed)
+    n = years * TRADING_DAYS_PER_YEAR
+    dates = np.datetime64('2025-12-31', 'D') - np.arange(n)
+    prices = 60 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return dates, prices
+
+
+def legacy_body(dates, prices):
+    """Previous implementation: one dict per DataFrame row, encoded by Flask's JSON provider"""
+    df = pd.DataFrame({'Date': pd.to_datetime(dates), 'Price_Per_Gram': prices})
+    converted = np.stack([prices * INR_RATE, prices * INR_RATE], axis=1).round(2)
+    rows = []
+    for (_, row), (price_inr, price) in zip(df.iterrows(), converted.tolist()):
+        rows.append({
+            'date': row['Date'].strftime('%Y-%m-%d'),
+            'price_usd': round(row['Price_Per_Gram'], 2),
+            'price_inr': price_inr,
+            'price': price
+        })
+    return json.dumps({'success': True, 'currency': 'INR', 'data': rows}, sort_keys=True).encode('utf-8')
+
+
+def columns(dates, prices):
+    converted = np.stack([prices * INR_RATE, prices * INR_RATE], axis=1).round(2)
+    return {'date': dates, 'price_usd': prices.round(2), 'price_inr': converted[:, 0], 'price': converted[:, 1]}
+
+
+def json_body(dates, prices):
+    cols = columns(dates, prices)
+    cols['date'] = np.datetime_as_string(dates, unit='D')
+    return dumps({'success': True, 'metal': 'gold', 'currency': 'INR', 'data': records(cols)})
+
+
+def measure(encode, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = encode()
+        samples.append((time.perf_counter() - start) * 1000)
+    return body, round(float(np.median(samples)), 3)
+
+
+def run(repeat):
+    meta = {'success': True, 'metal': 'gold', 'currency': 'INR'}
+    formats = {
+        'legacy-json': legacy_body,
+        'json' + ('' if orjson else ' (stdlib)'): json_body,
+        'npz': lambda d, p: encode_columns('npz', columns(d, p), meta),
+    }
+    if pyarrow is not None:
+        formats['arrow'] = lambda d, p: encode_columns('arrow', columns(d, p), meta)
+
+    results = {}
+    for years in (1, 5, 10):
+        dates, prices = history(years)
+        for name, encode in formats.items():
+            body, median_ms = measure(lambda: encode(dates, prices), repeat)
+            results[f'{years}y/{name}'] = {
+                'rows': len(dates),
+                'encode_ms': median_ms,
+                'bytes': len(body),
+                'gzip_bytes': len(gzip.compress(body, 6)),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(f"{'Range / format':26s} {'rows':>6s} {'encode ms':>10s} {'bytes':>10s} {'gzip bytes':>11s}")
+    for name, r in results.items():
+        print(f"{name:26s} {r['rows']:>6d} {r['encode_ms']:>10.3f} {r['bytes']:>10d} {r['gzip_bytes']:>11d}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
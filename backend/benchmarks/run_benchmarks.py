@@ -0,0 +1,307 @@
+"""
+Offline benchmark suite for the model, data and API hot paths
+
+Runs entirely from backend/data/gold_historical_data.csv with the live price
+and FX providers stubbed out, using fixed seeds so runs are comparable.
+Results are written as JSON; pass --compare to flag regressions against an
+earlier run.
+
+Usage (from the backend folder):
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --quick --compare benchmarks/results/baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+
+DATA_PATH = os.path.join(BACKEND_DIR, 'data', 'gold_historical_data.csv')
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+SEED = 42
+STUB_USD_PER_GRAM = 86.5
+STUB_USD_TO_INR = 83.0
+
+
+def seed_everything(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import tensorflow as tf
+        tf.random.set_seed(seed)
+    except ImportError:
+        pass
+
+
+def load_history():
+    df = pd.read_csv(DATA_PATH)
+    df['Date'] = pd.to_datetime(df['Date'], utc=True)
+    return df
+
+
+def stub_providers():
+    """Replace every network call with fixed local data"""
+    from backend.models.live_price import LiveGoldPriceService
+    from backend.models.gold_predict import GoldPricePredictor
+    from backend.models.fx_rates import FxRates
+
+    def best_live_price(self, metal='gold'):
+        return {
+            'source': 'Benchmark Stub',
+            'price_per_gram_24k': STUB_USD_PER_GRAM,
+            'price_per_oz': round(STUB_USD_PER_GRAM * 31.1035, 2),
+            'currency': 'USD',
+            'timestamp': 1735000000,
+            'date': '2024-12-24 00:00:00',
+            'raw_data': {}
+        }
+
+    LiveGoldPriceService.get_best_live_price = best_live_price
+    fx_rates = FxRates({'INR': STUB_USD_TO_INR, 'EUR': 0.92, 'GBP': 0.79})
+    LiveGoldPriceService.get_fx_rates = lambda self: fx_rates
+    GoldPricePredictor.fetch_gold_data = lambda self, days=180: load_history()
+
+
+def measure(func, repeat, warmup=1):
+    """Run `func` and return latency statistics in milliseconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples)
+    return {
+        'repeat': repeat,
+        'min_ms': round(float(samples.min()), 4),
+        'median_ms': round(float(np.median(samples)), 4),
+        'mean_ms': round(float(samples.mean()), 4),
+        'p95_ms': round(float(np.percentile(samples, 95)), 4),
+    }
+
+
+def bench_import(module, repeat):
+    """Cold import time of `module` in a fresh interpreter"""
+    code = f"import time; s = time.perf_counter(); import {module}; print(time.perf_counter() - s)"
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True)
+        if out.returncode != 0:
+            return {'skipped': out.stderr.strip().splitlines()[-1] if out.stderr else 'import failed'}
+        samples.append(float(out.stdout.strip().splitlines()[-1]) * 1000)
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(samples), 2),
+        'median_ms': round(float(np.median(samples)), 2),
+    }
+
+
+def run(quick=False):
+    repeat = 5 if quick else 20
+    results = {}
+    seed_everything()
+    stub_providers()
+
+    from backend.models.gold_predict import GoldPricePredictor
+    from backend.models.live_price import LiveGoldPriceService
+    from backend.utils.metrics import metrics
+
+    df = load_history()
+    predictor = GoldPricePredictor()
+    prices_scaled = predictor.scaler.fit_transform(df['Price_Per_Gram'].values.reshape(-1, 1))
+    features_scaled = predictor.feature_scaler.fit_transform(predictor.features.transform(df, STUB_USD_TO_INR))
+
+    print("Benchmarking feature pipeline...")
+    dates, prices, usd_inr = predictor.features.series(df, STUB_USD_TO_INR)
+
+    # Both go through transform(), parsing included: a cold cache computes every row...
+    def transform_cold():
+        predictor.features._cache = None
+        predictor.features.transform(df, STUB_USD_TO_INR)
+    results['features[full]'] = measure(transform_cold, repeat * 5)
+
+    # ...while the same history plus one new bar checks the tail and computes only that row
+    predictor.features.transform(df.iloc[:-1], STUB_USD_TO_INR)
+    primed = predictor.features._cache
+
+    def extend_by_one_bar():
+        predictor.features._cache = primed
+        predictor.features.transform(df, STUB_USD_TO_INR)
+    results['features[incremental]'] = measure(extend_by_one_bar, repeat * 5)
+
+    print("Benchmarking create_sequences...")
+    results['create_sequences'] = measure(
+        lambda: predictor.create_sequences(features_scaled, predictor.sequence_length, target=prices_scaled), repeat * 5)
+
+    print("Benchmarking price aggregates...")
+    from backend.models.aggregates import DEFAULT_WINDOWS, PriceAggregates
+    daily = pd.Series(prices, index=pd.to_datetime(dates))
+
+    def resample():
+        daily.resample('W-MON', label='left', closed='left').ohlc()
+        daily.resample('MS').ohlc()
+        for window in DEFAULT_WINDOWS:
+            daily.rolling(window).mean()
+    results['aggregates[pandas]'] = measure(resample, repeat * 5)
+
+    # Materialized once, then extended by one new bar
+    aggregates = PriceAggregates()
+    aggregates.update(dates[:-1], prices[:-1])
+    primed = aggregates._state
+
+    def extend_aggregates():
+        aggregates._state = primed
+        aggregates.update(dates, prices)
+    results['aggregates[incremental]'] = measure(extend_aggregates, repeat * 5)
+
+    print("Benchmarking price alerts (100k thresholds)...")
+    import tempfile
+    from backend.models.price_alerts import MemorySink, PriceAlertEngine
+    from backend.models.fx_rates import FxRates
+    from backend.models.metals import METALS
+    fx_rates = FxRates({'USD': 1.0, 'INR': STUB_USD_TO_INR})
+    purities = METALS['gold']['purities']
+    with tempfile.TemporaryDirectory() as tmp:
+        alerts = PriceAlertEngine(os.path.join(tmp, 'alerts.sqlite3'), sink=MemorySink())
+        rng = np.random.default_rng(SEED)
+        with alerts._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO alerts (user_id, karat, currency, direction, threshold, created_at) VALUES (?, ?, ?, ?, ?, 0)",
+                [(f'user{i}', karat, 'INR', direction, float(threshold)) for i, (karat, direction, threshold) in enumerate(zip(
+                    rng.choice(['24K', '22K', '18K', '14K'], 100000), rng.choice(['above', 'below'], 100000),
+                    rng.uniform(0.5, 1.5, 100000) * STUB_USD_PER_GRAM * STUB_USD_TO_INR))]
+            )
+        ticks = iter(STUB_USD_PER_GRAM * (1 + 0.0001 * np.sin(np.arange(100000))))
+        alerts.evaluate(STUB_USD_PER_GRAM, purities, fx_rates)
+        results['alerts.evaluate[100k]'] = measure(lambda: alerts.evaluate(next(ticks), purities, fx_rates), repeat * 5)
+
+    print("Benchmarking holdings revaluation (100k users, 1M items)...")
+    from backend.models.holdings import HoldingsBook
+    with tempfile.TemporaryDirectory() as tmp:
+        book = HoldingsBook(os.path.join(tmp, 'holdings.sqlite3'), purities=purities)
+        rng = np.random.default_rng(SEED)
+        with book._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO items (user_id, karat, weight_grams, created_at) VALUES (?, ?, ?, 0)",
+                [(f'user{user}', karat, float(weight)) for user, karat, weight in zip(
+                    rng.integers(0, 100000, 1000000), rng.choice(list(purities), 1000000), rng.uniform(1, 50, 1000000))]
+            )
+        book._seq = None  # Items were inserted directly: rebuild from them
+        book._sync(force=True)
+        results['holdings.revalue[100k users]'] = measure(lambda: book.revalue(next(ticks)), repeat * 5)
+        results['holdings.portfolio'] = measure(lambda: book.portfolio('user42'), repeat * 50)
+
+    print("Benchmarking get_all_karat_prices...")
+    service = LiveGoldPriceService()
+    results['get_all_karat_prices'] = measure(
+        lambda: service.get_all_karat_prices(STUB_USD_PER_GRAM * STUB_USD_TO_INR), repeat * 50)
+
+    try:
+        import tensorflow  # noqa: F401
+        has_tensorflow = True
+    except ImportError:
+        has_tensorflow = False
+
+    if has_tensorflow:
+        print("Benchmarking train_model (one run, timed per candidate)...")
+        metrics.reset()
+        seed_everything()
+        predictor.train_model(df)
+        for model in ('lstm', 'gru'):
+            stats = metrics.histogram('train_model_seconds', model=model)
+            results[f'train_model[{model}]'] = {'repeat': 1, 'median_ms': round(stats['sum'] * 1000, 2)}
+
+        for horizon in (1, 5, 30):
+            print(f"Benchmarking predict_next_days (horizon={horizon})...")
+            results[f'predict_next_days[{horizon}]'] = measure(
+                lambda: predictor.predict_next_days(df, days=horizon), max(3, repeat // 4))
+    else:
+        results['train_model'] = {'skipped': 'tensorflow not installed'}
+        results['predict_next_days'] = {'skipped': 'tensorflow not installed'}
+
+    print("Benchmarking API routes...")
+    from app import create_app
+    client = create_app('production').test_client()
+    results['GET /api/historical-prices'] = measure(lambda: client.get('/api/historical-prices'), repeat)
+    results['GET /api/candles'] = measure(lambda: client.get('/api/candles?interval=week'), repeat)
+    results['GET /api/calculator'] = measure(lambda: client.get('/api/calculator?karat=22K&weight=10'), repeat * 5)
+
+    print("Benchmarking cold imports...")
+    results['import models.gold_predict'] = bench_import('models.gold_predict', 3)
+    results['import app'] = bench_import('app', 3)
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Return names whose median latency regressed by more than `threshold`"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name, {})
+        if 'median_ms' not in current or 'median_ms' not in before or before['median_ms'] <= 0:
+            continue
+        change = current['median_ms'] / before['median_ms'] - 1
+        current['change_vs_baseline'] = round(change, 4)
+        if change > threshold:
+            regressions.append((name, before['median_ms'], current['median_ms'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='Fewer repetitions')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed median slowdown before flagging (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    results = run(quick=args.quick)
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': SEED,
+            'quick': args.quick,
+            'baseline': args.compare,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 60)
+    for name, stats in results.items():
+        if 'median_ms' in stats:
+            print(f"{name:40s} {stats['median_ms']:>12.3f} ms")
+        else:
+            print(f"{name:40s} {'skipped':>15s}")
+    print("=" * 60)
+    print(f"Results saved to {output}")
+
+    if regressions:
+        print("\nRegressions:")
+        for name, before, after, change in regressions:
+            print(f"  {name}: {before:.3f} ms -> {after:.3f} ms ({change:+.1%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
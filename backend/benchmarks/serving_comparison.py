@@ -0,0 +1,148 @@
+"""
+Side-by-side throughput of the WSGI (gunicorn) and ASGI (uvicorn) deployments
+
+Starts the market simulator, then each server in turn as a subprocess with
+the same number of worker processes. While `--streams` Server-Sent Events
+clients stay connected to /api/stream/prices (the push clients), the
+polled endpoints are loaded as in load_test.py. Servers whose package is
+not installed are skipped.
+
+Usage (from the backend folder):
+    python benchmarks/serving_comparison.py --streams 200 --duration 20 --concurrency 32
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import importlib.util
+import subprocess
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+
+from benchmarks.load_test import DEFAULT_ENDPOINTS, run_load
+
+SERVERS = {
+    'wsgi': ('gunicorn', ['-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:{port}',
+                          '--workers', '{workers}', "app:create_app('production')"]),
+    'asgi': ('uvicorn', ['-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', '{port}',
+                         '--workers', '{workers}', '--log-level', 'warning']),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, workers, env):
+    _, args = SERVERS[mode]
+    command = [sys.executable] + [a.format(port=port, workers=workers) for a in args]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 90
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with code {process.returncode}")
+        try:
+            requests.get(base_url + '/api/health', timeout=2)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start")
+
+
+def open_streams(port, count, timeout=5.0):
+    """Connect `count` SSE clients; returns (sockets, number that received the stream preamble)"""
+    sockets, connected = [], 0
+    request = b"GET /api/stream/prices HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n"
+    for _ in range(count):
+        try:
+            s = socket.create_connection(('127.0.0.1', port), timeout=timeout)
+            s.sendall(request)
+            sockets.append(s)
+        except OSError:
+            break
+    deadline = time.monotonic() + timeout
+    for s in sockets:
+        s.settimeout(max(0.01, deadline - time.monotonic()))
+        try:
+            if s.recv(4096).startswith(b'HTTP/1.1 200'):
+                connected += 1
+        except OSError:
+            pass
+    return sockets, connected
+
+
+def compare(args):
+    from benchmarks.market_simulator import PROVIDERS, start_in_thread
+    profile = {'latency_ms': args.latency_ms, 'error_rate': 0.0, 'rate_limit_rate': 0.0}
+    _, simulator_url = start_in_thread(profiles={name: dict(profile) for name in PROVIDERS})
+    env = dict(os.environ, MARKET_SIMULATOR_URL=simulator_url)
+
+    results = {}
+    for mode, (package, _) in SERVERS.items():
+        if importlib.util.find_spec(package) is None:
+            results[mode] = {'skipped': f'{package} not installed'}
+            continue
+        port = free_port()
+        print(f"Starting {mode} ({package}, {args.workers} workers)...")
+        process, base_url = start_server(mode, port, args.workers, env)
+        try:
+            sockets, connected = open_streams(port, args.streams)
+            print(f"  {connected}/{args.streams} stream clients connected; loading for {args.duration}s...")
+            report = run_load(base_url, args.endpoint or DEFAULT_ENDPOINTS, args.duration, args.concurrency)
+            for s in sockets:
+                s.close()
+            results[mode] = dict(report['total'], streams_connected=connected, endpoints={
+                endpoint: stats for endpoint, stats in report.items() if endpoint != 'total'
+            })
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes for both servers')
+    parser.add_argument('--streams', type=int, default=200, help='Concurrent SSE clients held open during the run')
+    parser.add_argument('--endpoint', action='append', help='Endpoint path to hit (repeatable)')
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--latency-ms', type=float, default=80, help='Simulator median latency')
+    parser.add_argument('--output', help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    results = compare(args)
+
+    print("\n" + "=" * 78)
+    print(f"{'Mode':6s} {'streams':>9s} {'requests':>9s} {'rps':>9s} {'errors':>7s} {'p50 ms':>9s} {'p99 ms':>9s}")
+    for mode, result in results.items():
+        if 'skipped' in result:
+            print(f"{mode:6s} skipped: {result['skipped']}")
+            continue
+        stats = list(result['endpoints'].values())
+        errors = sum(s['errors'] for s in stats)
+        p50 = max(s['p50_ms'] for s in stats) if stats else 0.0
+        p99 = max(s['p99_ms'] for s in stats) if stats else 0.0
+        print(f"{mode:6s} {result['streams_connected']:>9d} {result['requests']:>9d} {result['throughput_rps']:>9.1f} "
+              f"{errors:>7d} {p50:>9.1f} {p99:>9.1f}")
+    print("=" * 78)
+    print("p50/p99 are the slowest endpoint's values")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
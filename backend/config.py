@@ -25,6 +25,43 @@ class Config:
     SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
     SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
+    # Intraday tick history (set TICK_BUFFER_PATH to persist across restarts)
+    TICK_BUFFER_CAPACITY = int(os.getenv('TICK_BUFFER_CAPACITY', '20000'))
+    TICK_BUFFER_PATH = os.getenv('TICK_BUFFER_PATH')
+
+    # Last live price saved to the database by any worker, so each quote is saved once per host
+    PRICE_EVENT_CLAIM_PATH = os.getenv('PRICE_EVENT_CLAIM_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'price_event.claim'))
+
+    # Per-request time budgets in seconds, shared by every upstream call a request makes
+    LIVE_PRICE_DEADLINE = float(os.getenv('LIVE_PRICE_DEADLINE', '5'))
+    PREDICT_DEADLINE = float(os.getenv('PREDICT_DEADLINE', '60'))
+
+    # Prediction archive: full detail for PREDICTION_DETAIL_DAYS, then only the final
+    # forecast per target date; rows targeting dates older than PREDICTION_RETENTION_DAYS are dropped
+    PREDICTION_ARCHIVE_PATH = os.getenv('PREDICTION_ARCHIVE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'predictions.sqlite3'))
+    PREDICTION_DETAIL_DAYS = int(os.getenv('PREDICTION_DETAIL_DAYS', '90'))
+    PREDICTION_RETENTION_DAYS = int(os.getenv('PREDICTION_RETENTION_DAYS', '730'))
+
+    # Trained models and their fitted feature scalers, one pair of files per metal
+    MODEL_DIR = os.getenv('MODEL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'models'))
+    # Load histories and saved models at import and serve them without retraining
+    # (with gunicorn --preload, once in the master and shared by every worker)
+    PRELOAD_MODELS = os.getenv('PRELOAD_MODELS', '0') == '1'
+
+    # Price alerts: re-armed once the price moves back past the threshold by ALERT_HYSTERESIS
+    # (a fraction); notifications are POSTed to ALERT_WEBHOOK_URL when set, else logged
+    ALERTS_DB_PATH = os.getenv('ALERTS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'alerts.sqlite3'))
+    ALERT_HYSTERESIS = float(os.getenv('ALERT_HYSTERESIS', '0.005'))
+    ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
+
+    # Stored jewellery holdings per user, revalued on every live price change
+    HOLDINGS_DB_PATH = os.getenv('HOLDINGS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'holdings.sqlite3'))
+
+    # On-demand request profiling (disabled unless PROFILE_TOKEN is set)
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+    PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'profiles'))
+    PROFILE_MAX_CAPTURES = int(os.getenv('PROFILE_MAX_CAPTURES', '20'))
+
     # Gold purities
     GOLD_PURITIES = {
         '24K': 1.0,
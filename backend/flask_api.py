@@ -36,7 +36,7 @@ def predict():
         karat = request.args.get('karat', '24K')
         use_live = request.args.get('live', 'true').lower() == 'true'
 
-        if karat not in predictor.gold_purities:
+        if karat not in predictor.purities:
             return jsonify({'success': False, 'error': 'Invalid karat type'}), 400
 
         # Return sample data for testing
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for production
+
+Run from the backend folder:
+    gunicorn -c gunicorn.conf.py "app:create_app('production')"
+
+With PRELOAD_MODELS=1 the app is imported once in the master, which loads
+the stored price histories and memory-maps the saved model weights before
+forking (nothing is fetched there); workers share those pages copy-on-write,
+serve forecasts immediately and fetch missing or stale histories themselves.
+"""
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+# Longer than PREDICT_DEADLINE, so deadline-bounded requests finish first
+timeout = int(float(os.getenv('PREDICT_DEADLINE', '60'))) + 30
+
+preload_app = os.getenv('PRELOAD_MODELS', '0') == '1'
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach: a GC pass in a
+    # worker would otherwise write to the shared objects and un-share their pages
+    if preload_app:
+        gc.freeze()
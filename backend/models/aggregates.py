@@ -0,0 +1,186 @@
+import logging
+import threading
+import numpy as np
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+INTERVALS = ('week', 'month')
+DEFAULT_WINDOWS = (20, 50, 200)
+
+
+def period_starts(dates, interval):
+    """First day (datetime64[D]) of the week (Monday) or month holding each date"""
+    dates = np.asarray(dates).astype('datetime64[D]')
+    if interval == 'week':
+        days = dates.astype('int64')
+        return (days - (days + 3) % 7).astype('datetime64[D]')  # 1970-01-01 was a Thursday
+    if interval == 'month':
+        return dates.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Unknown interval '{interval}'. Use one of: {', '.join(INTERVALS)}")
+
+
+def _candles(dates, prices, interval, offset=0):
+    """OHLC of consecutive rows sharing a period; `first` indexes rows from `offset`"""
+    keys = period_starts(dates, interval)
+    first = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.zeros(0, 'i8')
+    last = np.append(first[1:], len(prices)) - 1
+    return {
+        'date': keys[first],
+        'open': prices[first],
+        'high': np.maximum.reduceat(prices, first) if len(first) else prices[:0],
+        'low': np.minimum.reduceat(prices, first) if len(first) else prices[:0],
+        'close': prices[last],
+        'count': last - first + 1,
+        'first': first + offset,
+    }
+
+
+def _moving_average(sums, window, start):
+    """Trailing means of `window` rows for rows start.. from cumulative sums; NaN until the window fills"""
+    ends = np.arange(start + 1, len(sums))
+    means = (sums[ends] - sums[np.maximum(ends - window, 0)]) / window
+    means[ends < window] = np.nan
+    return means
+
+
+class PriceAggregates:
+    """
+    Weekly and monthly OHLC candles and simple moving averages of a daily
+    price series, kept materialized.
+
+    `update` with a history that only appends bars recomputes the tail: the
+    last (possibly partial) week and month are rebuilt from their first bar,
+    and moving averages are extended from the running cumulative sum. A
+    rolling window that also drops bars from the head (as the stored 1y/180d
+    histories do) is aligned on its first date, like FeaturePipeline.transform:
+    the dropped rows are cut off and only the first candle is rebuilt, so the
+    result matches a full rebuild. A history that revises a stored bar is
+    rebuilt in full. Each update publishes a new state in one assignment, so
+    readers never lock.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(sorted(set(windows)))
+        self._lock = threading.Lock()
+        self._state = None
+
+    def update(self, dates, prices):
+        """Materialize `dates` (datetime64[D], ascending) and `prices`; cheap when nothing changed"""
+        state = self._state
+        if state is not None and state['dates'] is dates and state['prices'] is prices:
+            return
+        with self._lock:
+            state = self._state
+            dates = np.asarray(dates).astype('datetime64[D]', copy=False)
+            prices = np.asarray(prices, dtype='f8')
+            head = self._overlap(state, dates, prices)
+            if head is None:
+                self._state = self._build(dates, prices)
+                return
+            if head:
+                state = self._trim(state, head)
+            n = len(state['dates'])
+            if n == len(dates):
+                self._state = dict(state, dates=dates, prices=prices)
+                return
+            self._state = self._extend(state, dates, prices)
+            logger.debug(f"Extended aggregates by {len(dates) - n} bars ({head} dropped from the head)")
+
+    @staticmethod
+    def _overlap(state, dates, prices):
+        """
+        Number of stored bars before `dates[0]` when the new history continues
+        the stored one from there (same dates and prices up to the stored
+        end), else None
+        """
+        if state is None or not len(state['dates']) or not len(dates):
+            return None
+        head = int(np.searchsorted(state['dates'], dates[0]))
+        n = len(state['dates']) - head
+        if n == 0 or n > len(dates):
+            return None
+        if np.array_equal(dates[:n], state['dates'][head:]) and np.array_equal(prices[:n], state['prices'][head:]):
+            return head
+        return None
+
+    def _build(self, dates, prices):
+        sums = np.concatenate([[0.0], np.cumsum(prices)])
+        return {
+            'dates': dates,
+            'prices': prices,
+            'sums': sums,
+            'candles': {interval: _candles(dates, prices, interval) for interval in INTERVALS},
+            'averages': self._averages(sums, 0),
+        }
+
+    def _averages(self, sums, start):
+        return {window: _moving_average(sums, window, start) for window in self.windows}
+
+    def _trim(self, state, head):
+        """State without its first `head` bars, as a full build of the rest would produce"""
+        dates, prices = state['dates'][head:], state['prices'][head:]
+        candles = {}
+        for interval, old in state['candles'].items():
+            # The candle holding the new first bar may lose bars, so rebuild it alone
+            at = int(np.searchsorted(old['first'], head, 'right')) - 1
+            end = int(old['first'][at + 1]) if at + 1 < len(old['first']) else len(state['dates'])
+            first = _candles(dates[:end - head], prices[:end - head], interval)
+            candles[interval] = {
+                name: np.concatenate([first[name], column[at + 1:] - head if name == 'first' else column[at + 1:]])
+                for name, column in old.items()
+            }
+        averages = {}
+        for window, values in state['averages'].items():
+            values = values[head:].copy()
+            values[:window - 1] = np.nan  # Windows reaching into the dropped bars
+            averages[window] = values
+        sums = state['sums'][head:] - state['sums'][head]
+        return {'dates': dates, 'prices': prices, 'sums': sums, 'candles': candles, 'averages': averages}
+
+    def _extend(self, state, dates, prices):
+        n = len(state['dates'])
+        sums = np.concatenate([state['sums'], state['sums'][-1] + np.cumsum(prices[n:])])
+        candles = {}
+        for interval, old in state['candles'].items():
+            # The last stored candle may gain bars, so rebuild it with the new ones
+            start = int(old['first'][-1])
+            tail = _candles(dates[start:], prices[start:], interval, offset=start)
+            candles[interval] = {name: np.concatenate([column[:-1], tail[name]]) for name, column in old.items()}
+        averages = {
+            window: np.concatenate([values, new])
+            for (window, values), new in zip(state['averages'].items(), self._averages(sums, n).values())
+        }
+        return {'dates': dates, 'prices': prices, 'sums': sums, 'candles': candles, 'averages': averages}
+
+    def candles(self, interval, start=None, end=None):
+        """
+        Columns date (period start), open, high, low, close and count of the
+        candles overlapping [start, end] (datetime64[D] or None for open-ended)
+        """
+        if interval not in INTERVALS:
+            raise ValueError(f"Unknown interval '{interval}'. Use one of: {', '.join(INTERVALS)}")
+        candles = self._require()['candles'][interval]
+        lo = np.searchsorted(candles['date'], period_starts(start, interval), 'left') if start is not None else 0
+        hi = np.searchsorted(candles['date'], end, 'right') if end is not None else len(candles['date'])
+        return {name: column[lo:hi] for name, column in candles.items() if name != 'first'}
+
+    def moving_averages(self, windows=None, start=None, end=None):
+        """Columns date, price and one `sma_<window>` per window for the days in [start, end]"""
+        windows = self.windows if windows is None else windows
+        missing = [w for w in windows if w not in self.windows]
+        if missing:
+            raise ValueError(f"Windows must be among: {', '.join(map(str, self.windows))}")
+        state = self._require()
+        lo = np.searchsorted(state['dates'], start, 'left') if start is not None else 0
+        hi = np.searchsorted(state['dates'], end, 'right') if end is not None else len(state['dates'])
+        columns = {'date': state['dates'][lo:hi], 'price': state['prices'][lo:hi]}
+        for window in windows:
+            columns[f'sma_{window}'] = state['averages'][window][lo:hi]
+        return columns
+
+    def _require(self):
+        state = self._state
+        if state is None:
+            raise RuntimeError("Aggregates have not been materialized; call update() first")
+        return state
@@ -0,0 +1,161 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+def _rolling_sum(values, window):
+    """Trailing sums over `window` rows (fewer at the start) from one cumulative sum"""
+    totals = np.concatenate([[0.0], np.cumsum(values)])
+    ends = np.arange(1, len(values) + 1)
+    return totals[ends] - totals[np.maximum(ends - window, 0)]
+
+
+def _parse_dates(values):
+    """Day dates of a Date column: datetimes, or strings/timestamps starting with YYYY-MM-DD"""
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]')
+    return np.array([str(value)[:10] for value in values], dtype='datetime64[D]')
+
+
+def _calendar(dates):
+    """Day-of-week and month as points on a circle, so Sunday sits next to Monday"""
+    days = dates.astype('datetime64[D]').astype('int64')
+    weekday = (days + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+    month = dates.astype('datetime64[M]').astype('int64') % 12
+    return np.stack([
+        np.sin(2 * np.pi * weekday / 7), np.cos(2 * np.pi * weekday / 7),
+        np.sin(2 * np.pi * month / 12), np.cos(2 * np.pi * month / 12)
+    ], axis=-1)
+
+
+class FeaturePipeline:
+    """
+    Model inputs derived from the daily price series: price, log return,
+    rolling means and volatilities (std of log returns), USD/INR and
+    calendar features.
+
+    `compute` evaluates every row with cumulative-sum rolling kernels;
+    `next_rows` evaluates just the newest row for a batch of price tails,
+    which is how forecasts are fed back and how `transform` extends its
+    cache when a history gains a bar, instead of recomputing the whole
+    series. Rows near the start use the shorter windows available.
+    """
+
+    def __init__(self, mean_windows=(5, 20), vol_windows=(5, 20)):
+        self.mean_windows = tuple(mean_windows)
+        self.vol_windows = tuple(vol_windows)
+        self.columns = (
+            ('price', 'log_return')
+            + tuple(f'mean_{w}' for w in self.mean_windows)
+            + tuple(f'vol_{w}' for w in self.vol_windows)
+            + ('usd_inr', 'dow_sin', 'dow_cos', 'month_sin', 'month_cos')
+        )
+        # Prices needed to compute one full row
+        self.lookback = max(self.mean_windows + self.vol_windows) + 1
+        # (dates, prices, usd_inr, rows) of the last transformed history
+        self._cache = None
+
+    def compute(self, prices, usd_inr, dates):
+        """Feature rows [len(prices), len(columns)] for a whole series"""
+        prices = np.asarray(prices, dtype='f8')
+        returns = np.concatenate([[0.0], np.diff(np.log(prices))])
+        counts = np.minimum(np.arange(1, len(prices) + 1), self.lookback)
+        columns = [prices, returns]
+        for w in self.mean_windows:
+            columns.append(_rolling_sum(prices, w) / np.minimum(counts, w))
+        for w in self.vol_windows:
+            n = np.minimum(counts, w)
+            mean = _rolling_sum(returns, w) / n
+            columns.append(np.sqrt(np.maximum(_rolling_sum(returns ** 2, w) / n - mean ** 2, 0.0)))
+        columns.append(np.asarray(usd_inr, dtype='f8'))
+        return np.column_stack(columns + [_calendar(np.asarray(dates))])
+
+    def next_rows(self, tails, usd_inr, dates):
+        """
+        Feature row of the newest bar for each of a batch of series.
+        `tails` is [batch, lookback] prices ending with that bar; `usd_inr`
+        and `dates` hold one value per series.
+        """
+        tails = np.asarray(tails, dtype='f8')
+        returns = np.diff(np.log(tails), axis=1)
+        columns = [tails[:, -1], returns[:, -1]]
+        columns += [tails[:, -w:].mean(axis=1) for w in self.mean_windows]
+        columns += [returns[:, -w:].std(axis=1) for w in self.vol_windows]
+        columns.append(np.broadcast_to(np.asarray(usd_inr, dtype='f8'), len(tails)))
+        return np.column_stack(columns + [_calendar(np.asarray(dates))])
+
+    def series(self, df, fx_rate, rows=slice(None)):
+        """
+        Dates (datetime64[D]), prices and USD/INR of a history frame, or of
+        its `rows` slice; missing rates use `fx_rate`
+        """
+        dates = _parse_dates(np.asarray(df['Date'].array[rows]))
+        prices = np.asarray(df['Price_Per_Gram'].array[rows], dtype='f8')
+        if 'USD_INR' in df:
+            usd_inr = np.asarray(df['USD_INR'].array[rows], dtype='f8')
+            usd_inr = np.where(np.isnan(usd_inr), float(fx_rate), usd_inr)
+        else:
+            usd_inr = np.full(len(prices), float(fx_rate))
+        return dates, prices, usd_inr
+
+    def freeze(self):
+        """Make the cached arrays read-only, e.g. before forking workers that share them"""
+        if self._cache is not None:
+            for array in self._cache:
+                array.setflags(write=False)
+
+    def transform(self, df, fx_rate):
+        """
+        Feature rows for a history frame (Date, Price_Per_Gram, optional
+        USD_INR). A frame that continues the cached one is served from the
+        cache: only its first bar, the last `lookback` bars it shares with
+        the cache and its new bars are parsed and checked, so extending a
+        long history costs O(new bars). A history that starts earlier or
+        revises a checked price is recomputed in full.
+        """
+        rows = self._extend(df, fx_rate)
+        if rows is not None:
+            return rows
+        dates, prices, usd_inr = self.series(df, fx_rate)
+        rows = self.compute(prices, usd_inr, dates)
+        self._cache = (dates, prices, usd_inr, rows)
+        return rows
+
+    def _extend(self, df, fx_rate):
+        """Rows of `df` from the cache plus its new bars, or None when it does not continue the cache"""
+        cache = self._cache
+        if cache is None or len(cache[0]) < self.lookback or len(df) == 0:
+            return None
+        cached_dates, cached_prices, cached_fx, cached_rows = cache
+        first = np.datetime64(str(df['Date'].iat[0])[:10], 'D')
+        start = int(np.searchsorted(cached_dates, first))
+        if start == len(cached_dates) or cached_dates[start] != first:
+            return None
+
+        # Bars of df already in the cache; the last `checked` of them are compared with it
+        known = min(len(df), len(cached_dates) - start)
+        checked = min(known, self.lookback)
+        end = start + known
+        dates, prices, usd_inr = self.series(df, fx_rate, slice(known - checked, None))
+        if not (np.array_equal(dates[:checked], cached_dates[end - checked:end])
+                and np.allclose(prices[:checked], cached_prices[end - checked:end])):
+            return None
+        if len(dates) == checked:
+            return cached_rows[start:end]
+        if dates[checked] <= cached_dates[-1]:
+            return None
+
+        start_row = len(cached_rows)
+        cached_dates = np.concatenate([cached_dates, dates[checked:]])
+        cached_prices = np.concatenate([cached_prices, prices[checked:]])
+        cached_fx = np.concatenate([cached_fx, usd_inr[checked:]])
+        tails = np.lib.stride_tricks.sliding_window_view(cached_prices, self.lookback)[start_row - self.lookback + 1:]
+        cached_rows = np.concatenate([
+            cached_rows, self.next_rows(tails, cached_fx[start_row:], cached_dates[start_row:])
+        ])
+        self._cache = (cached_dates, cached_prices, cached_fx, cached_rows)
+        logger.debug(f"Extended feature cache by {len(dates) - checked} bars")
+        return cached_rows[start:]
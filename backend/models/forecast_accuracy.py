@@ -0,0 +1,207 @@
+import os
+import sys
+import sqlite3
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+try:
+    from ..utils.fork_safety import reset_after_fork
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.fork_safety import reset_after_fork
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = ('n', 'sum_err', 'sum_abs_err', 'sum_sq_err', 'sum_abs_pct_err', 'direction_n', 'direction_hits')
+
+
+class ForecastAccuracy:
+    """
+    Running error statistics of archived forecasts against realized prices.
+
+    Stats are kept as sums per (model_version, karat, horizon) next to the
+    prediction archive, together with the last realized date already
+    evaluated. `observe` only looks at realized prices after that date and
+    joins each one against the forecasts targeting it, so each update costs
+    O(new rows) and history is never rescanned.
+
+    Realized prices arrive in USD per gram of pure metal; they are converted
+    with that day's INR rate and the grade purity to match the archive.
+    One tracker covers one metal, i.e. the grades in `purities`.
+    """
+
+    def __init__(self, archive, purities, min_samples=10, metal='gold'):
+        self.archive = archive
+        self.purities = purities
+        self.min_samples = min_samples
+        self.state_key = f'evaluated_through:{metal}'
+        self._grades = ', '.join('?' * len(purities))
+        self._local = threading.local()
+        reset_after_fork(self)
+        self._lock = threading.Lock()
+        conn = self._connect()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS forecast_accuracy ("
+            " model_version TEXT NOT NULL, karat TEXT NOT NULL, horizon INTEGER NOT NULL,"
+            " n INTEGER NOT NULL, sum_err REAL NOT NULL, sum_abs_err REAL NOT NULL,"
+            " sum_sq_err REAL NOT NULL, sum_abs_pct_err REAL NOT NULL,"
+            " direction_n INTEGER NOT NULL, direction_hits INTEGER NOT NULL,"
+            " PRIMARY KEY (model_version, karat, horizon)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS forecast_accuracy_state (key TEXT PRIMARY KEY, value TEXT);"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.archive.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def evaluated_through(self):
+        """Last realized date (YYYY-MM-DD) folded into the stats, or None"""
+        row = self._connect().execute(
+            "SELECT value FROM forecast_accuracy_state WHERE key = ?", (self.state_key,)
+        ).fetchone()
+        return row['value'] if row else None
+
+    def observe(self, history, inr_rate):
+        """
+        Fold realized prices newer than the watermark into the stats.
+        `history` has Date and Price_Per_Gram (USD, 24K) columns and usually
+        USD_INR, the rate of each day; days without one use `inr_rate`.
+        Returns the number of forecasts evaluated.
+        """
+        with self._lock:
+            realized = pd.DataFrame({
+                'target_date': pd.to_datetime(history['Date'].astype(str).str[:10]).dt.strftime('%Y-%m-%d'),
+                'actual_usd': history['Price_Per_Gram'].astype(float),
+                'usd_inr': history['USD_INR'].astype(float).fillna(inr_rate) if 'USD_INR' in history else inr_rate
+            }).drop_duplicates('target_date', keep='last')
+            # Today's row may still be an intraday price; only settled days count
+            realized = realized[realized['target_date'] < datetime.now().strftime('%Y-%m-%d')]
+            watermark = self.evaluated_through()
+            if watermark:
+                realized = realized[realized['target_date'] > watermark]
+            if realized.empty:
+                return 0
+
+            conn = self._connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                # Another process may have folded some of these days in since the check above
+                watermark = self.evaluated_through()
+                if watermark:
+                    realized = realized[realized['target_date'] > watermark]
+                if realized.empty:
+                    conn.execute('COMMIT')
+                    return 0
+                dates = realized['target_date'].tolist()
+                forecasts = pd.DataFrame(
+                    [tuple(row) for row in conn.execute(
+                        "SELECT COALESCE(model_version, 'unknown'), karat, horizon, target_date, predicted_price, live_anchor"
+                        f" FROM predictions WHERE target_date IN ({', '.join('?' * len(dates))})"
+                        f" AND karat IN ({self._grades})", dates + list(self.purities)
+                    )],
+                    columns=['model_version', 'karat', 'horizon', 'target_date', 'predicted', 'anchor']
+                )
+                stats = self._aggregate(forecasts.merge(realized, on='target_date'))
+                conn.executemany(
+                    f"INSERT INTO forecast_accuracy (model_version, karat, horizon, {', '.join(STAT_COLUMNS)})"
+                    f" VALUES ({', '.join('?' * (3 + len(STAT_COLUMNS)))})"
+                    " ON CONFLICT (model_version, karat, horizon) DO UPDATE SET "
+                    + ', '.join(f"{c} = {c} + excluded.{c}" for c in STAT_COLUMNS),
+                    stats
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO forecast_accuracy_state (key, value) VALUES (?, ?)",
+                    (self.state_key, max(dates))
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+
+            evaluated = sum(row[3] for row in stats)
+            if evaluated:
+                logger.info(f"Evaluated {evaluated} forecasts against prices through {max(dates)}")
+            return evaluated
+
+    def _aggregate(self, joined):
+        """Per-group error sums for the new forecast/price pairs"""
+        if joined.empty:
+            return []
+        purity = joined['karat'].map(self.purities).fillna(1.0).to_numpy()
+        # Each realized price at its own day's rate, like the live price the forecast was anchored to
+        actual = joined['actual_usd'].to_numpy() * joined['usd_inr'].to_numpy() * purity
+        predicted = joined['predicted'].to_numpy(dtype='f8')
+        anchor = joined['anchor'].to_numpy(dtype='f8')
+        err = predicted - actual
+        has_anchor = ~np.isnan(anchor)
+
+        frame = joined[['model_version', 'karat', 'horizon']].assign(
+            n=1,
+            sum_err=err,
+            sum_abs_err=np.abs(err),
+            sum_sq_err=err ** 2,
+            sum_abs_pct_err=np.abs(err) / actual,
+            direction_n=has_anchor.astype(int),
+            direction_hits=(has_anchor & (np.sign(predicted - anchor) == np.sign(actual - anchor))).astype(int)
+        )
+        grouped = frame.groupby(['model_version', 'karat', 'horizon'], as_index=False).sum()
+        casts = (str, str, int, int, float, float, float, float, int, int)
+        return [tuple(cast(value) for cast, value in zip(casts, row)) for row in grouped.itertuples(index=False)]
+
+    def summary(self, karat=None, model_version=None):
+        """Error metrics (INR) per model version, karat and horizon"""
+        clauses, params = [f"karat IN ({self._grades})"], list(self.purities)
+        if karat:
+            clauses.append("karat = ?")
+            params.append(karat)
+        if model_version:
+            clauses.append("model_version = ?")
+            params.append(model_version)
+        where = f"WHERE {' AND '.join(clauses)}"
+        rows = self._connect().execute(
+            f"SELECT * FROM forecast_accuracy {where} ORDER BY model_version, karat, horizon", params
+        )
+        report = []
+        for row in rows:
+            n = row['n']
+            report.append({
+                'model_version': row['model_version'],
+                'karat': row['karat'],
+                'horizon': row['horizon'],
+                'count': n,
+                'mae': round(row['sum_abs_err'] / n, 2),
+                'rmse': round((row['sum_sq_err'] / n) ** 0.5, 2),
+                'mape': round(100 * row['sum_abs_pct_err'] / n, 3),
+                'bias': round(row['sum_err'] / n, 2),
+                'directional_accuracy': round(row['direction_hits'] / row['direction_n'], 3) if row['direction_n'] else None
+            })
+        return report
+
+    def architecture_mape(self):
+        """Production MAPE per model family (the model_version prefix, e.g. lstm or gru)"""
+        rows = self._connect().execute(
+            "SELECT substr(model_version, 1, instr(model_version || '-', '-') - 1) AS family,"
+            f" SUM(n) AS n, SUM(sum_abs_pct_err) AS pct FROM forecast_accuracy WHERE karat IN ({self._grades})"
+            " GROUP BY family", list(self.purities)
+        )
+        return {row['family']: (row['n'], 100 * row['pct'] / row['n']) for row in rows if row['n']}
+
+    def preferred_architecture(self, candidates):
+        """
+        The candidate with the lowest production MAPE, or None until every
+        candidate has at least `min_samples` evaluated forecasts
+        """
+        mape = self.architecture_mape()
+        if not all(name in mape and mape[name][0] >= self.min_samples for name in candidates):
+            return None
+        return min(candidates, key=lambda name: mape[name][1])
@@ -0,0 +1,71 @@
+import re
+import time
+import numpy as np
+
+# Used until the first successful fetch, so INR pages keep working offline
+FALLBACK_RATES = {'USD': 1.0, 'INR': 83.0}
+
+
+def normalize_currency(currency):
+    """Upper-case ISO 4217 code, or ValueError for anything that cannot be one"""
+    code = str(currency).strip().upper()
+    if not re.fullmatch(r'[A-Z]{3}', code):
+        raise ValueError(f"Invalid currency '{currency}'. Use a 3-letter ISO code such as INR or USD")
+    return code
+
+
+class FxRates:
+    """
+    Table of USD exchange rates for every currency the rates API returns.
+
+    The whole vector is replaced in one assignment on refresh, so readers
+    never see a half-updated table and need no lock. Conversions index the
+    rate array once, whether for one currency or many.
+    """
+
+    def __init__(self, rates=None):
+        self.timestamp = None
+        self._table = None
+        self.update(rates or FALLBACK_RATES, timestamp=None)
+
+    def update(self, rates, timestamp=None):
+        """Replace the table with a {currency: units per USD} mapping"""
+        rates = {str(code).upper(): float(value) for code, value in rates.items() if value and float(value) > 0}
+        rates['USD'] = 1.0
+        codes = tuple(sorted(rates))
+        values = np.array([rates[code] for code in codes], dtype='f8')
+        self._table = ({code: i for i, code in enumerate(codes)}, values)
+        self.timestamp = timestamp
+
+    def age(self):
+        """Seconds since the last successful refresh, or None when never refreshed"""
+        return None if self.timestamp is None else time.time() - self.timestamp
+
+    def currencies(self):
+        return sorted(self._table[0])
+
+    def _indices(self, currencies):
+        index, _ = self._table
+        try:
+            return [index[normalize_currency(c)] for c in currencies]
+        except KeyError as e:
+            raise ValueError(f"Unsupported currency {e.args[0]}") from None
+
+    def rate(self, currency):
+        """Units of `currency` per USD"""
+        return float(self._table[1][self._indices([currency])[0]])
+
+    def cross(self, from_currency, to_currency):
+        """Units of `to_currency` per unit of `from_currency`"""
+        frm, to = self._table[1][self._indices([from_currency, to_currency])]
+        return float(to / frm)
+
+    def convert(self, usd_values, currency):
+        """
+        Convert USD amounts with one lookup. A single currency returns an array
+        shaped like `usd_values`; a list of currencies adds a trailing axis.
+        """
+        values = np.asarray(usd_values, dtype='f8')
+        if isinstance(currency, str):
+            return values * self.rate(currency)
+        return values[..., None] * self._table[1][self._indices(currency)]
@@ -1,72 +1,210 @@
 try:
     from .live_price import LiveGoldPriceService
+    from .prediction_archive import PredictionArchive
+    from .forecast_accuracy import ForecastAccuracy
+    from .features import FeaturePipeline
+    from .numpy_model import NumpyRecurrentModel, export_weights
+    from .metals import METALS, DEFAULT_METAL, TROY_OZ_GRAMS, get_metal, history_filename
 except ImportError:
     from live_price import LiveGoldPriceService
+    from prediction_archive import PredictionArchive
+    from forecast_accuracy import ForecastAccuracy
+    from features import FeaturePipeline
+    from numpy_model import NumpyRecurrentModel, export_weights
+    from metals import METALS, DEFAULT_METAL, TROY_OZ_GRAMS, get_metal, history_filename
 import pandas as pd
 import numpy as np
 import os
+import sys
+import time
+import joblib
+import contextvars
 import requests
 import logging
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import r2_score, mean_squared_error
 
+try:
+    from ..utils.metrics import metrics
+    from ..utils.deadline import expired, remaining, request_timeout
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.metrics import metrics
+    from utils.deadline import expired, remaining, request_timeout
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+MODEL_DIR = os.path.join(DATA_DIR, 'models')
+
+# Daily USD/INR rate, downloaded with the metal futures as a model feature
+FX_TICKER = 'INR=X'
+
+
+def fetch_histories(metals, period="1y"):
+    """
+    Daily price history (Date, Price_Per_Gram in USD, USD_INR) for several
+    metals from one batched yfinance download; metals without data are left out
+    """
+    if expired():
+        return {}
+    import yfinance as yf
+    tickers = {METALS[metal]['yahoo_ticker']: metal for metal in metals}
+    data = yf.download(list(tickers) + [FX_TICKER], period=period, interval="1d", progress=False, timeout=request_timeout())
+    if data.empty:
+        return {}
+    closes = data['Close']
+    if not hasattr(closes, 'columns'):
+        closes = closes.to_frame(next(iter(tickers)))
+    usd_inr = closes[FX_TICKER].ffill().bfill() if FX_TICKER in closes else None
+
+    histories = {}
+    for ticker, metal in tickers.items():
+        if ticker not in closes:
+            continue
+        series = closes[ticker].dropna()
+        if series.empty:
+            continue
+        histories[metal] = pd.DataFrame({
+            'Date': pd.to_datetime(series.index),
+            'Price_Per_Gram': series.to_numpy() / TROY_OZ_GRAMS,  # Futures are in USD per troy oz
+            'USD_INR': usd_inr.reindex(series.index).to_numpy() if usd_inr is not None else np.nan
+        })
+    return histories
+
+
+def predict_all_metals(predictors, karats=None, use_live_price=True, max_workers=None):
+    """
+    Forecasts for several metals at once: live prices and histories are
+    fetched in one batched call each, then the per-metal training runs
+    in parallel instead of one full pipeline after another.
+    `predictors` maps metal to GoldPricePredictor; `karats` optionally maps
+    metal to the grade to report (default: the purest).
+    """
+    karats = karats or {}
+    service = next(iter(predictors.values())).live_price_service
+    if use_live_price:
+        service.get_best_live_prices(list(predictors))  # Warms every metal's cache in as few calls as possible
+    try:
+        histories = fetch_histories(list(predictors))
+    except Exception as e:
+        logger.error(f"Batched history fetch failed: {e}")
+        histories = {}
+
+    def run(metal):
+        predictor = predictors[metal]
+        history = predictor.store_history(histories[metal], source='yfinance') if metal in histories else None
+        karat = karats.get(metal) or next(iter(predictor.purities))
+        return metal, predictor.get_predictions(karat, use_live_price=use_live_price, history=history)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(predictors), thread_name_prefix='predict') as pool:
+        # Each job runs in a copy of the caller's context, so the request deadline applies there too
+        futures = [pool.submit(contextvars.copy_context().run, run, metal) for metal in predictors]
+        return dict(future.result() for future in futures)
+
+
 class GoldPricePredictor:
-    def __init__(self):
+    def __init__(self, live_price_service=None, archive=None, metal=DEFAULT_METAL, model_dir=MODEL_DIR):
         self.model = None
+        self.model_version = None
+        # Candidates not selected, as name -> (model, days per pass, version); their
+        # forecasts are archived as shadow runs so every family builds a track record
+        self.shadow_models = {}
+        # Target scaler (price) and per-column scaler of the feature rows
         self.scaler = MinMaxScaler()
+        self.feature_scaler = MinMaxScaler()
+        self.features = FeaturePipeline()
         self.sequence_length = 30  # Use 30 days of history to predict next day
-        self.gold_purities = {
-            '24K': 1.0,
-            '22K': 0.916,
-            '18K': 0.750,
-            '14K': 0.583
-        }
-        # Add live price service
-        self.live_price_service = LiveGoldPriceService()
+        # Days emitted per forward pass by the direct multi-horizon model (1 for lstm/gru)
+        self.forecast_horizon = int(os.getenv('FORECAST_HORIZON', '5'))
+        self.model_horizon = 1
+        # Gold by default; silver and platinum use fineness grades instead of karats
+        self.metal = get_metal(metal)
+        self.purities = METALS[self.metal]['purities']
+        # Add live price service (pass one in to share its price cache)
+        self.live_price_service = live_price_service or LiveGoldPriceService()
         # Get Alpha Vantage key
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_KEY')
-    
+        # Duration of the last full training run, used to decide if a deadline allows retraining
+        self.last_training_seconds = None
+        # Monte Carlo prediction intervals: dropout samples and the time allowed to compute them
+        self.interval_samples = int(os.getenv('PREDICTION_INTERVAL_SAMPLES', '200'))
+        self.interval_min_samples = 20
+        self.interval_budget = float(os.getenv('PREDICTION_INTERVAL_BUDGET', '0.5'))
+        self.interval_quantiles = (10, 50, 90)
+        # Every forecast is appended here (pass one in to share it)
+        self.archive = archive or PredictionArchive()
+        # Production error stats of archived forecasts, fed back into model selection
+        self.accuracy = ForecastAccuracy(self.archive, self.purities, metal=self.metal)
+        # Model families compared by train_model: builder and days predicted per forward pass
+        self.model_builders = {
+            'lstm': (self.build_lstm_model, 1),
+            'gru': (self.build_gru_model, 1),
+        }
+        if os.getenv('DIRECT_FORECAST_MODEL', '0') == '1':
+            self.model_builders['direct'] = (self.build_direct_model, self.forecast_horizon)
+        # Trained model and its fitted scalers are saved here, so a restart serves them without retraining
+        self.model_dir = model_dir
+        # Set by preload(): history and model loaded before forking, served without retraining
+        self.history = None
+        self.preloaded = False
+        # Preloaded history is replaced by a fresh fetch in the worker once it is this old
+        self.history_max_age = float(os.getenv('HISTORY_MAX_AGE', '21600'))
+        self.history_loaded_at = None
+
     def get_current_live_price(self):
-        """Get current live gold price in INR"""
-        price_data = self.live_price_service.get_best_live_price()
+        """Get current live metal price in INR"""
+        return self.get_current_live_price_status()[0]
+
+    def get_current_live_price_status(self):
+        """Get current live metal price in INR and whether it is degraded (stale or sample)"""
+        price_data = self.live_price_service.get_best_live_price(self.metal)
 
         if price_data:
             # Get INR price
             inr_rate = self.live_price_service.get_usd_to_inr_rate()
             usd_price = price_data['price_per_gram_24k']
             inr_price = usd_price * inr_rate
-            return round(inr_price, 2)
+            return round(inr_price, 2), bool(price_data.get('degraded'))
 
         # Fallback to yfinance if APIs fail
+        if expired():
+            return None, True
         try:
             import yfinance as yf
-            gold = yf.Ticker("GC=F")
-            data = gold.history(period="1d", interval="1m")
+            ticker = yf.Ticker(METALS[self.metal]['yahoo_ticker'])
+            data = ticker.history(period="1d", interval="1m", timeout=request_timeout())
             if not data.empty:
-                usd_price = data['Close'].iloc[-1] / 31.1035  # GC=F per troy oz
+                usd_price = data['Close'].iloc[-1] / TROY_OZ_GRAMS  # Futures are per troy oz
                 inr_rate = self.live_price_service.get_usd_to_inr_rate()
-                return round(usd_price * inr_rate, 2)
+                return round(usd_price * inr_rate, 2), False
         except:
             pass
 
-        return None
+        return None, False
 
     def fetch_gold_data_alpha_vantage(self, days=180):
-        """Fetch historical gold data from Alpha Vantage"""
-        if not self.alpha_vantage_key:
+        """Fetch historical metal data from Alpha Vantage (gold only)"""
+        function = METALS[self.metal]['alphavantage_daily']
+        if not self.alpha_vantage_key or not function or expired():
             return None
-        
+
+        # Shares the host-wide Alpha Vantage budget with the live price service
+        quota = self.live_price_service.quota
+        if quota and not quota.try_acquire('alphavantage', self.alpha_vantage_key):
+            logger.warning("Alpha Vantage quota exhausted, skipping historical fetch")
+            return None
+
         try:
-            url = f"https://www.alphavantage.co/query"
+            url = self.live_price_service.alphavantage_url
             params = {
-                'function': 'GOLD_DAILY',
+                'function': function,
                 'apikey': self.alpha_vantage_key
             }
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=request_timeout())
             data = response.json()
             
             if 'Time Series (Daily)' in data:
@@ -83,53 +221,45 @@ class GoldPricePredictor:
                 df = df[df['Date'] >= cutoff_date]
                 return df
             else:
+                if quota and ('Note' in data or 'Information' in data):
+                    quota.exhaust('alphavantage', self.alpha_vantage_key)
                 logger.error(f"Alpha Vantage error: {data.get('Note', 'Unknown error')}")
                 return None
         except Exception as e:
             logger.error(f"Error fetching from Alpha Vantage: {e}")
             return None
 
+    def store_history(self, df, source):
+        """Save freshly fetched history to the data folder and score forecasts against it"""
+        logger.info(f"Fetched {self.metal} data from {source}")
+        data_path = os.path.join(DATA_DIR, history_filename(self.metal))
+        df.to_csv(data_path, index=False)
+        logger.info(f"Historical data saved to {data_path}")
+        self.evaluate_forecasts(df)
+        return df
+
+    @metrics.timed('fetch_gold_data_seconds')
     def fetch_gold_data(self, days=180):
-        """Fetch historical gold data"""
+        """Fetch historical data for this predictor's metal"""
         # Try Alpha Vantage first
         df = self.fetch_gold_data_alpha_vantage(days)
         if df is not None and not df.empty:
-            logger.info("Fetched data from Alpha Vantage")
-
-            # Save to data folder
-            data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'gold_historical_data.csv')
-            df.to_csv(data_path, index=False)
-            logger.info(f"Historical data saved to {data_path}")
+            return self.store_history(df, 'Alpha Vantage')
 
-            return df
-
-        # Fallback to yfinance
+        # Fallback to yfinance (1y of daily futures closes)
         try:
-            import yfinance as yf
-            gold = yf.Ticker("GC=F")  # Gold futures
-            df = gold.history(period="1y", interval="1d")  # Use 1y instead of 180d
-            df = df.reset_index()
-            df['Price_Per_Gram'] = df['Close'] / 31.1035  # GC=F is in USD per troy oz
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df[['Date', 'Price_Per_Gram']]
-
-            if not df.empty:
-                logger.info("Fetched data from yfinance")
-
-                # Save to data folder
-                data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'gold_historical_data.csv')
-                df.to_csv(data_path, index=False)
-                logger.info(f"Historical data saved to {data_path}")
-
-                return df
-            else:
-                logger.warning("No data from yfinance")
+            if expired():
+                raise TimeoutError("deadline reached before yfinance fetch")
+            df = fetch_histories([self.metal]).get(self.metal)
+            if df is not None and not df.empty:
+                return self.store_history(df, 'yfinance')
+            logger.warning("No data from yfinance")
         except Exception as e:
             logger.error(f"Error fetching data: {e}")
 
         # Last resort: load from saved CSV
         try:
-            data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'gold_historical_data.csv')
+            data_path = os.path.join(DATA_DIR, history_filename(self.metal))
             df = pd.read_csv(data_path)
             df['Date'] = pd.to_datetime(df['Date'])
             logger.info("Loaded data from saved CSV")
@@ -138,14 +268,56 @@ class GoldPricePredictor:
             logger.error(f"Error loading saved data: {e}")
             return None
 
-    def create_sequences(self, data, sequence_length):
-        """Create sequences for LSTM training"""
+    def evaluate_forecasts(self, df):
+        """Score archived forecasts against any newly realized prices in `df`"""
+        try:
+            self.accuracy.observe(df, self.live_price_service.get_usd_to_inr_rate())
+        except Exception as e:
+            logger.warning(f"Could not update forecast accuracy: {e}")
+
+    def create_sequences(self, data, sequence_length, horizon=1, target=None):
+        """
+        Create sequences for LSTM training: windows of `data` rows (all
+        feature channels) with the next `horizon` values of `target`
+        (default: `data` itself) as targets
+        """
+        target = data if target is None else target
         X, y = [], []
-        for i in range(len(data) - sequence_length):
+        for i in range(len(data) - sequence_length - horizon + 1):
             X.append(data[i:i+sequence_length])
-            y.append(data[i+sequence_length])
+            y.append(target[i+sequence_length:i+sequence_length+horizon].reshape(-1))
         return np.array(X), np.array(y)
 
+    def usd_inr(self):
+        return self.live_price_service.get_usd_to_inr_rate()
+
+    def feature_rows(self, df):
+        """Scaled feature rows of a history frame, using the fitted feature scaler"""
+        rows = self.features.transform(df, self.usd_inr())
+        return rows * self.feature_scaler.scale_ + self.feature_scaler.min_
+
+    def forecast_state(self, df, ends):
+        """Price tails, USD/INR and date at the given row indices, to derive features of forecast days"""
+        dates, prices, usd_inr = self.features.series(df, self.usd_inr())
+        lookback = self.features.lookback
+        tails = np.lib.stride_tricks.sliding_window_view(prices, lookback)[np.asarray(ends) - lookback + 1]
+        return tails, usd_inr[ends], dates[ends]
+
+    def advance(self, sequences, state, step_scaled):
+        """
+        Shift forecast days into the input windows: each new feature row is
+        computed from the price tail extended by the forecast price
+        """
+        tails, usd_inr, dates = state
+        prices = (step_scaled - self.scaler.min_) / self.scaler.scale_
+        rows = []
+        for k in range(prices.shape[1]):
+            tails = np.concatenate([tails[:, 1:], prices[:, k:k+1]], axis=1)
+            dates = dates + np.timedelta64(1, 'D')
+            rows.append(self.features.next_rows(tails, usd_inr, dates))
+        rows = np.stack(rows, axis=1) * self.feature_scaler.scale_ + self.feature_scaler.min_
+        return np.concatenate([sequences[:, rows.shape[1]:], rows], axis=1), (tails, usd_inr, dates)
+
     def build_lstm_model(self, input_shape):
         from tensorflow.keras.models import Sequential
         from tensorflow.keras.layers import LSTM, Dense, Dropout
@@ -172,114 +344,375 @@ class GoldPricePredictor:
         model.compile(optimizer='adam', loss='mse')
         return model
 
+    def build_direct_model(self, input_shape, horizon):
+        """GRU encoder with a multi-output head: all `horizon` days in one forward pass"""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import GRU, Dense, Dropout
+        model = Sequential([
+            GRU(64, activation='relu', input_shape=input_shape, return_sequences=True),
+            Dropout(0.2),
+            GRU(64, activation='relu'),
+            Dropout(0.2),
+            Dense(horizon)
+        ])
+        model.compile(optimizer='adam', loss='mse')
+        return model
+
+    def rollout(self, model, X, days, steps_per_pass, state):
+        """
+        Forecast `days` ahead (scaled prices) for every window in X, feeding
+        outputs back `steps_per_pass` at a time; `state` comes from forecast_state
+        """
+        outputs = []
+        sequences = X
+        while True:
+            step = model.predict(sequences, verbose=0).reshape(len(X), steps_per_pass)
+            outputs.append(step)
+            if len(outputs) * steps_per_pass >= days:
+                return np.concatenate(outputs, axis=1)[:, :days]
+            sequences, state = self.advance(sequences, state, step)
+
     def train_model(self, df):
-        """Train and compare LSTM and GRU models, select the best one"""
+        """Train and compare the registered model families (LSTM, GRU, optional direct), select the best one"""
         prices = df['Price_Per_Gram'].values.reshape(-1, 1)
         prices_scaled = self.scaler.fit_transform(prices)
+        features_scaled = self.feature_scaler.fit_transform(self.features.transform(df, self.usd_inr()))
         
-        X, y = self.create_sequences(prices_scaled, self.sequence_length)
+        # H-step targets, so every candidate is validated on the same multi-day forecast
+        horizon = max(steps for _, steps in self.model_builders.values())
+        X, y = self.create_sequences(features_scaled, self.sequence_length, horizon, target=prices_scaled)
         
         # Split into train and validation
         train_size = int(0.8 * len(X))
         X_train, X_val = X[:train_size], X[train_size:]
         y_train, y_val = y[:train_size], y[train_size:]
+        val_state = self.forecast_state(df, np.arange(train_size, len(X)) + self.sequence_length - 1)
         
-        input_shape = (self.sequence_length, 1)
+        input_shape = (self.sequence_length, len(self.features.columns))
         
-        # Train LSTM
-        logger.info("Training LSTM model...")
-        lstm_model = self.build_lstm_model(input_shape)
-        lstm_model.fit(X_train, y_train, epochs=50, batch_size=32, verbose=0)
-        lstm_pred = lstm_model.predict(X_val, verbose=0).flatten()
-        lstm_r2 = r2_score(y_val, lstm_pred)
-        lstm_mse = mean_squared_error(y_val, lstm_pred)
-
-        # Train GRU
-        logger.info("Training GRU model...")
-        gru_model = self.build_gru_model(input_shape)
-        gru_model.fit(X_train, y_train, epochs=50, batch_size=32, verbose=0)
-        gru_pred = gru_model.predict(X_val, verbose=0).flatten()
-        gru_r2 = r2_score(y_val, gru_pred)
-        gru_mse = mean_squared_error(y_val, gru_pred)
-
-        logger.info(f"Model Comparison: LSTM - R2: {lstm_r2:.4f}, MSE: {lstm_mse:.6f}; GRU - R2: {gru_r2:.4f}, MSE: {gru_mse:.6f}")
-
-        # Select best model (higher R2, lower MSE)
-        if lstm_r2 > gru_r2 or (lstm_r2 == gru_r2 and lstm_mse < gru_mse):
-            self.model = lstm_model
-            logger.info("Selected: LSTM")
+        scores = {}
+        for name, (builder, steps) in self.model_builders.items():
+            logger.info(f"Training {name.upper()} model...")
+            model = builder(input_shape, steps) if steps > 1 else builder(input_shape)
+            with metrics.timer('train_model_seconds', model=name):
+                model.fit(X_train, y_train[:, :steps], epochs=50, batch_size=32, verbose=0)
+            pred = self.rollout(model, X_val, horizon, steps, val_state)
+            scores[name] = (model, steps, r2_score(y_val.flatten(), pred.flatten()), mean_squared_error(y_val, pred))
+
+        logger.info("Model Comparison: " + "; ".join(
+            f"{name.upper()} - R2: {r2:.4f}, MSE: {mse:.6f}" for name, (_, _, r2, mse) in scores.items()
+        ))
+
+        # Select best model: production accuracy once all have a track record, else higher R2, lower MSE
+        selected = self.accuracy.preferred_architecture(tuple(scores))
+        if selected:
+            logger.info(f"Production forecast accuracy favours {selected.upper()}")
         else:
-            self.model = gru_model
-            logger.info("Selected: GRU")
+            selected = max(scores, key=lambda name: (scores[name][2], -scores[name][3]))
+        self.model, self.model_horizon = scores[selected][:2]
+        logger.info(f"Selected: {selected.upper()}")
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        self.model_version = f"{selected}-{stamp}"
+        self.shadow_models = {
+            name: (model, steps, f"{name}-{stamp}")
+            for name, (model, steps, _, _) in scores.items() if name != selected
+        }
 
-    def predict_next_days(self, df, days=5):
-        """Predict next days using LSTM"""
-        prices = df['Price_Per_Gram'].values.reshape(-1, 1)
-        prices_scaled = self.scaler.transform(prices)
-        
-        predictions = []
-        current_sequence = prices_scaled[-self.sequence_length:].flatten()
-        
-        for _ in range(days):
-            # Prepare input
-            input_seq = current_sequence.reshape(1, self.sequence_length, 1)
-            # Predict next value
-            pred_scaled = self.model.predict(input_seq, verbose=0)[0][0]
-            # Inverse transform
-            pred = self.scaler.inverse_transform([[pred_scaled]])[0][0]
-            predictions.append(pred)
-            # Update sequence
-            current_sequence = np.append(current_sequence[1:], pred_scaled)
+    def model_paths(self):
+        """Keras model, flat weights (.npy) and scaler/metadata files of this metal"""
+        base = os.path.join(self.model_dir, self.metal)
+        return f"{base}.keras", f"{base}.weights.npy", f"{base}.joblib"
+
+    def shadow_path(self, name):
+        """Flat weights (.npy) of a shadow candidate"""
+        return os.path.join(self.model_dir, f"{self.metal}.{name}.shadow.npy")
+
+    def save_model(self):
+        """Persist the model with its fitted scalers; files are replaced atomically"""
+        model_path, weights_path, meta_path = self.model_paths()
+        os.makedirs(self.model_dir, exist_ok=True)
+        self.model.save(model_path + '.tmp.keras')
+        layers, weights = export_weights(self.model)
+        with open(weights_path + '.tmp', 'wb') as f:
+            np.save(f, weights)
+        shadows = {}
+        for name, (model, steps, version) in self.shadow_models.items():
+            shadow_layers, shadow_weights = export_weights(model)
+            with open(self.shadow_path(name) + '.tmp', 'wb') as f:
+                np.save(f, shadow_weights)
+            shadows[name] = {'model_version': version, 'model_horizon': steps, 'layers': shadow_layers}
+        joblib.dump({
+            'model_version': self.model_version,
+            'model_horizon': self.model_horizon,
+            'last_training_seconds': self.last_training_seconds,
+            'features': self.features.columns,
+            'layers': layers,
+            'scaler': self.scaler,
+            'feature_scaler': self.feature_scaler,
+            'shadows': shadows,
+        }, meta_path + '.tmp')
+        os.replace(model_path + '.tmp.keras', model_path)
+        os.replace(weights_path + '.tmp', weights_path)
+        for name in shadows:
+            os.replace(self.shadow_path(name) + '.tmp', self.shadow_path(name))
+        os.replace(meta_path + '.tmp', meta_path)
+        logger.info(f"Saved {self.model_version} to {model_path}")
+
+    def load_model(self):
+        """
+        Restore the last saved model and scalers; False when none is usable.
+        Weights are memory-mapped into a NumPy forward pass, so processes
+        forked afterwards share them and TensorFlow is not imported.
+        """
+        model_path, weights_path, meta_path = self.model_paths()
+        if not os.path.exists(meta_path):
+            return False
+        try:
+            meta = joblib.load(meta_path)
+            if tuple(meta['features']) != self.features.columns:
+                logger.warning(f"Saved model {meta['model_version']} uses other features, ignoring it")
+                return False
+            if meta.get('layers') and os.path.exists(weights_path):
+                self.model = NumpyRecurrentModel.load(weights_path, meta['layers'])
+            else:
+                from tensorflow.keras.models import load_model
+                self.model = load_model(model_path)
+        except Exception as e:
+            logger.warning(f"Could not load saved model: {e}")
+            return False
+        self.model_version = meta['model_version']
+        self.model_horizon = meta['model_horizon']
+        self.last_training_seconds = meta['last_training_seconds']
+        self.scaler = meta['scaler']
+        self.feature_scaler = meta['feature_scaler']
+        self.shadow_models = {}
+        for name, shadow in meta.get('shadows', {}).items():
+            try:
+                model = NumpyRecurrentModel.load(self.shadow_path(name), shadow['layers'])
+            except Exception as e:
+                logger.warning(f"Could not load shadow model {shadow['model_version']}: {e}")
+                continue
+            self.shadow_models[name] = (model, shadow['model_horizon'], shadow['model_version'])
+        logger.info(f"Loaded saved model {self.model_version}")
+        return True
+
+    def preload(self):
+        """
+        Load the stored history, its feature rows and the saved model once,
+        before a pre-fork server starts its workers. Only files already on disk
+        are read: nothing is fetched in the master. Feature arrays are marked
+        read-only and weights are memory-mapped, so the pages stay shared;
+        requests are served from them with no fetch or training on the first call.
+        """
+        data_path = os.path.join(DATA_DIR, history_filename(self.metal))
+        if not os.path.exists(data_path):
+            logger.warning(f"No stored {self.metal} history to preload; workers will fetch it")
+            return False
+        df = pd.read_csv(data_path)
+        df['Date'] = pd.to_datetime(df['Date'].astype(str).str[:10])
+        if len(df) < self.sequence_length + 10:
+            logger.warning(f"Stored {self.metal} history is too short to preload")
+            return False
+        # Last known (or fallback) rate: only fills rows without a stored USD_INR
+        self.features.transform(df, self.live_price_service.fx_rates.rate('INR'))
+        self.features.freeze()
+        self.history = df
+        self.history_loaded_at = time.time()
+        self.preloaded = self.load_model()
+        if not self.preloaded:
+            logger.warning(f"No saved {self.metal} model; workers will train on first request")
+        return self.preloaded
+
+    def stored_history(self):
+        """Preloaded history, or None once it is older than history_max_age and due a fetch"""
+        if self.history is None or time.time() - self.history_loaded_at > self.history_max_age:
+            return None
+        return self.history
+
+    def fetch_history(self):
+        """Fetch daily history; replaces the preloaded copy so later requests reuse it"""
+        df = self.fetch_gold_data(days=180)
+        if df is not None and not df.empty and self.history_loaded_at is not None:
+            self.history, self.history_loaded_at = df, time.time()
+        return df
+
+    def archive_forecast(self, karat_type, anchor, predictions, shadows):
+        """Append an INR forecast and its shadow forecasts, at most one run per model and day"""
+        try:
+            run_ids = self.archive.append([{
+                'karat': karat_type,
+                'model_version': self.model_version,
+                'live_anchor': anchor,
+                'predictions': predictions
+            }] + [{
+                'karat': karat_type,
+                'model_version': version,
+                'live_anchor': anchor,
+                'predictions': [self.convert_to_karat(p, karat_type) for p in values],
+                'shadow': True
+            } for version, values in shadows.items()], daily=True)
+            if run_ids[0] is not None:
+                logger.info(f"Predictions archived as run {run_ids[0]}")
+        except Exception as e:
+            logger.warning(f"Could not archive predictions: {e}")
+
+    @metrics.timed('predict_next_days_seconds')
+    def predict_next_days(self, df, days=5, model=None, model_horizon=None):
+        """
+        Predict next days with the selected model (or `model`, emitting
+        `model_horizon` days per pass); the direct model covers up to
+        `model_horizon` days per forward pass instead of one
+        """
+        model = model or self.model
+        current_sequence = self.feature_rows(df)[None, -self.sequence_length:]
+        state = self.forecast_state(df, [len(df) - 1])
+        preds_scaled = self.rollout(model, current_sequence, days, model_horizon or self.model_horizon, state)
         
-        return predictions
+        # Inverse transform
+        return self.scaler.inverse_transform(preds_scaled.reshape(-1, 1)).flatten().tolist()
+
+    def shadow_predictions(self, df, days=5):
+        """Forecasts (USD, pure metal) of the unselected candidates, keyed by model version"""
+        forecasts = {}
+        for model, steps, version in self.shadow_models.values():
+            try:
+                forecasts[version] = self.predict_next_days(df, days, model=model, model_horizon=steps)
+            except Exception as e:
+                logger.warning(f"Shadow forecast with {version} failed: {e}")
+        return forecasts
+
+    @metrics.timed('predict_intervals_seconds')
+    def predict_intervals(self, df, days=5):
+        """
+        Percentile bands (USD, pure metal) from MC dropout: `interval_samples`
+        forecast paths run with dropout active, all of them in one batched
+        forward pass per day (or per `model_horizon` days for the direct
+        model). If the first pass shows the budget (or the request deadline)
+        cannot cover every day, paths are dropped to fit.
+        Returns (bands of shape [quantiles, days], paths used), or None when
+        even `interval_min_samples` paths would not fit.
+        """
+        paths = np.repeat(self.feature_rows(df)[None, -self.sequence_length:], self.interval_samples, axis=0)
+        state = tuple(np.repeat(a, self.interval_samples, axis=0) for a in self.forecast_state(df, [len(df) - 1]))
+        budget = self.interval_budget
+        left = remaining()
+        if left is not None:
+            budget = min(budget, left)
+
+        steps = self.model_horizon
+        passes = -(-days // steps)
+        started = time.perf_counter()
+        samples = []
+        for n in range(passes):
+            pass_start = time.perf_counter()
+            # training=True keeps the Dropout layers stochastic
+            step = np.asarray(self.model(paths, training=True)).reshape(len(paths), steps)
+            samples.append(step)
+            if n + 1 < passes:
+                paths, state = self.advance(paths, state, step)
+
+            if n == 0 and passes > 1:
+                per_path = (time.perf_counter() - pass_start) / len(paths)
+                affordable = int((budget - (time.perf_counter() - started)) / (per_path * (passes - 1)))
+                if affordable < self.interval_min_samples:
+                    logger.warning("Prediction interval budget too small, skipping bands")
+                    return None
+                if affordable < len(paths):
+                    paths = paths[:affordable]
+                    state = tuple(a[:affordable] for a in state)
+                    samples[0] = samples[0][:affordable]
+
+        scaled = np.concatenate(samples, axis=1)[:, :days]  # [paths, days]
+        prices = self.scaler.inverse_transform(scaled.reshape(-1, 1)).reshape(scaled.shape)
+        return np.percentile(prices, self.interval_quantiles, axis=0), len(paths)
+
+    def format_intervals(self, bands, karat_type):
+        """Percentile bands for the response, e.g. {'p10': [...], 'p50': [...], 'p90': [...]}"""
+        if bands is None:
+            return None
+        values, used = bands
+        purity = self.purities.get(karat_type, 1.0)
+        result = {f"p{q}": np.round(row * purity, 2).tolist() for q, row in zip(self.interval_quantiles, values)}
+        result.update(method='mc_dropout', samples=used)
+        return result
 
     def convert_to_karat(self, price_24k, karat_type):
-        """Convert 24K price to specified karat"""
-        purity = self.gold_purities.get(karat_type, 1.0)
+        """Convert a pure metal (24K) price to the specified karat / grade"""
+        purity = self.purities.get(karat_type, 1.0)
         return price_24k * purity
 
-    def get_predictions(self, karat_type='24K', use_live_price=True):
+    def get_predictions(self, karat_type='24K', use_live_price=True, history=None, intervals=False):
         """
         Get predictions starting from LIVE price
+        `history` can supply already fetched daily prices (see predict_all_metals);
+        `intervals` adds Monte Carlo percentile bands around the forecast
         """
         try:
-            logger.info(f"Starting gold price prediction for {karat_type}")
+            logger.info(f"Starting {self.metal} price prediction for {karat_type}")
+            df = history if history is not None else self.stored_history()
+            degraded = False
+            # Only forecasts anchored to the live INR price are archived and scored
+            priced_in_inr = False
 
             # Get LIVE current price
             if use_live_price:
                 logger.info("Fetching live gold price...")
-                today_price_24k = self.get_current_live_price()
+                today_price_24k, degraded = self.get_current_live_price_status()
 
                 if today_price_24k:
+                    priced_in_inr = True
                     logger.info(f"Live price: ₹{today_price_24k:.2f}/gram (24K)")
                 else:
                     logger.warning("Could not fetch live price, using historical data...")
-                    df = self.fetch_gold_data(days=180)
+                    if df is None:
+                        df = self.fetch_history()
                     if df is None or df.empty:
                         logger.error("Failed to fetch historical data for live price fallback")
                         return None
                     today_price_24k = df['Price_Per_Gram'].iloc[-1]
             else:
                 # Use historical data
-                df = self.fetch_gold_data(days=180)
+                if df is None:
+                    df = self.fetch_history()
                 if df is None or df.empty:
                     logger.error("Failed to fetch historical data")
                     return None
                 today_price_24k = df['Price_Per_Gram'].iloc[-1]
 
-            # Train model on historical data
-            df = self.fetch_gold_data(days=180)
+            # Train model on historical data (reusing the frame fetched above, if any)
+            if df is None:
+                df = self.fetch_history()
             if df is None:
                 logger.error("Failed to fetch historical data for training")
                 return None
             if len(df) < self.sequence_length + 10:
                 logger.error("Not enough data for training")
                 return None
-            self.train_model(df)
+
+            budget = remaining()
+            if self.model is None:
+                self.load_model()
+            if self.model is not None and self.preloaded:
+                # Shared preloaded model: retrain offline, then restart the workers to pick it up
+                logger.info(f"Serving preloaded model {self.model_version}")
+            elif self.model is not None and budget is not None and budget < (self.last_training_seconds or 0):
+                # Not enough time left to retrain; forecast with the previous model instead
+                logger.warning(f"Deadline leaves {budget:.1f}s, reusing previously trained model")
+                degraded = True
+            else:
+                start = datetime.now()
+                self.train_model(df)
+                self.last_training_seconds = (datetime.now() - start).total_seconds()
+                try:
+                    self.save_model()
+                except Exception as e:
+                    logger.warning(f"Could not save trained model: {e}")
 
             # Make predictions
             logger.info("Generating predictions...")
             predictions_24k = self.predict_next_days(df, days=5)
+            shadows = self.shadow_predictions(df, days=5)
+            bands = self.predict_intervals(df, days=5) if intervals else None
 
             # Adjust predictions based on live price
             # Scale predictions to start from current live price
@@ -291,6 +724,9 @@ class GoldPricePredictor:
                 adjustment = live_price_usd - historical_last
                 predictions_24k = [p + adjustment for p in predictions_24k]
                 predictions_24k = [p * inr_rate for p in predictions_24k]
+                shadows = {version: [(p + adjustment) * inr_rate for p in values] for version, values in shadows.items()}
+                if bands is not None:
+                    bands = ((bands[0] + adjustment) * inr_rate, bands[1])
 
             # Convert to selected karat
             today_price = self.convert_to_karat(today_price_24k, karat_type)
@@ -308,22 +744,20 @@ class GoldPricePredictor:
                 arrow = "↑" if change > 0 else "↓"
                 logger.info(f"Day {i} ({date}): ₹{pred:.2f} {arrow} {change_pct:+.2f}%")
 
-            # Save predictions to data folder
-            pred_dates = [(datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 6)]
-            pred_df = pd.DataFrame({
-                'Date': pred_dates,
-                'Predicted_Price_24K': predictions
-            })
-            pred_path = os.path.join(os.path.dirname(__file__), '..', 'data', f'gold_predictions_{karat_type}_{datetime.now().strftime("%Y%m%d")}.csv')
-            pred_df.to_csv(pred_path, index=False)
-            logger.info(f"Predictions saved to {pred_path}")
+            # Archive the day's first INR forecast per model, with the shadow candidates' forecasts
+            # of the same day, so model selection compares every family once per day on the same dates
+            if priced_in_inr:
+                self.archive_forecast(karat_type, float(today_price), predictions, shadows)
 
             return {
+                'metal': self.metal,
                 'karat_type': karat_type,
                 'today_price': round(today_price, 2),
                 'is_live': use_live_price,
                 'predictions': [round(p, 2) for p in predictions],
-                'source': 'Live Market Data' if use_live_price else 'Historical Data'
+                'source': 'Live Market Data' if use_live_price else 'Historical Data',
+                'degraded': degraded,
+                **({'intervals': self.format_intervals(bands, karat_type)} if intervals else {})
             }
         except Exception as e:
             logger.error(f"Error in get_predictions: {str(e)}")
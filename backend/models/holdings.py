@@ -0,0 +1,224 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    from ..utils.fork_safety import reset_after_fork
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
+    from fork_safety import reset_after_fork
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_HOLDINGS_PATH = os.path.join(DATA_DIR, 'holdings.sqlite3')
+
+ITEM_COLUMNS = ('id', 'user_id', 'karat', 'weight_grams', 'label', 'created_at')
+
+
+class HoldingsBook:
+    """
+    Stored gold items (karat and weight) per user, valued at the live price.
+
+    Items are kept in SQLite. In memory every user is one row of grams per
+    karat, a users x karats matrix with one column per purity, so a price
+    change revalues every portfolio in a single matrix-vector product with
+    the purity table, and a user's totals are read by index.
+
+    Every add or removal also appends a grams delta to a change journal in
+    the same transaction. Each process folds in the journal entries it has
+    not seen (noticed through SQLite's data_version, so reads normally touch
+    no table), and rebuilds from the items only when it has fallen behind
+    the journal's last `journal_size` entries.
+    """
+
+    def __init__(self, path=DEFAULT_HOLDINGS_PATH, purities=None, journal_size=100000):
+        self.path = path
+        self.karats = list(purities)
+        self.purity = np.array([purities[karat] for karat in self.karats], dtype='f8')
+        self.journal_size = journal_size
+        self._karat_index = {karat: i for i, karat in enumerate(self.karats)}
+        self._local = threading.local()
+        reset_after_fork(self)
+        self._lock = threading.Lock()
+
+        self._rows = {}
+        self._grams = np.zeros((0, len(self.karats)))
+        # Portfolio values in USD at usd_per_gram (24K), one per matrix row
+        self._values = np.zeros(0)
+        self.usd_per_gram = None
+        self.priced_at = None
+        # Last change journal entry folded into the matrix
+        self._seq = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, karat TEXT NOT NULL,"
+            " weight_grams REAL NOT NULL, label TEXT, created_at REAL NOT NULL);"
+            # Covers both per-user listing and the grams-per-karat rebuild
+            "CREATE INDEX IF NOT EXISTS idx_items_user ON items (user_id, karat, weight_grams);"
+            "CREATE TABLE IF NOT EXISTS changes ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, karat TEXT NOT NULL, grams REAL NOT NULL);"
+        )
+        with self._lock:
+            self._sync(force=True)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.data_version = None
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+    def _sync(self, force=False):
+        """Fold in changes committed since the last sync (caller holds the lock)"""
+        conn = self._connect()
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        if not force and data_version == self._local.data_version:
+            return
+        self._local.data_version = data_version
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute('BEGIN')
+        try:
+            last = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+            last = last[0] if last else 0
+            oldest = cursor.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+            rebuild = self._seq is None or (last > self._seq and (oldest is None or oldest > self._seq + 1))
+            if rebuild:
+                rows = cursor.execute(
+                    "SELECT user_id, karat, SUM(weight_grams) FROM items GROUP BY user_id, karat"
+                ).fetchall()
+            else:
+                rows = cursor.execute("SELECT user_id, karat, grams FROM changes WHERE seq > ?", (self._seq,)).fetchall()
+        finally:
+            cursor.execute('COMMIT')
+
+        if rebuild:
+            self._rows = {}
+            self._grams = np.zeros((0, len(self.karats)))
+            self._values = np.zeros(0)
+        self._fold(rows)
+        self._seq = last
+        if rebuild:
+            logger.debug(f"Loaded holdings of {len(self._rows)} users")
+
+    def _fold(self, rows):
+        """Add (user_id, karat, grams) rows into the matrix and the current values"""
+        if not rows:
+            return
+        users, karats, grams = zip(*rows)
+        rows_index = np.fromiter((self._row(user_id) for user_id in users), dtype='i8', count=len(users))
+        columns = np.fromiter((self._karat_index.get(karat, -1) for karat in karats), dtype='i8', count=len(karats))
+        grams = np.array(grams, dtype='f8')
+        known = columns >= 0  # Skip grades no longer in the purity table
+        rows_index, columns, grams = rows_index[known], columns[known], grams[known]
+        np.add.at(self._grams, (rows_index, columns), grams)
+        if self.usd_per_gram is not None:
+            np.add.at(self._values, rows_index, grams * self.purity[columns] * self.usd_per_gram)
+
+    def _row(self, user_id):
+        """Matrix row of a user, growing the matrix (by doubling) for new users"""
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._rows[user_id] = len(self._rows)
+            if row >= len(self._grams):
+                capacity = max(16, 2 * len(self._grams))
+                self._grams = np.concatenate([self._grams, np.zeros((capacity - len(self._grams), len(self.karats)))])
+                self._values = np.concatenate([self._values, np.zeros(capacity - len(self._values))])
+        return row
+
+    def _journal(self, conn, user_id, karat, grams):
+        conn.execute("INSERT INTO changes (user_id, karat, grams) VALUES (?, ?, ?)", (user_id, karat, grams))
+        conn.execute(
+            "DELETE FROM changes WHERE seq <= (SELECT seq FROM sqlite_sequence WHERE name = 'changes') - ?",
+            (self.journal_size,)
+        )
+
+    def add(self, user_id, karat, weight_grams, label=None):
+        """Store an item; returns it as a dict"""
+        if karat not in self._karat_index:
+            raise ValueError(f'Invalid karat type. Must be one of: {", ".join(self.karats)}')
+        if not 0 < weight_grams < float('inf'):
+            raise ValueError('Weight must be a positive number of grams')
+        with self._lock:
+            with self._transaction() as conn:
+                item_id = conn.execute(
+                    "INSERT INTO items (user_id, karat, weight_grams, label, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, karat, float(weight_grams), label, time.time())
+                ).lastrowid
+                self._journal(conn, user_id, karat, float(weight_grams))
+                row = conn.execute(f"SELECT {', '.join(ITEM_COLUMNS)} FROM items WHERE id = ?", (item_id,)).fetchone()
+            # Our own commits leave our data_version unchanged, so sync explicitly
+            self._sync(force=True)
+        return dict(row)
+
+    def remove(self, user_id, item_id):
+        """Delete one of a user's items; False if there was no such item"""
+        with self._lock:
+            with self._transaction() as conn:
+                item = conn.execute(
+                    "SELECT karat, weight_grams FROM items WHERE id = ? AND user_id = ?", (item_id, user_id)
+                ).fetchone()
+                if item is None:
+                    return False
+                conn.execute("DELETE FROM items WHERE id = ?", (item_id,))
+                self._journal(conn, user_id, item['karat'], -item['weight_grams'])
+            self._sync(force=True)
+        return True
+
+    def items(self, user_id):
+        """A user's items, oldest first"""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(ITEM_COLUMNS)} FROM items WHERE user_id = ? ORDER BY id", (user_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def revalue(self, usd_per_gram, priced_at=None):
+        """Value every portfolio at a new 24K USD per gram price: one product with the purity table"""
+        with self._lock:
+            self._sync()
+            self._values = self._grams @ (self.purity * usd_per_gram)
+            self.usd_per_gram = usd_per_gram
+            self.priced_at = priced_at or time.time()
+
+    def portfolio(self, user_id):
+        """
+        A user's grams per karat, fine (24K) grams and value in USD at the
+        last revaluation (None before the first price)
+        """
+        with self._lock:
+            self._sync()
+            row = self._rows.get(user_id)
+            grams = self._grams[row].copy() if row is not None else np.zeros(len(self.karats))
+            usd_per_gram, priced_at = self.usd_per_gram, self.priced_at
+            value = None if usd_per_gram is None else float(self._values[row]) if row is not None else 0.0
+        return {
+            'grams': dict(zip(self.karats, grams.tolist())),
+            'fine_grams': float(grams @ self.purity),
+            'value_usd': value,
+            'usd_per_gram': usd_per_gram,
+            'priced_at': priced_at,
+        }
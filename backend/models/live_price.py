@@ -1,9 +1,30 @@
 import requests
 import os
+import sys
+import time
 import logging
 from dotenv import load_dotenv
 from datetime import datetime
 
+try:
+    from ..utils.metrics import metrics
+    from ..utils.quota import get_quota_manager
+    from ..utils.deadline import expired, request_timeout
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.metrics import metrics
+    from utils.quota import get_quota_manager
+    from utils.deadline import expired, request_timeout
+
+try:
+    from .provider_health import ProviderHealth, OPEN
+    from .fx_rates import FxRates
+    from .metals import METALS, DEFAULT_METAL, TROY_OZ_GRAMS, get_metal
+except ImportError:
+    from provider_health import ProviderHealth, OPEN
+    from fx_rates import FxRates
+    from metals import METALS, DEFAULT_METAL, TROY_OZ_GRAMS, get_metal
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
@@ -11,287 +32,483 @@ logger = logging.getLogger(__name__)
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
 
 class LiveGoldPriceService:
-    def __init__(self):
+    def __init__(self, tick_buffer=None, quota_manager=None):
         # Get API key from .env
         self.goldapi_key = os.getenv('GOLDAPI_KEY')
         self.metals_api_key = os.getenv('METALS_API_KEY')
         self.alphavantage_api_key = os.getenv('ALPHAVANTAGE_KEY')
 
-        self.gold_purities = {
-            '24K': 1.0,
-            '22K': 0.916,
-            '18K': 0.750,
-            '14K': 0.583
-        }
-
-        # Cache for currency conversion
+        # Provider endpoints; MARKET_SIMULATOR_URL points them all at a local simulator
+        simulator_url = os.getenv('MARKET_SIMULATOR_URL')
+        if simulator_url:
+            base = simulator_url.rstrip('/')
+            self.goldapi_url = f"{base}/goldapi/api/{{symbol}}/USD"
+            self.metals_api_url = f"{base}/metals/api/latest"
+            self.exchange_rate_url = f"{base}/exchangerate/v4/latest/USD"
+            self.alphavantage_url = f"{base}/alphavantage/query"
+            self.yahoo_chart_url = f"{base}/yahoo/v8/finance/chart/{{ticker}}"
+            # The simulator accepts any key
+            self.goldapi_key = self.goldapi_key or 'simulator'
+            self.metals_api_key = self.metals_api_key or 'simulator'
+            self.alphavantage_api_key = self.alphavantage_api_key or 'simulator'
+            logger.info(f"Using market simulator at {base}")
+            # Simulated calls do not spend real quota
+            self.quota = quota_manager
+        else:
+            self.goldapi_url = "https://www.goldapi.io/api/{symbol}/USD"
+            self.metals_api_url = "https://metals-api.com/api/latest"
+            self.exchange_rate_url = "https://api.exchangerate-api.com/v4/latest/USD"
+            self.alphavantage_url = "https://www.alphavantage.co/query"
+            self.yahoo_chart_url = None  # Use yfinance
+            # Host-wide budget for providers with per-minute/day/month limits
+            self.quota = quota_manager or get_quota_manager()
+
+        self.gold_purities = METALS['gold']['purities']
+
+        # Cache for currency conversion: the full USD rates table, refreshed hourly
+        self.fx_rates = FxRates()
+        self.fx_cache_duration = 3600
+        # After a refresh attempt, wait this long before the next one, so an FX
+        # outage costs one timed-out request per minute instead of one per conversion
+        self.fx_retry_interval = 60
+        self.fx_next_attempt = 0.0
         self.usd_to_inr_rate = None
         self.rate_timestamp = None
 
-        # Cache for price data
-        self.price_cache = None
-        self.price_cache_timestamp = None
+        # Cache for price data, per metal
+        self.price_cache = {}
+        self.price_cache_timestamp = {}
         self.cache_duration = 300  # 5 minutes in seconds
 
-    def get_usd_to_inr_rate(self):
+        # Optional intraday history of every fetched price
+        self.tick_buffer = tick_buffer
+
+        # Fallback chain in default priority order, with accuracy tiers:
+        # 1 = spot price APIs, 2 = futures, 3 = ETF proxy
+        # Each provider takes a list of metals and returns {metal: price_data} for those it could quote
+        self.providers = [
+            ('goldapi', self.get_live_prices_goldapi, 1),
+            ('metals_api', self.get_live_prices_metals_api, 1),
+            ('yahoo', self.get_live_prices_yahoo, 2),
+            ('alphavantage', self.get_live_prices_alphavantage, 3),
+        ]
+        # Providers that quote several metals in a single request
+        self.batched_providers = {'metals_api'} if self.yahoo_chart_url else {'metals_api', 'yahoo'}
+        self.provider_health = {name: ProviderHealth(name, tier) for name, _, tier in self.providers}
+        self.provider_keys = {
+            'goldapi': self.goldapi_key,
+            'metals_api': self.metals_api_key,
+            'alphavantage': self.alphavantage_api_key,
+        }
+
+    def get_fx_rates(self):
         """
-        Get USD to INR conversion rate
-        Uses free exchangerate API
+        Get the USD exchange rates table for every currency
+        Uses free exchangerate API; one fetch per hour serves all currencies.
+        While the API fails, the last known table is served between attempts.
         """
-        # Check if we have a cached rate less than 1 hour old
-        if self.usd_to_inr_rate and self.rate_timestamp:
-            if (datetime.now() - self.rate_timestamp).seconds < 3600:  # 1 hour
-                return self.usd_to_inr_rate
+        age = self.fx_rates.age()
+        if age is not None and age < self.fx_cache_duration:
+            metrics.inc('cache_requests_total', cache='fx', result='hit')
+            return self.fx_rates
+        metrics.inc('cache_requests_total', cache='fx', result='miss')
+
+        if expired():
+            # Out of time: a stale table beats waiting on the network
+            logger.warning("Deadline reached, using last known currency rates")
+            return self.fx_rates
+        now = time.monotonic()
+        if now < self.fx_next_attempt:
+            # Recently attempted (or in flight from another thread): use the last known rates
+            return self.fx_rates
+        self.fx_next_attempt = now + self.fx_retry_interval
 
         try:
             # Using exchangerate-api.com (free, no API key needed)
-            url = "https://api.exchangerate-api.com/v4/latest/USD"
-            response = requests.get(url)
+            url = self.exchange_rate_url
+            with metrics.timer('provider_request_seconds', provider='exchangerate-api'):
+                response = requests.get(url, timeout=request_timeout())
             data = response.json()
 
             if response.status_code == 200 and 'rates' in data:
-                self.usd_to_inr_rate = data['rates'].get('INR', 83.0)  # Fallback to ~83 INR/USD
+                self.fx_rates.update(data['rates'], timestamp=time.time())
+                self.usd_to_inr_rate = self.fx_rates.rate('INR')
                 self.rate_timestamp = datetime.now()
-                logger.info(f"USD to INR rate: {self.usd_to_inr_rate}")
-                return self.usd_to_inr_rate
+                logger.info(f"Loaded {len(data['rates'])} currency rates (USD to INR: {self.usd_to_inr_rate})")
             else:
-                logger.warning("Could not fetch currency conversion rate")
-                return 83.0  # Fallback rate
+                logger.warning("Could not fetch currency conversion rates")
 
         except Exception as e:
-            logger.error(f"Error fetching currency rate: {e}")
-            return 83.0  # Fallback rate
-    
-    def get_live_gold_price_goldapi(self):
+            logger.error(f"Error fetching currency rates: {e}")
+        return self.fx_rates
+
+    def get_usd_rate(self, currency='INR'):
+        """Units of `currency` per USD; ValueError if the currency is unknown"""
+        return self.get_fx_rates().rate(currency)
+
+    def get_usd_to_inr_rate(self):
+        """
+        Get USD to INR conversion rate
+        """
+        return self.get_usd_rate('INR')
+
+    def make_price_record(self, metal, source, price_per_oz, timestamp, raw_data):
+        """Common price dict for one metal from a USD per troy ounce quote"""
+        price_per_gram = price_per_oz / TROY_OZ_GRAMS
+        return {
+            'source': source,
+            'metal': metal,
+            'price_per_gram': round(price_per_gram, 4),
+            # Pure metal price; named after 24K gold, which is what existing clients read
+            'price_per_gram_24k': round(price_per_gram, 4),
+            'price_per_oz': round(price_per_oz, 2),
+            'currency': 'USD',
+            'timestamp': timestamp,
+            'date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+            'raw_data': raw_data
+        }
+
+    def get_live_prices_goldapi(self, metals):
         """
-        Get live gold price from GoldAPI.io
+        Get live prices from GoldAPI.io (one call per metal)
         Most accurate - shows actual market rates
         """
         if not self.goldapi_key:
             logger.warning("No GoldAPI key found. Get one at https://www.goldapi.io/")
-            return None
-        
-        url = "https://www.goldapi.io/api/XAU/USD"
+            return {}
+
         headers = {
             "x-access-token": self.goldapi_key,
             "Content-Type": "application/json"
         }
-        
-        try:
-            response = requests.get(url, headers=headers)
-            data = response.json()
-            
-            if response.status_code == 200:
-                # GoldAPI returns price per troy ounce
-                price_per_oz = data['price']
-                # Convert to price per gram (1 troy oz = 31.1035 grams)
-                price_per_gram = price_per_oz / 31.1035
-                
-                return {
-                    'source': 'GoldAPI.io',
-                    'price_per_gram_24k': round(price_per_gram, 2),
-                    'price_per_oz': round(price_per_oz, 2),
-                    'currency': 'USD',
-                    'timestamp': data['timestamp'],
-                    'date': datetime.fromtimestamp(data['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
-                    'raw_data': data
-                }
-            else:
-                logger.error(f"GoldAPI Error: {data.get('message', 'Unknown error')}")
-                return None
+        prices = {}
 
-        except Exception as e:
-            logger.error(f"Error fetching from GoldAPI: {e}")
-            return None
+        for metal in metals:
+            if expired():
+                break
+            url = self.goldapi_url.format(symbol=METALS[metal]['symbol'])
+            try:
+                response = requests.get(url, headers=headers, timeout=request_timeout())
+                data = response.json()
+
+                if response.status_code == 200:
+                    # GoldAPI returns price per troy ounce
+                    prices[metal] = self.make_price_record(metal, 'GoldAPI.io', data['price'], data['timestamp'], data)
+                else:
+                    if response.status_code == 429:
+                        self.report_quota_exhausted('goldapi')
+                        break
+                    logger.error(f"GoldAPI Error: {data.get('message', 'Unknown error')}")
+
+            except Exception as e:
+                logger.error(f"Error fetching {metal} from GoldAPI: {e}")
 
-    def get_live_gold_price_metals_api(self):
+        return prices
+
+    def get_live_prices_metals_api(self, metals):
         """
-        Get live gold price from Metals-API.com
+        Get live prices from Metals-API.com, all metals in one call
         Alternative source - also very accurate
         """
         if not self.metals_api_key:
             logger.warning("No Metals-API key found. Get one at https://metals-api.com/")
-            return None
-        
-        url = f"https://metals-api.com/api/latest"
+            return {}
+
+        url = self.metals_api_url
         params = {
             'access_key': self.metals_api_key,
-            'base': 'XAU',  # Gold
-            'symbols': 'USD'
+            'base': 'USD',
+            'symbols': ','.join(METALS[metal]['symbol'] for metal in metals)
         }
-        
+
         try:
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=request_timeout())
             data = response.json()
-            
+
             if data.get('success'):
-                # Metals-API returns USD per troy ounce of gold
-                rate = data['rates']['USD']
-                price_per_oz = 1 / rate  # Invert to get price of gold in USD
-                price_per_gram = price_per_oz / 31.1035
-                
-                return {
-                    'source': 'Metals-API',
-                    'price_per_gram_24k': round(price_per_gram, 2),
-                    'price_per_oz': round(price_per_oz, 2),
-                    'currency': 'USD',
-                    'timestamp': data['timestamp'],
-                    'date': datetime.fromtimestamp(data['timestamp']).strftime('%Y-%m-%d %H:%M:%S'),
-                    'raw_data': data
-                }
+                prices = {}
+                for metal in metals:
+                    symbol = METALS[metal]['symbol']
+                    # With base USD, rates are troy ounces per dollar; some plans also send USDXAU directly
+                    if f'USD{symbol}' in data['rates']:
+                        price_per_oz = data['rates'][f'USD{symbol}']
+                    elif data['rates'].get(symbol):
+                        price_per_oz = 1 / data['rates'][symbol]
+                    else:
+                        continue
+                    prices[metal] = self.make_price_record(metal, 'Metals-API', price_per_oz, data['timestamp'], data)
+                return prices
             else:
+                if data.get('error', {}).get('code') in (104, 106):  # Usage limit / rate limit reached
+                    self.report_quota_exhausted('metals_api')
                 logger.error(f"Metals-API Error: {data.get('error', {}).get('info', 'Unknown error')}")
-                return None
+                return {}
 
         except Exception as e:
             logger.error(f"Error fetching from Metals-API: {e}")
-            return None
+            return {}
 
-    def get_live_gold_price_yahoo(self):
+    def get_live_prices_yahoo(self, metals):
         """
-        Get live gold price from Yahoo Finance (FREE - No API key needed)
+        Get live prices from Yahoo Finance futures (FREE - No API key needed), one batched download
         Good backup option
         """
+        if self.yahoo_chart_url:
+            return self.get_live_prices_yahoo_chart(metals)
+
         try:
             import yfinance as yf
 
-            # GC=F is Gold Futures
-            # GLD is Gold ETF (more stable)
-            gold = yf.Ticker("GC=F")
-
-            # Get current price
-            data = gold.history(period="1d", interval="1m")
-
-            if not data.empty:
-                latest_price = data['Close'].iloc[-1]
-                # Gold futures are in USD per troy ounce
-                price_per_gram = latest_price / 31.1035
-
-                return {
-                    'source': 'Yahoo Finance',
-                    'price_per_gram_24k': round(price_per_gram, 2),
-                    'price_per_oz': round(latest_price, 2),
-                    'currency': 'USD',
-                    'timestamp': int(data.index[-1].timestamp()),
-                    'date': data.index[-1].strftime('%Y-%m-%d %H:%M:%S'),
-                    'raw_data': data.iloc[-1].to_dict()
-                }
-
-            return None
+            # GC=F, SI=F and PL=F are COMEX/NYMEX futures in USD per troy ounce
+            tickers = {METALS[metal]['yahoo_ticker']: metal for metal in metals}
+            data = yf.download(list(tickers), period="1d", interval="1m", progress=False,
+                               timeout=request_timeout())
+            if data.empty:
+                return {}
+
+            closes = data['Close']
+            if not hasattr(closes, 'columns'):
+                closes = closes.to_frame(next(iter(tickers)))
+
+            prices = {}
+            for ticker, metal in tickers.items():
+                if ticker not in closes:
+                    continue
+                series = closes[ticker].dropna()
+                if series.empty:
+                    continue
+                prices[metal] = self.make_price_record(
+                    metal, 'Yahoo Finance', float(series.iloc[-1]), int(series.index[-1].timestamp()),
+                    {'ticker': ticker, 'close': float(series.iloc[-1])}
+                )
+            return prices
 
         except Exception as e:
             logger.error(f"Error fetching from Yahoo: {e}")
-            return None
+            return {}
 
-    def get_live_gold_price_alphavantage(self):
+    def get_live_prices_yahoo_chart(self, metals):
+        """
+        Get live prices from a Yahoo Finance chart endpoint directly
+        Used when yahoo_chart_url is set (e.g. the local market simulator)
         """
-        Get live gold price from Alpha Vantage API
-        Uses GLD (Gold ETF) as a proxy for gold prices
+        prices = {}
+        for metal in metals:
+            if expired():
+                break
+            try:
+                url = self.yahoo_chart_url.format(ticker=METALS[metal]['yahoo_ticker'])
+                response = requests.get(url, params={'range': '1d', 'interval': '1m'}, timeout=request_timeout())
+                if response.status_code != 200:
+                    logger.error(f"Yahoo chart error: HTTP {response.status_code}")
+                    continue
+                result = response.json()['chart']['result'][0]
+                closes = [c for c in result['indicators']['quote'][0]['close'] if c is not None]
+                if not closes:
+                    continue
+                prices[metal] = self.make_price_record(
+                    metal, 'Yahoo Finance', closes[-1], result['timestamp'][-1], result['meta']
+                )
+            except Exception as e:
+                logger.error(f"Error fetching {metal} from Yahoo chart endpoint: {e}")
+        return prices
+
+    def get_live_prices_alphavantage(self, metals):
+        """
+        Get live prices from Alpha Vantage API (one call per metal)
+        Uses metal ETFs (GLD, SLV, PPLT) as a proxy for spot prices
         Good alternative source
         """
         if not self.alphavantage_api_key:
             logger.warning("No Alpha Vantage API key found. Get one at https://www.alphavantage.co/")
-            return None
-
-        url = "https://www.alphavantage.co/query"
-        params = {
-            'function': 'GLOBAL_QUOTE',
-            'symbol': 'GLD',  # SPDR Gold Shares ETF
-            'apikey': self.alphavantage_api_key
-        }
+            return {}
 
-        try:
-            response = requests.get(url, params=params)
-            data = response.json()
+        url = self.alphavantage_url
+        prices = {}
 
-            if response.status_code == 200 and 'Global Quote' in data:
-                quote = data['Global Quote']
-                price_per_share = float(quote['05. price'])
-
-                # GLD ETF holds gold, each share represents ~0.1 troy ounces of gold
-                # So price per share / 0.1 = price per troy ounce
-                price_per_oz = price_per_share / 0.1
-                price_per_gram = price_per_oz / 31.1035
-
-                return {
-                    'source': 'Alpha Vantage (GLD ETF)',
-                    'price_per_gram_24k': round(price_per_gram, 2),
-                    'price_per_oz': round(price_per_oz, 2),
-                    'currency': 'USD',
-                    'timestamp': int(datetime.now().timestamp()),
-                    'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'raw_data': data
-                }
-            else:
-                logger.error(f"Alpha Vantage Error: {data.get('Error Message', 'Unknown error')}")
-                return None
+        for metal in metals:
+            if expired():
+                break
+            params = {
+                'function': 'GLOBAL_QUOTE',
+                'symbol': METALS[metal]['etf'],
+                'apikey': self.alphavantage_api_key
+            }
+            try:
+                response = requests.get(url, params=params, timeout=request_timeout())
+                data = response.json()
+
+                if response.status_code == 200 and 'Global Quote' in data:
+                    price_per_share = float(data['Global Quote']['05. price'])
+
+                    # Each ETF share holds a roughly fixed amount of metal
+                    # So price per share / ounces per share = price per troy ounce
+                    price_per_oz = price_per_share / METALS[metal]['etf_oz_per_share']
+                    prices[metal] = self.make_price_record(
+                        metal, f"Alpha Vantage ({METALS[metal]['etf']} ETF)", price_per_oz,
+                        int(datetime.now().timestamp()), data
+                    )
+                else:
+                    if 'Note' in data or 'Information' in data:  # Call frequency or daily limit
+                        self.report_quota_exhausted('alphavantage')
+                        break
+                    logger.error(f"Alpha Vantage Error: {data.get('Error Message', 'Unknown error')}")
+
+            except Exception as e:
+                logger.error(f"Error fetching {metal} from Alpha Vantage: {e}")
 
-        except Exception as e:
-            logger.error(f"Error fetching from Alpha Vantage: {e}")
-            return None
+        return prices
 
-    def get_best_live_price(self):
+    def get_best_live_price(self, metal=DEFAULT_METAL):
+        """
+        Try multiple sources and return the best available price for one metal
         """
-        Try multiple sources and return the best available price
-        Priority: GoldAPI > Metals-API > Yahoo Finance > Alpha Vantage > Sample Data
+        return self.get_best_live_prices([metal])[metal]
+
+    def is_fresh(self, metals=None):
+        """True when the metals' prices and the FX table would all be served from cache, without an upstream call"""
+        now = datetime.now()
+        for metal in (metals or METALS):
+            cached_at = self.price_cache_timestamp.get(metal)
+            if not cached_at or (now - cached_at).seconds >= self.cache_duration:
+                return False
+        age = self.fx_rates.age()
+        return age is not None and age < self.fx_cache_duration
+
+    def get_best_live_prices(self, metals=None):
+        """
+        Try multiple sources and return the best available price for each metal
+        Priority: GoldAPI > Metals-API > Yahoo Finance > Alpha Vantage > Sample Data,
+        reordered by observed latency within each accuracy tier and skipping
+        providers whose circuit breaker is open. Metals still missing after one
+        provider are asked of the next; batched providers quote them all in one call.
         Uses caching to avoid excessive API calls
         """
+        metals = [get_metal(metal) for metal in (metals or METALS)]
+        prices = {}
+
         # Check cache first
-        if self.price_cache and self.price_cache_timestamp:
-            if (datetime.now() - self.price_cache_timestamp).seconds < self.cache_duration:
-                logger.info("Using cached price data")
-                return self.price_cache
-
-        logger.info("Fetching live gold prices...")
-
-        # Try GoldAPI first (most accurate)
-        price_data = self.get_live_gold_price_goldapi()
-        if price_data:
-            logger.info(f"Got price from {price_data['source']}")
-            self.price_cache = price_data
-            self.price_cache_timestamp = datetime.now()
-            return price_data
-
-        # Try Metals-API
-        price_data = self.get_live_gold_price_metals_api()
-        if price_data:
-            logger.info(f"Got price from {price_data['source']}")
-            self.price_cache = price_data
-            self.price_cache_timestamp = datetime.now()
-            return price_data
-
-        # Try Yahoo Finance (free backup)
-        price_data = self.get_live_gold_price_yahoo()
-        if price_data:
-            logger.info(f"Got price from {price_data['source']}")
-            self.price_cache = price_data
-            self.price_cache_timestamp = datetime.now()
-            return price_data
-
-        # Try Alpha Vantage (additional backup)
-        price_data = self.get_live_gold_price_alphavantage()
-        if price_data:
-            logger.info(f"Got price from {price_data['source']}")
-            self.price_cache = price_data
-            self.price_cache_timestamp = datetime.now()
-            return price_data
-
-        # Fallback to sample data
-        logger.warning("All APIs failed, using sample data")
-        price_data = self.get_sample_live_price()
-        self.price_cache = price_data
-        self.price_cache_timestamp = datetime.now()
-        return price_data
-    
-    def get_sample_live_price(self):
+        for metal in metals:
+            cached_at = self.price_cache_timestamp.get(metal)
+            if cached_at and (datetime.now() - cached_at).seconds < self.cache_duration:
+                logger.info(f"Using cached {metal} price data")
+                metrics.inc('cache_requests_total', cache='price', result='hit')
+                prices[metal] = self.price_cache[metal]
+            else:
+                metrics.inc('cache_requests_total', cache='price', result='miss')
+        missing = [metal for metal in metals if metal not in prices]
+        if not missing:
+            return prices
+
+        logger.info(f"Fetching live prices for {', '.join(missing)}...")
+
+        for name, provider in self.ordered_providers():
+            if expired():
+                logger.warning("Deadline reached, stopping provider fallback")
+                break
+            health = self.provider_health[name]
+            if not health.allow():
+                logger.info(f"Skipping {name}: circuit open")
+                continue
+            # Batched providers quote every metal in one call
+            cost = 1 if name in self.batched_providers else len(missing)
+            if not self.acquire_quota(name, cost):
+                # The provider was not called, so the breaker learns nothing
+                health.release()
+                metrics.inc('provider_quota_skips_total', provider=name)
+                continue
+            start = time.perf_counter()
+            fetched = provider(missing)
+            elapsed = time.perf_counter() - start
+            health.record(bool(fetched), elapsed)
+            metrics.observe('provider_request_seconds', elapsed, provider=name)
+            metrics.set('provider_circuit_open', 1 if health.state == OPEN else 0, provider=name)
+            if not fetched:
+                metrics.inc('provider_failures_total', provider=name)
+                continue
+            for metal, price_data in fetched.items():
+                logger.info(f"Got {metal} price from {price_data['source']}")
+                self.price_cache[metal] = price_data
+                self.price_cache_timestamp[metal] = datetime.now()
+                if metal == 'gold':
+                    self.record_tick(price_data)  # Intraday candles cover gold only
+                prices[metal] = price_data
+            missing = [metal for metal in missing if metal not in prices]
+            if not missing:
+                return prices
+
+        for metal in missing:
+            if expired() and self.price_cache.get(metal):
+                # Serve the last real price rather than sample data, flagged as degraded
+                logger.warning(f"Deadline reached, serving stale cached {metal} price")
+                prices[metal] = dict(self.price_cache[metal], degraded=True)
+                continue
+
+            # Fallback to sample data
+            logger.warning(f"All APIs failed for {metal}, using sample data")
+            price_data = self.get_sample_live_price(metal)
+            if expired():
+                # Not cached, so the next request with time to spare tries the providers again
+                price_data['degraded'] = True
+            else:
+                self.price_cache[metal] = price_data
+                self.price_cache_timestamp[metal] = datetime.now()
+            prices[metal] = price_data
+        return prices
+
+    def ordered_providers(self):
+        """Providers sorted by accuracy tier, then by observed latency"""
+        ranked = sorted(
+            enumerate(self.providers),
+            key=lambda item: self.provider_health[item[1][0]].sort_key(item[0])
+        )
+        return [(name, provider) for _, (name, provider, _) in ranked]
+
+    def provider_status(self):
+        """Health, circuit breaker state and remaining quota for every provider"""
+        status = {}
+        for name, _, _ in self.providers:
+            status[name] = self.provider_health[name].status()
+            if self.quota and self.provider_keys.get(name):
+                status[name]['quota'] = self.quota.remaining(name, self.provider_keys[name])
+        return status
+
+    def acquire_quota(self, provider, cost=1):
+        """Spend `cost` calls from the provider's host-wide budget; False if it is exhausted"""
+        if self.quota is None:
+            return True
+        return self.quota.try_acquire(provider, self.provider_keys.get(provider), cost)
+
+    def report_quota_exhausted(self, provider):
+        """Record that the provider itself rejected a call for exceeding its quota"""
+        if self.quota is not None:
+            self.quota.exhaust(provider, self.provider_keys.get(provider))
+
+    def record_tick(self, price_data):
+        """Append a fetched price to the intraday tick buffer, if one is attached"""
+        if self.tick_buffer is None:
+            return
+        try:
+            self.tick_buffer.append(
+                price_data['timestamp'],
+                price_data['source'],
+                price_data['price_per_gram_24k'],
+                self.usd_to_inr_rate  # Cached rate only; never triggers an FX fetch
+            )
+        except Exception as e:
+            logger.warning(f"Could not record price tick: {e}")
+
+    def get_sample_live_price(self, metal=DEFAULT_METAL):
         """
         Return sample live price data when APIs are unavailable
         """
-        # Sample price around current market rates (as of 2024)
-        sample_price_per_gram = 86.5  # USD per gram 24K
+        # Sample price around current market rates, USD per gram of pure metal
+        sample_price_per_gram = METALS[metal]['sample_usd_per_gram']
         
         return {
             'source': 'Sample Data (APIs Unavailable)',
+            'metal': metal,
+            'price_per_gram': sample_price_per_gram,
             'price_per_gram_24k': sample_price_per_gram,
             'price_per_oz': round(sample_price_per_gram * 31.1035, 2),
             'currency': 'USD',
@@ -300,13 +517,13 @@ class LiveGoldPriceService:
             'raw_data': {'note': 'Sample data used because APIs are unavailable'}
         }
     
-    def get_all_karat_prices(self, base_price_24k):
+    def get_all_karat_prices(self, base_price_24k, metal=DEFAULT_METAL):
         """
-        Convert 24K price to all karat types
+        Convert a pure metal price (24K for gold) to all karat / fineness grades
         """
         prices = {}
         
-        for karat, purity in self.gold_purities.items():
+        for karat, purity in METALS[metal]['purities'].items():
             price = base_price_24k * purity
             prices[karat] = {
                 'price_per_gram': round(price, 2),
@@ -317,60 +534,64 @@ class LiveGoldPriceService:
         
         return prices
     
-    def display_live_prices(self):
+    def display_live_prices(self, currency='INR', metal=DEFAULT_METAL):
         """
         Display live prices in a nice format
+        Prices are converted from USD to `currency` (default INR)
         """
-        price_data = self.get_best_live_price()
+        price_data = self.get_best_live_price(metal)
 
         if not price_data:
             return None
 
         # Get conversion rate
-        inr_rate = self.get_usd_to_inr_rate()
+        fx = self.get_fx_rates()
+        rate = fx.rate(currency)
+        currency = currency.strip().upper()
 
-        # Convert prices to INR
-        price_per_gram_24k_inr = round(price_data['price_per_gram_24k'] * inr_rate, 2)
-        price_per_oz_inr = round(price_data['price_per_oz'] * inr_rate, 2)
+        # Convert prices to the requested currency
+        price_per_gram_24k_local = round(price_data['price_per_gram_24k'] * rate, 2)
+        price_per_oz_local = round(price_data['price_per_oz'] * rate, 2)
 
-        logger.info(f"LIVE GOLD PRICES - {price_data['date']}")
+        logger.info(f"LIVE {metal.upper()} PRICES - {price_data['date']}")
         logger.info(f"Source: {price_data['source']}")
-        logger.info(f"Currency: INR (₹) | USD Rate: ₹{inr_rate}/$")
-        logger.info(f"24K Gold (Pure): ₹{price_per_gram_24k_inr}/gram")
-        logger.info(f"             or: ₹{price_per_oz_inr}/troy oz")
-
-        # Get all karat prices in INR
-        all_prices_usd = self.get_all_karat_prices(price_data['price_per_gram_24k'])
-        all_prices_inr = {}
-
-        for karat, data in all_prices_usd.items():
-            all_prices_inr[karat] = {
-                'price_per_gram': round(data['price_per_gram'] * inr_rate, 2),
-                'price_per_10g': round(data['price_per_10g'] * inr_rate, 2),
-                'price_per_oz': round(data['price_per_oz'] * inr_rate, 2),
-                'purity': data['purity']
-            }
+        logger.info(f"Currency: {currency} | USD Rate: {rate}/$")
+        logger.info(f"Pure {metal}: {currency} {price_per_gram_24k_local}/gram")
+        logger.info(f"             or: {currency} {price_per_oz_local}/troy oz")
+
+        # Get all karat prices, converted in one vectorized step
+        all_prices_usd = self.get_all_karat_prices(price_data['price_per_gram_24k'], metal)
+        fields = ('price_per_gram', 'price_per_10g', 'price_per_oz')
+        usd_matrix = [[data[field] for field in fields] for data in all_prices_usd.values()]
+        local_matrix = fx.convert(usd_matrix, currency).round(2)
+        all_prices_local = {}
+
+        for (karat, data), row in zip(all_prices_usd.items(), local_matrix.tolist()):
+            all_prices_local[karat] = dict(zip(fields, row), purity=data['purity'])
 
-        logger.info("All Karat Types:")
+        logger.info("All Grades:")
 
-        for karat, data in all_prices_inr.items():
-            logger.info(f"{karat:4s} ({data['purity']:6s}): ₹{data['price_per_gram']:7.2f}/gram  "
-                  f"₹{data['price_per_10g']:8.2f}/10g  ₹{data['price_per_oz']:9.2f}/oz")
+        for karat, data in all_prices_local.items():
+            logger.info(f"{karat:5s} ({data['purity']:6s}): {data['price_per_gram']:7.2f}/gram  "
+                  f"{data['price_per_10g']:8.2f}/10g  {data['price_per_oz']:9.2f}/oz")
 
-        # Update price_data with INR prices
-        price_data_inr = price_data.copy()
-        price_data_inr['price_per_gram_24k'] = price_per_gram_24k_inr
-        price_data_inr['price_per_oz'] = price_per_oz_inr
-        price_data_inr['currency'] = 'INR'
+        # Update price_data with converted prices
+        price_data_local = price_data.copy()
+        price_data_local['price_per_gram_24k'] = price_per_gram_24k_local
+        price_data_local['price_per_oz'] = price_per_oz_local
+        price_data_local['currency'] = currency
 
         return {
-            'base_data': price_data_inr,
-            'all_karats': all_prices_inr,
+            'base_data': price_data_local,
+            'all_karats': all_prices_local,
             'usd_prices': {
                 'base_data': price_data,
                 'all_karats': all_prices_usd
             },
-            'conversion_rate': inr_rate
+            'metal': metal,
+            'currency': currency,
+            'conversion_rate': rate,
+            'degraded': bool(price_data.get('degraded'))
         }
 
 
@@ -0,0 +1,51 @@
+"""
+Precious metals supported by the price service and predictor
+"""
+
+TROY_OZ_GRAMS = 31.1035
+
+DEFAULT_METAL = 'gold'
+
+# Grade labels are unique across metals, so archived forecasts keyed by grade stay unambiguous
+METALS = {
+    'gold': {
+        'symbol': 'XAU',                  # GoldAPI / Metals-API code
+        'yahoo_ticker': 'GC=F',           # COMEX futures, USD per troy oz
+        'etf': 'GLD',                     # Alpha Vantage live quote proxy
+        'etf_oz_per_share': 0.1,          # Approximate metal held per ETF share
+        'alphavantage_daily': 'GOLD_DAILY',
+        'purities': {'24K': 1.0, '22K': 0.916, '18K': 0.750, '14K': 0.583},
+        'sample_usd_per_gram': 86.5,
+    },
+    'silver': {
+        'symbol': 'XAG',
+        'yahoo_ticker': 'SI=F',
+        'etf': 'SLV',
+        'etf_oz_per_share': 0.87,
+        'alphavantage_daily': None,
+        'purities': {'Ag999': 0.999, 'Ag925': 0.925, 'Ag800': 0.800},
+        'sample_usd_per_gram': 1.0,
+    },
+    'platinum': {
+        'symbol': 'XPT',
+        'yahoo_ticker': 'PL=F',
+        'etf': 'PPLT',
+        'etf_oz_per_share': 0.095,
+        'alphavantage_daily': None,
+        'purities': {'Pt999': 0.999, 'Pt950': 0.950, 'Pt900': 0.900},
+        'sample_usd_per_gram': 31.0,
+    },
+}
+
+
+def get_metal(metal):
+    """Normalized metal name, or ValueError if it is not supported"""
+    name = str(metal).strip().lower()
+    if name not in METALS:
+        raise ValueError(f"Unknown metal '{metal}'. Must be one of: {', '.join(METALS)}")
+    return name
+
+
+def history_filename(metal):
+    """CSV file in backend/data holding the metal's daily price history"""
+    return f"{metal}_historical_data.csv"
@@ -0,0 +1,122 @@
+import numpy as np
+
+# Keras activation names used by the recurrent models
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0.0, 1.0),
+}
+
+
+def export_weights(model):
+    """
+    Layer specs and one flat float32 array holding every weight of a Keras
+    Sequential of LSTM / GRU / Dropout / Dense layers
+    """
+    specs, chunks, offset = [], [], 0
+    for layer in model.layers:
+        config = layer.get_config()
+        kind = type(layer).__name__
+        if kind not in ('LSTM', 'GRU', 'Dropout', 'Dense'):
+            raise ValueError(f"Unsupported layer {kind}")
+        spec = {
+            'type': kind,
+            'activation': config.get('activation'),
+            'recurrent_activation': config.get('recurrent_activation'),
+            'return_sequences': config.get('return_sequences', False),
+            'reset_after': config.get('reset_after', False),
+            'rate': config.get('rate', 0.0),
+            'weights': [],
+        }
+        for weight in layer.get_weights():
+            weight = np.asarray(weight, dtype='f4')
+            spec['weights'].append((offset, weight.shape))
+            chunks.append(weight.ravel())
+            offset += weight.size
+        specs.append(spec)
+    flat = np.concatenate(chunks) if chunks else np.zeros(0, dtype='f4')
+    return specs, flat
+
+
+class NumpyRecurrentModel:
+    """
+    Forward pass of an exported Keras recurrent model in plain NumPy.
+
+    Weights are views into one array, normally a read-only memory map of
+    the saved weights file: every worker process maps the same pages, no
+    TensorFlow runtime is started (so it is safe to load before forking),
+    and there is no graph tracing on the first call. Mirrors the Keras
+    `predict(X)` and `model(X, training=True)` calls used by the predictor;
+    with training=True, Dropout layers are active for MC dropout.
+    """
+
+    def __init__(self, specs, flat):
+        self.layers = [
+            (spec, [flat[offset:offset + int(np.prod(shape))].reshape(shape) for offset, shape in spec['weights']])
+            for spec in specs
+        ]
+
+    @classmethod
+    def load(cls, path, specs):
+        """Model over a memory-mapped .npy weights file"""
+        return cls(specs, np.load(path, mmap_mode='r'))
+
+    def predict(self, X, verbose=0):
+        return self(X)
+
+    def __call__(self, X, training=False):
+        x = np.asarray(X, dtype='f4')
+        # Fresh generator per call, so forked workers do not share one dropout stream
+        rng = np.random.default_rng() if training else None
+        for spec, weights in self.layers:
+            kind = spec['type']
+            if kind == 'Dropout':
+                if training and spec['rate']:
+                    keep = 1.0 - spec['rate']
+                    x = x * (rng.random(x.shape, dtype='f4') < keep) / keep
+            elif kind == 'Dense':
+                kernel, bias = weights
+                x = ACTIVATIONS[spec['activation']](x @ kernel + bias)
+            else:
+                x = self._recurrent(spec, weights, x)
+        return x
+
+    def _recurrent(self, spec, weights, x):
+        kernel, recurrent, bias = weights
+        act = ACTIVATIONS[spec['activation']]
+        gate = ACTIVATIONS[spec['recurrent_activation']]
+        units = recurrent.shape[0]
+        batch, steps, _ = x.shape
+        h = np.zeros((batch, units), dtype='f4')
+        outputs = []
+
+        if spec['type'] == 'LSTM':
+            # Gate order i, f, c, o; input projections for all steps in one matmul
+            projected = x @ kernel + bias
+            c = np.zeros_like(h)
+            for t in range(steps):
+                z = projected[:, t] + h @ recurrent
+                i, f, o = gate(z[:, :units]), gate(z[:, units:2 * units]), gate(z[:, 3 * units:])
+                c = f * c + i * act(z[:, 2 * units:3 * units])
+                h = o * act(c)
+                outputs.append(h)
+        else:
+            # Gate order z, r, h; reset_after=True (TF2 default) keeps separate input and recurrent biases
+            input_bias, recurrent_bias = (bias[0], bias[1]) if spec['reset_after'] else (bias, None)
+            projected = x @ kernel + input_bias
+            for t in range(steps):
+                xz, xr, xh = np.split(projected[:, t], 3, axis=1)
+                if spec['reset_after']:
+                    hz, hr, hh = np.split(h @ recurrent + recurrent_bias, 3, axis=1)
+                    z, r = gate(xz + hz), gate(xr + hr)
+                    candidate = act(xh + r * hh)
+                else:
+                    hz, hr = np.split(h @ recurrent[:, :2 * units], 2, axis=1)
+                    z, r = gate(xz + hz), gate(xr + hr)
+                    candidate = act(xh + (r * h) @ recurrent[:, 2 * units:])
+                h = z * h + (1.0 - z) * candidate
+                outputs.append(h)
+
+        return np.stack(outputs, axis=1) if spec['return_sequences'] else h
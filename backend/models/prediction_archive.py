@@ -0,0 +1,349 @@
+import os
+import re
+import sys
+import glob
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+
+try:
+    from ..utils.fork_safety import reset_after_fork
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utils.fork_safety import reset_after_fork
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_ARCHIVE_PATH = os.path.join(DATA_DIR, 'predictions.sqlite3')
+
+# Per-day files written before the archive existed: gold_predictions_{karat}_{YYYYMMDD}.csv
+LEGACY_CSV_PATTERN = re.compile(r'gold_predictions_(\w+)_(\d{8})\.csv$')
+
+COLUMNS = ('run_id', 'run_at', 'model_version', 'karat', 'horizon', 'target_date', 'predicted_price', 'live_anchor',
+           'shadow')
+
+
+class PredictionArchive:
+    """
+    Append-only archive of every forecast, one row per run and horizon day.
+
+    Rows live in a single SQLite file, indexed by (karat, target_date) for
+    range reads and by run for whole-forecast lookups. Each `append` writes
+    all its runs in one transaction, so a forecast is stored completely or
+    not at all. Shadow runs are forecasts of the candidate models that were
+    not served, kept only so every candidate is scored on the same dates;
+    range reads leave them out. `compact` applies the retention policy: runs older than
+    `detail_days` are thinned to the final forecast per target date and
+    horizon, and rows whose target date is older than `retention_days` are
+    dropped. It runs once per `compact_interval` on a background thread,
+    never inside an append.
+    """
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH, detail_days=90, retention_days=730,
+                 compact_interval=86400, legacy_dir=DATA_DIR):
+        self.path = path
+        self.detail_days = detail_days
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self.last_compacted = time.monotonic()
+        self._local = threading.local()
+        reset_after_fork(self)
+        self._compact_lock = threading.Lock()
+        self._compacting = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " run_id INTEGER NOT NULL, run_at REAL NOT NULL, model_version TEXT,"
+            " karat TEXT NOT NULL, horizon INTEGER NOT NULL, target_date TEXT NOT NULL,"
+            " predicted_price REAL NOT NULL, live_anchor REAL, shadow INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (run_id, horizon)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS idx_predictions_target ON predictions (karat, target_date);"
+            "CREATE INDEX IF NOT EXISTS idx_predictions_run_at ON predictions (run_at);"
+            # Legacy CSV files already imported, so each is imported once across restarts and workers
+            "CREATE TABLE IF NOT EXISTS legacy_imports (name TEXT PRIMARY KEY, imported_at REAL NOT NULL);"
+        )
+        if 'shadow' not in {row['name'] for row in conn.execute("PRAGMA table_info(predictions)")}:
+            try:
+                conn.execute("ALTER TABLE predictions ADD COLUMN shadow INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError as e:
+                if 'duplicate column' not in str(e):  # Added by another worker meanwhile
+                    raise
+        if legacy_dir:
+            self.import_legacy_csv(legacy_dir)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def append(self, runs, daily=False):
+        """
+        Store forecasts atomically. Each run is a dict with karat, predictions
+        (one price per horizon day, day 1 first) and optionally run_at (Unix
+        seconds), model_version, live_anchor and shadow. Returns the new run ids.
+        With `daily`, a run is skipped (its id is None) when its karat and
+        model version already have a run started the same day.
+        """
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            skipped = [daily and self._ran_today(conn, run) for run in runs]
+            inserted = iter(self._insert(conn, [run for run, skip in zip(runs, skipped) if not skip]))
+            run_ids = [None if skip else next(inserted) for skip in skipped]
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        self._schedule_compaction()
+        return run_ids
+
+    @staticmethod
+    def _ran_today(conn, run):
+        """Whether the run's karat and model version have a run on the day of its run_at"""
+        day = datetime.combine(datetime.fromtimestamp(run.get('run_at') or time.time()).date(), datetime.min.time())
+        return conn.execute(
+            "SELECT 1 FROM predictions WHERE run_at >= ? AND run_at < ? AND karat = ? AND model_version IS ? LIMIT 1",
+            (day.timestamp(), (day + timedelta(days=1)).timestamp(), run['karat'], run.get('model_version'))
+        ).fetchone() is not None
+
+    @staticmethod
+    def _insert(conn, runs):
+        """Insert runs within the caller's transaction; returns their run ids"""
+        next_id = conn.execute("SELECT COALESCE(MAX(run_id), 0) + 1 FROM predictions").fetchone()[0]
+        rows, run_ids = [], []
+        for run in runs:
+            run_at = run.get('run_at') or time.time()
+            start = datetime.fromtimestamp(run_at).date()
+            for horizon, price in enumerate(run['predictions'], 1):
+                rows.append((
+                    next_id, run_at, run.get('model_version'), run['karat'], horizon,
+                    (start + timedelta(days=horizon)).isoformat(), float(price), run.get('live_anchor'),
+                    int(bool(run.get('shadow')))
+                ))
+            run_ids.append(next_id)
+            next_id += 1
+        conn.executemany(
+            f"INSERT INTO predictions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows
+        )
+        return run_ids
+
+    def _schedule_compaction(self):
+        """Start a background compaction when one is due and none is running"""
+        if time.monotonic() - self.last_compacted < self.compact_interval:
+            return
+        with self._compact_lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self._compact_in_background, name='prediction-archive-compact', daemon=True).start()
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except sqlite3.Error as e:
+            logger.warning(f"Prediction archive compaction failed: {e}")
+            self.last_compacted = time.monotonic()  # Retry after the next interval, not on every append
+        finally:
+            with self._compact_lock:
+                self._compacting = False
+
+    def range(self, karat=None, start=None, end=None, latest_only=False):
+        """
+        Predictions whose target date falls in [start, end] (ISO dates), ordered
+        by target date and run. With `latest_only`, keep just the most recent
+        run's forecast for each karat and target date. Shadow runs are left out.
+        """
+        clauses, params = self._filters(karat, start, end)
+        clauses.append("shadow = 0")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        if latest_only:
+            query = (
+                f"SELECT {', '.join(COLUMNS)} FROM ("
+                f" SELECT *, ROW_NUMBER() OVER (PARTITION BY karat, target_date ORDER BY run_at DESC) AS rank"
+                f" FROM predictions {where}) WHERE rank = 1 ORDER BY target_date, karat"
+            )
+        else:
+            query = f"SELECT {', '.join(COLUMNS)} FROM predictions {where} ORDER BY target_date, run_at, karat"
+        return [dict(row) for row in self._connect().execute(query, params)]
+
+    @staticmethod
+    def _filters(karat, start, end, prefix=''):
+        clauses, params = [], []
+        if karat:
+            clauses.append(f"{prefix}karat = ?")
+            params.append(karat)
+        if start:
+            clauses.append(f"{prefix}target_date >= ?")
+            params.append(str(start))
+        if end:
+            clauses.append(f"{prefix}target_date <= ?")
+            params.append(str(end))
+        return clauses, params
+
+    def _keyset_query(self, select, karat, start, end):
+        # Unary + keeps the filters off idx_predictions_target, so every page is a
+        # primary key range scan instead of an index search plus a sort
+        clauses, params = self._filters(karat, start, end, prefix='+')
+        query = (
+            f"SELECT {select} FROM predictions WHERE (run_id, horizon) > (?, ?)"
+            + ''.join(f" AND {clause}" for clause in clauses)
+            + " ORDER BY run_id, horizon LIMIT ? OFFSET ?"
+        )
+        return query, params
+
+    def iter_rows(self, karat=None, start=None, end=None, after=None, batch_size=1000):
+        """
+        Yield prediction rows in (run_id, horizon) order, resuming after the
+        `after` key. Rows are read in keyset pages of `batch_size`, so memory
+        stays constant and no read transaction is held between pages.
+        """
+        query, params = self._keyset_query(', '.join(COLUMNS), karat, start, end)
+        key = tuple(after) if after else (0, 0)
+        while True:
+            rows = self._connect().execute(query, [*key, *params, batch_size, 0]).fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch_size:
+                return
+            key = (rows[-1]['run_id'], rows[-1]['horizon'])
+
+    def page_end(self, limit, karat=None, start=None, end=None, after=None):
+        """
+        Key (run_id, horizon) of the last row in the page of `limit` rows after
+        `after`, or None when no rows follow that page. Walks the primary key
+        only, so the next cursor is known before the page is streamed.
+        """
+        query, params = self._keyset_query('run_id, horizon', karat, start, end)
+        key = tuple(after) if after else (0, 0)
+        rows = self._connect().execute(query, [*key, *params, 2, limit - 1]).fetchall()
+        return (rows[0]['run_id'], rows[0]['horizon']) if len(rows) == 2 else None
+
+    def run(self, run_id):
+        """All horizon rows of one forecast run"""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM predictions WHERE run_id = ? ORDER BY horizon", (run_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def compact(self, now=None, vacuum=False):
+        """
+        Apply the retention policy; returns the number of rows removed. Freed
+        pages are reused by later appends. `vacuum` also shrinks the file, but
+        locks out writers meanwhile, so it is left to offline maintenance
+        (python prediction_archive.py --vacuum).
+        """
+        now = now or time.time()
+        detail_cutoff = now - self.detail_days * 86400
+        retention_cutoff = datetime.fromtimestamp(now - self.retention_days * 86400).date().isoformat()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            expired_rows = conn.execute(
+                "DELETE FROM predictions WHERE target_date < ?", (retention_cutoff,)
+            ).rowcount
+            # Old runs: keep only the last served forecast for each target date and horizon;
+            # shadow runs have been scored long before, so they go entirely
+            thinned = conn.execute(
+                "DELETE FROM predictions WHERE run_at < ? AND (shadow = 1 OR EXISTS ("
+                " SELECT 1 FROM predictions AS newer"
+                " WHERE newer.karat = predictions.karat AND newer.target_date = predictions.target_date"
+                " AND newer.horizon = predictions.horizon AND newer.shadow = 0 AND newer.run_at > predictions.run_at))",
+                (detail_cutoff,)
+            ).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        self.last_compacted = time.monotonic()
+
+        removed = expired_rows + thinned
+        if removed:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            logger.info(f"Compacted prediction archive: {expired_rows} expired, {thinned} superseded rows removed")
+        if vacuum:
+            conn.execute('VACUUM')
+        return removed
+
+    def import_legacy_csv(self, directory):
+        """
+        Copy per-day prediction CSV files into the archive, once each. The
+        files are left in place; which ones were imported is recorded in the
+        same transaction as their runs, so workers starting together import
+        each file exactly once. Returns the number of files imported.
+        """
+        paths = sorted(p for p in glob.glob(os.path.join(directory, 'gold_predictions_*.csv'))
+                       if LEGACY_CSV_PATTERN.search(os.path.basename(p)))
+        if not paths:
+            return 0
+        conn = self._connect()
+        done = {row['name'] for row in conn.execute("SELECT name FROM legacy_imports")}
+        paths = [p for p in paths if os.path.basename(p) not in done]
+        if not paths:
+            return 0
+
+        import pandas as pd
+        runs = {}
+        for path in paths:
+            name = os.path.basename(path)
+            karat, day = LEGACY_CSV_PATTERN.search(name).groups()
+            try:
+                df = pd.read_csv(path)
+                runs[name] = {
+                    'karat': karat,
+                    'run_at': datetime.strptime(day, '%Y%m%d').timestamp(),
+                    'model_version': 'legacy-csv',
+                    'predictions': df['Predicted_Price_24K'].tolist()
+                }
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.warning(f"Skipping unreadable prediction file {path}: {e}")
+
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Another worker may have imported them since the check above
+            done = {row['name'] for row in conn.execute("SELECT name FROM legacy_imports")}
+            pending = {}
+            for name, run in runs.items():
+                if name in done:
+                    continue
+                # Archives from before legacy_imports existed hold the run but no record of the file
+                if conn.execute(
+                    "SELECT 1 FROM predictions WHERE model_version = 'legacy-csv' AND karat = ? AND run_at = ? LIMIT 1",
+                    (run['karat'], run['run_at'])
+                ).fetchone() is None:
+                    pending[name] = run
+            self._insert(conn, list(pending.values()))
+            conn.executemany(
+                "INSERT INTO legacy_imports (name, imported_at) VALUES (?, ?)",
+                [(name, time.time()) for name in runs if name not in done]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        if pending:
+            logger.info(f"Imported {len(pending)} legacy prediction files into {self.path}")
+        return len(pending)
+
+
+if __name__ == '__main__':
+    # Offline maintenance: apply the retention policy now, and with --vacuum shrink the file
+    logging.basicConfig(level=logging.INFO)
+    archive = PredictionArchive(legacy_dir=None)
+    removed = archive.compact(vacuum='--vacuum' in sys.argv[1:])
+    logger.info(f"Removed {removed} rows from {archive.path}")
@@ -0,0 +1,289 @@
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+import requests
+
+try:
+    from ..utils.fork_safety import reset_after_fork
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
+    from fork_safety import reset_after_fork
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+DEFAULT_ALERTS_PATH = os.path.join(DATA_DIR, 'alerts.sqlite3')
+
+DIRECTIONS = ('above', 'below')
+ALERT_COLUMNS = ('id', 'user_id', 'karat', 'currency', 'direction', 'threshold', 'armed', 'created_at',
+                 'fired_at', 'fired_price')
+# Ids per SQL statement, below SQLite's bound-parameter limit
+SQL_BATCH = 500
+
+
+class LogSink:
+    """Delivers alert notifications to the application log"""
+
+    def deliver(self, notifications):
+        for n in notifications:
+            logger.info(f"Price alert {n['id']} for {n['user_id']}: {n['karat']} is {n['direction']} "
+                        f"{n['threshold']} {n['currency']} at {n['price']}")
+
+
+class MemorySink:
+    """Keeps notifications in a list, for tests and local development"""
+
+    def __init__(self):
+        self.notifications = []
+
+    def deliver(self, notifications):
+        self.notifications.extend(notifications)
+
+
+class WebhookSink:
+    """POSTs each batch of notifications as JSON ({"alerts": [...]}) to a URL"""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, notifications):
+        response = requests.post(self.url, json={'alerts': notifications}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class _Group:
+    """Alerts of one (karat, currency, direction), sorted by threshold"""
+
+    def __init__(self, thresholds, ids, fired):
+        self.thresholds = thresholds
+        self.ids = ids
+        # True once an alert has fired, until the price moves back past the hysteresis band
+        self.fired = fired
+
+
+class PriceAlertEngine:
+    """
+    Above/below price thresholds per user, karat and currency, checked on
+    every live price.
+
+    Alerts are stored in SQLite and indexed in memory as threshold-sorted
+    arrays per (karat, currency, direction), so each price finds every
+    triggered alert with two binary searches instead of a scan. An alert
+    fires once, then re-arms only after the price moves back beyond the
+    threshold by the `hysteresis` fraction, so prices hovering at a level
+    do not repeat it. Firing is claimed in the database, so when several
+    worker processes see the same price each alert is delivered once.
+    Notifications go to a pluggable `sink` (anything with `deliver(list)`).
+    """
+
+    def __init__(self, path=DEFAULT_ALERTS_PATH, sink=None, hysteresis=0.005):
+        self.path = path
+        self.sink = sink or LogSink()
+        self.hysteresis = hysteresis
+        self._local = threading.local()
+        reset_after_fork(self)
+        self._lock = threading.Lock()
+        self._index = {}
+        # Removal count and highest alert id the index was built from
+        self._revision = None
+        self._max_id = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect().executescript(
+            "CREATE TABLE IF NOT EXISTS alerts ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, karat TEXT NOT NULL,"
+            " currency TEXT NOT NULL, direction TEXT NOT NULL, threshold REAL NOT NULL,"
+            " armed INTEGER NOT NULL DEFAULT 1, created_at REAL NOT NULL, fired_at REAL, fired_price REAL);"
+            "CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts (user_id);"
+            # Bumped whenever alerts are removed, so every process rebuilds its index
+            "CREATE TABLE IF NOT EXISTS revision (id INTEGER PRIMARY KEY CHECK (id = 0), value INTEGER NOT NULL);"
+            "INSERT OR IGNORE INTO revision VALUES (0, 0);"
+        )
+        # Whether prices need polling for alerts in this process
+        self.has_alerts = self.count() > 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+
+    def add(self, user_id, karat, currency, direction, threshold):
+        """Store an alert; returns it as a dict"""
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Direction must be one of: {', '.join(DIRECTIONS)}")
+        if not 0 < threshold < float('inf'):
+            raise ValueError('Threshold must be a positive price')
+        with self._transaction() as conn:
+            alert_id = conn.execute(
+                "INSERT INTO alerts (user_id, karat, currency, direction, threshold, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, karat, currency, direction, float(threshold), time.time())
+            ).lastrowid
+            row = conn.execute(f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts WHERE id = ?", (alert_id,)).fetchone()
+        self.has_alerts = True
+        return dict(row)
+
+    def remove(self, user_id, alert_id):
+        """Delete one of a user's alerts; False if there was no such alert"""
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM alerts WHERE id = ? AND user_id = ?", (alert_id, user_id)).rowcount
+            if deleted:
+                conn.execute("UPDATE revision SET value = value + 1")
+        self.has_alerts = self.count() > 0
+        return bool(deleted)
+
+    def alerts(self, user_id):
+        """A user's alerts, oldest first"""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(ALERT_COLUMNS)} FROM alerts WHERE user_id = ? ORDER BY id", (user_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def _refresh(self):
+        """
+        Bring the in-memory index up to date with every process's changes:
+        new alerts (ids above the last loaded) are merged into their sorted
+        groups; after a removal the index is rebuilt
+        """
+        conn = self._connect()
+        revision = conn.execute("SELECT value FROM revision").fetchone()[0]
+        if revision != self._revision:
+            self._index = self._groups()
+            # Ids are never reused and commit in order, so later alerts have larger ids
+            self._max_id = max((int(group.ids.max()) for group in self._index.values()), default=0)
+            self._revision = revision
+            logger.debug(f"Loaded {sum(len(group.ids) for group in self._index.values())} price alerts")
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM alerts").fetchone()[0]
+        if max_id > self._max_id:
+            for key, group in self._groups(f"WHERE id > {int(self._max_id)}").items():
+                current = self._index.get(key)
+                if current is None:
+                    self._index[key] = group
+                    continue
+                # New ids are larger than every loaded one, so they go after equal thresholds
+                at = np.searchsorted(current.thresholds, group.thresholds, 'right')
+                self._index[key] = _Group(np.insert(current.thresholds, at, group.thresholds),
+                                          np.insert(current.ids, at, group.ids),
+                                          np.insert(current.fired, at, group.fired))
+            self._max_id = max_id
+
+    def _groups(self, where=''):
+        """Alerts matching `where` as threshold-sorted groups per (karat, currency, direction)"""
+        cursor = self._connect().cursor()
+        cursor.row_factory = None  # Plain tuples: much faster than sqlite3.Row for a full load
+        rows = cursor.execute(f"SELECT karat, currency, direction, threshold, id, armed FROM alerts {where}").fetchall()
+        members = {}
+        for karat, currency, direction, threshold, alert_id, armed in rows:
+            members.setdefault((karat, currency, direction), []).append((threshold, alert_id, not armed))
+        groups = {}
+        for key, group in members.items():
+            thresholds, ids, fired = (np.array(column) for column in zip(*group))
+            order = np.lexsort((ids, thresholds))
+            groups[key] = _Group(thresholds[order].astype('f8'), ids[order].astype('i8'), fired[order].astype(bool))
+        return groups
+
+    def evaluate(self, usd_per_gram, purities, fx_rates, now=None):
+        """
+        Check every alert against a new 24K USD per gram price. `purities` maps
+        karat to fraction and `fx_rates` converts USD (FxRates). Returns the
+        notifications delivered to the sink.
+        """
+        now = now or time.time()
+        with self._lock:
+            self._refresh()
+            if not self._index:
+                return []
+            rates, missing = {}, []
+            for currency in sorted({currency for _, currency, _ in self._index}):
+                try:
+                    rates[currency] = fx_rates.rate(currency)
+                except ValueError:
+                    missing.append(currency)
+            if missing:
+                # E.g. the offline fallback table: alerts in other currencies wait for real rates
+                logger.warning(f"No exchange rate for {', '.join(missing)}; skipping those price alerts")
+            hits, clears, prices = [], [], {}
+            for (karat, currency, direction), group in self._index.items():
+                if karat not in purities or currency not in rates:
+                    continue
+                price = round(usd_per_gram * purities[karat] * rates[currency], 2)
+                thresholds = group.thresholds
+                if direction == 'above':
+                    hit = slice(0, np.searchsorted(thresholds, price, 'right'))
+                    # Re-arm once the price is back below threshold * (1 - hysteresis)
+                    clear = slice(np.searchsorted(thresholds, price / (1 - self.hysteresis), 'right'), len(thresholds))
+                else:
+                    hit = slice(np.searchsorted(thresholds, price, 'left'), len(thresholds))
+                    clear = slice(0, np.searchsorted(thresholds, price / (1 + self.hysteresis), 'left'))
+                new = np.flatnonzero(~group.fired[hit]) + hit.start
+                rearm = np.flatnonzero(group.fired[clear]) + clear.start
+                group.fired[new] = True
+                group.fired[rearm] = False
+                hits.extend(group.ids[new].tolist())
+                clears.extend(group.ids[rearm].tolist())
+                for alert_id in group.ids[new].tolist():
+                    prices[alert_id] = price
+
+            if clears:
+                self._set_armed(clears, True)
+            notifications = self._claim(hits, prices, now) if hits else []
+
+        if notifications:
+            try:
+                self.sink.deliver(notifications)
+            except Exception as e:
+                # Re-arm so the next price retries instead of losing the notification
+                logger.warning(f"Price alert delivery failed for {len(notifications)} alerts: {e}")
+                with self._lock:
+                    self._set_armed([n['id'] for n in notifications], True)
+                    for group in self._index.values():
+                        group.fired[np.isin(group.ids, [n['id'] for n in notifications])] = False
+                return []
+        return notifications
+
+    def _set_armed(self, ids, armed):
+        with self._transaction() as conn:
+            for i in range(0, len(ids), SQL_BATCH):
+                batch = ids[i:i + SQL_BATCH]
+                conn.execute(f"UPDATE alerts SET armed = ? WHERE id IN ({', '.join('?' * len(batch))})", (int(armed), *batch))
+
+    def _claim(self, ids, prices, now):
+        """Mark armed alerts as fired; returns notifications for those this process claimed"""
+        claimed = []
+        with self._transaction() as conn:
+            for i in range(0, len(ids), SQL_BATCH):
+                batch = ids[i:i + SQL_BATCH]
+                claimed.extend(dict(row) for row in conn.execute(
+                    f"SELECT id, user_id, karat, currency, direction, threshold FROM alerts"
+                    f" WHERE id IN ({', '.join('?' * len(batch))}) AND armed = 1", batch
+                ))
+            conn.executemany(
+                "UPDATE alerts SET armed = 0, fired_at = ?, fired_price = ? WHERE id = ?",
+                [(now, prices[row['id']], row['id']) for row in claimed]
+            )
+        return [dict(row, price=prices[row['id']], fired_at=now) for row in claimed]
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process runs its host-once listeners
+    fcntl = None
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class PriceBroadcaster:
+    """
+    Fans one upstream live-price poll out to every connected stream client.
+
+    A single background thread asks the price service for the current price
+    (which is itself cached) and publishes a compact event only when the
+    price changes. Subscribers block on a shared condition, so the cost per
+    client is one idle thread and no provider or database calls; `astream`
+    subscribers wait on an asyncio event instead and hold no thread at all.
+    Recent events are kept so reconnecting clients can resume from Last-Event-ID.
+
+    Event ids are the quote's timestamp in milliseconds (bumped past the
+    previous id when only the FX rate changed), so every worker process
+    names a quote alike and a client reconnecting to another worker resumes
+    after the same price. Listeners added with `once_per_host` run once per
+    quote across processes, claimed through `claim_path`.
+    """
+
+    def __init__(self, price_service, poll_interval=30, heartbeat_interval=15,
+                 history_size=100, idle_timeout=300, claim_path=None):
+        self.price_service = price_service
+        self.claim_path = claim_path
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+
+        self._events = deque(maxlen=history_size)
+        self._last_id = 0
+        self._last_key = None
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._last_subscriber_seen = time.monotonic()
+        self._thread = None
+        # Poll even with no subscribers (set by keep_polling)
+        self._keep_polling = False
+        self._listeners = []
+        # Event loop -> asyncio.Events of the async subscribers running on it
+        self._async_waiters = {}
+
+    def add_listener(self, callback, once_per_host=False):
+        """
+        Call `callback(price_data, inr_rate)` once for every price change; with
+        `once_per_host`, only in the first process to publish that quote
+        """
+        self._listeners.append((callback, once_per_host))
+
+    def latest(self):
+        """Return the most recent event, or None before the first poll"""
+        with self._cond:
+            return self._events[-1] if self._events else None
+
+    def poll_once(self):
+        """Fetch the shared live price and publish it if it changed"""
+        price_data = self.price_service.get_best_live_price()
+        if not price_data:
+            return None
+        inr_rate = self.price_service.get_usd_to_inr_rate()
+        key = (price_data['source'], price_data['timestamp'], price_data['price_per_gram_24k'], inr_rate)
+
+        with self._cond:
+            if key == self._last_key:
+                return None
+            self._last_key = key
+            self._last_id = max(int(float(price_data['timestamp']) * 1000), self._last_id + 1)
+            price_inr = price_data['price_per_gram_24k'] * inr_rate
+            event = {
+                'id': self._last_id,
+                'source': price_data['source'],
+                'date': price_data['date'],
+                'usd_per_gram': price_data['price_per_gram_24k'],
+                'fx': inr_rate,
+                'purities': self.price_service.gold_purities,
+                'prices': {
+                    karat: round(price_inr * purity, 2)
+                    for karat, purity in self.price_service.gold_purities.items()
+                }
+            }
+            self._events.append(event)
+            self._cond.notify_all()
+            waiters = [(loop, list(events)) for loop, events in self._async_waiters.items()]
+
+        for loop, events in waiters:
+            try:
+                loop.call_soon_threadsafe(_set_all, events)
+            except RuntimeError:
+                pass  # Loop already closed
+
+        claimed = None
+        for callback, once_per_host in self._listeners:
+            if once_per_host:
+                if claimed is None:
+                    claimed = self._claim(event['id'])
+                if not claimed:
+                    continue
+            try:
+                callback(price_data, inr_rate)
+            except Exception as e:
+                logger.warning(f"Price listener failed: {e}")
+        return event
+
+    def _claim(self, event_id):
+        """True if no process on this host has published `event_id` or a later quote yet"""
+        if not self.claim_path or fcntl is None:
+            return True
+        try:
+            with open(self.claim_path, 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                last = f.read().strip()
+                if last and int(last) >= event_id:
+                    return False
+                f.seek(0)
+                f.truncate()
+                f.write(str(event_id))
+                return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not claim price event {event_id}: {e}")
+            return True
+
+    def stream(self, last_event_id=None):
+        """Generator of Server-Sent Events text for one client"""
+        self._subscribe()
+        try:
+            if self.latest() is None:
+                self.poll_once()
+
+            last_seen = self._resume_point(last_event_id)
+            yield f"retry: {int(self.heartbeat_interval * 1000)}\n\n"
+            while True:
+                with self._cond:
+                    pending = [e for e in self._events if e['id'] > last_seen]
+                    if not pending:
+                        self._cond.wait(self.heartbeat_interval)
+                        pending = [e for e in self._events if e['id'] > last_seen]
+                if not pending:
+                    yield ": heartbeat\n\n"
+                    continue
+                for event in pending:
+                    last_seen = event['id']
+                    yield _format_event(event)
+        finally:
+            self._unsubscribe()
+
+    async def astream(self, last_event_id=None):
+        """Async generator of the same Server-Sent Events text, for ASGI servers"""
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        self._subscribe()
+        with self._cond:
+            self._async_waiters.setdefault(loop, set()).add(wakeup)
+        try:
+            if self.latest() is None:
+                await loop.run_in_executor(None, self.poll_once)
+
+            last_seen = self._resume_point(last_event_id)
+            yield f"retry: {int(self.heartbeat_interval * 1000)}\n\n"
+            while True:
+                wakeup.clear()
+                pending = self._pending(last_seen)
+                if not pending:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), self.heartbeat_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    pending = self._pending(last_seen)
+                if not pending:
+                    yield ": heartbeat\n\n"
+                    continue
+                for event in pending:
+                    last_seen = event['id']
+                    yield _format_event(event)
+        finally:
+            with self._cond:
+                waiting = self._async_waiters.get(loop, set())
+                waiting.discard(wakeup)
+                if not waiting:
+                    self._async_waiters.pop(loop, None)
+            self._unsubscribe()
+
+    def _pending(self, last_seen):
+        with self._cond:
+            return [e for e in self._events if e['id'] > last_seen]
+
+    def _resume_point(self, last_event_id):
+        """
+        Pick the id to resume after. Ids are quote times, so an id seen on
+        another worker resumes after the same price here; missing ids, ids
+        older than the kept events and ids from the future get the latest snapshot.
+        """
+        with self._cond:
+            if not self._events:
+                return 0
+            oldest = self._events[0]['id']
+            try:
+                requested = int(last_event_id)
+            except (TypeError, ValueError):
+                requested = None
+            newest = max(self._last_id, int(time.time() * 1000))
+            if requested is not None and oldest <= requested <= newest:
+                return requested
+            return self._last_id - 1
+
+    def keep_polling(self):
+        """Keep polling without stream clients, e.g. while price alerts listen; cheap to repeat"""
+        with self._cond:
+            self._keep_polling = True
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        # After a fork the parent's thread object reports not alive, so workers start their own
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='price-broadcaster', daemon=True)
+            self._thread.start()
+
+    def _subscribe(self):
+        with self._cond:
+            self._subscribers += 1
+            self._last_subscriber_seen = time.monotonic()
+            self._ensure_thread()
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+            self._last_subscriber_seen = time.monotonic()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                idle = self._subscribers == 0 and not self._keep_polling and \
+                    time.monotonic() - self._last_subscriber_seen > self.idle_timeout
+                if idle:
+                    # Nobody listening; stop polling until the next client connects
+                    self._thread = None
+                    return
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error(f"Price broadcaster poll failed: {e}")
+            time.sleep(self.poll_interval)
+
+
+def _format_event(event):
+    return f"id: {event['id']}\nevent: price\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+def _set_all(events):
+    for event in events:
+        event.set()
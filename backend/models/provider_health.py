@@ -0,0 +1,113 @@
+import time
+import threading
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """
+    Rolling health and circuit breaker for one upstream price provider.
+
+    Tracks the last `window` outcomes and an EWMA of call latency. After
+    `failure_threshold` consecutive failures the circuit opens and calls are
+    skipped for `cooldown` seconds; then a single half-open probe is allowed.
+    A successful probe closes the circuit, a failed one reopens it with the
+    cooldown doubled (up to `max_cooldown`).
+    """
+
+    def __init__(self, name, tier, window=20, failure_threshold=3, cooldown=60,
+                 max_cooldown=3600, ewma_alpha=0.3):
+        self.name = name
+        self.tier = tier
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.ewma_alpha = ewma_alpha
+
+        self.outcomes = deque(maxlen=window)
+        self.ewma_latency = None
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self.opened_at = None
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call should be attempted now (claims the probe when half-open)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a probe claimed by `allow` when the call was not made"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def record(self, success, latency):
+        """Record the outcome of a call that `allow` let through"""
+        with self._lock:
+            self.outcomes.append(success)
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.ewma_alpha * latency + (1 - self.ewma_alpha) * self.ewma_latency
+
+            was_probe = self.state == HALF_OPEN
+            self.probe_in_flight = False
+            if success:
+                self.consecutive_failures = 0
+                self.state = CLOSED
+                self.cooldown = self.base_cooldown
+                return
+
+            self.consecutive_failures += 1
+            if was_probe:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    @property
+    def success_rate(self):
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else None
+
+    def expected_latency(self):
+        """EWMA latency scaled by the failure rate, i.e. expected time to get a price"""
+        if self.ewma_latency is None:
+            return 0.0  # Untried providers go first within their tier
+        rate = self.success_rate
+        return self.ewma_latency / max(rate if rate is not None else 1.0, 0.05)
+
+    def sort_key(self, default_rank):
+        """Order by accuracy tier, then expected latency, then the configured priority"""
+        return (self.tier, self.expected_latency(), default_rank)
+
+    def status(self):
+        with self._lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+            rate = self.success_rate
+            return {
+                'state': self.state,
+                'tier': self.tier,
+                'success_rate': round(rate, 3) if rate is not None else None,
+                'ewma_latency_ms': round(self.ewma_latency * 1000, 1) if self.ewma_latency is not None else None,
+                'consecutive_failures': self.consecutive_failures,
+                'calls_in_window': len(self.outcomes),
+                'retry_in_seconds': round(retry_in, 1) if retry_in is not None else None
+            }
@@ -0,0 +1,172 @@
+import os
+import re
+import sys
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a persisted buffer there must be written by one process
+    fcntl = None
+
+try:
+    from ..utils.fork_safety import reset_after_fork
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'utils'))
+    from fork_safety import reset_after_fork
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Stable source codes so persisted ticks decode the same way after a restart
+TICK_SOURCES = (
+    'Other',
+    'GoldAPI.io',
+    'Metals-API',
+    'Yahoo Finance',
+    'Alpha Vantage (GLD ETF)',
+)
+
+TICK_DTYPE = np.dtype([
+    ('timestamp', 'f8'),     # Unix seconds
+    ('source', 'u1'),        # Index into TICK_SOURCES
+    ('usd_per_gram', 'f8'),  # 24K price in USD per gram
+    ('fx', 'f8'),            # USD to INR rate at the time, NaN if unknown
+])
+
+BUCKET_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_bucket(bucket):
+    """Parse a bucket size such as '1m', '5m' or '1h' into seconds"""
+    match = re.fullmatch(r'(\d+)([smhd])', str(bucket).strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid bucket '{bucket}'. Use a number followed by s, m, h or d (e.g. 5m)")
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+
+class TickBuffer:
+    """
+    Fixed-memory ring buffer of intraday price ticks.
+
+    Ticks live in one preallocated structured NumPy array, so memory use does
+    not grow and OHLC aggregation is a handful of vectorized operations. When
+    `path` is given, the array is a memory-mapped .npy file and the write
+    position is kept in a small sidecar file, so ticks survive restarts with
+    no parsing. Every worker process maps the same file; writes and reads
+    hold an flock on `{path}.lock`, so the processes share one ring.
+    """
+
+    def __init__(self, capacity=20000, path=None):
+        self.capacity = capacity
+        self.path = path
+        self._lock = threading.Lock()
+        # Lock file handle per process (flock is held per open file, which a fork would share)
+        self._local = threading.local()
+        reset_after_fork(self)
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._locked():
+                self._ticks, self._meta = self._open_memmap(path, capacity)
+        else:
+            self._ticks = np.zeros(capacity, dtype=TICK_DTYPE)
+            self._meta = np.zeros(2, dtype='i8')  # [next write index, count]
+
+    @contextmanager
+    def _locked(self, shared=False):
+        """Hold the thread lock and, for a persisted buffer, the cross-process file lock"""
+        with self._lock:
+            if not self.path or fcntl is None:
+                yield
+                return
+            lock_file = getattr(self._local, 'lock_file', None)
+            if lock_file is None:
+                lock_file = self._local.lock_file = open(f"{self.path}.lock", 'a')
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open_memmap(self, path, capacity):
+        meta_path = f"{path}.meta.npy"
+        if os.path.exists(path) and os.path.exists(meta_path):
+            ticks = np.lib.format.open_memmap(path, mode='r+')
+            meta = np.lib.format.open_memmap(meta_path, mode='r+')
+            if ticks.dtype == TICK_DTYPE and ticks.shape == (capacity,):
+                logger.info(f"Loaded {int(meta[1])} persisted ticks from {path}")
+                return ticks, meta
+            logger.warning(f"Tick file {path} has a different layout, starting fresh")
+            del ticks, meta
+        ticks = np.lib.format.open_memmap(path, mode='w+', dtype=TICK_DTYPE, shape=(capacity,))
+        meta = np.lib.format.open_memmap(meta_path, mode='w+', dtype='i8', shape=(2,))
+        return ticks, meta
+
+    def __len__(self):
+        return int(self._meta[1])
+
+    def append(self, timestamp, source, usd_per_gram, fx=None):
+        """Record one tick"""
+        code = TICK_SOURCES.index(source) if source in TICK_SOURCES else 0
+        with self._locked():
+            head = int(self._meta[0])
+            self._ticks[head] = (timestamp, code, usd_per_gram, np.nan if fx is None else fx)
+            self._meta[0] = (head + 1) % self.capacity
+            self._meta[1] = min(int(self._meta[1]) + 1, self.capacity)
+
+    def snapshot(self, start=None, end=None):
+        """Return a copy of the ticks in time order, optionally limited to [start, end)"""
+        with self._locked(shared=True):
+            head, count = int(self._meta[0]), int(self._meta[1])
+            if count < self.capacity:
+                ticks = np.array(self._ticks[:count])
+            else:
+                ticks = np.concatenate((self._ticks[head:], self._ticks[:head]))
+        # Providers can report slightly out-of-order timestamps
+        ticks = ticks[np.argsort(ticks['timestamp'], kind='stable')]
+        if start is not None:
+            ticks = ticks[ticks['timestamp'] >= start]
+        if end is not None:
+            ticks = ticks[ticks['timestamp'] < end]
+        return ticks
+
+    def ohlc(self, bucket='5m', start=None, end=None, fx=None):
+        """
+        Aggregate ticks into OHLC candles.
+
+        Prices are USD per gram, or converted with each tick's own FX rate when
+        `fx` is given (`fx` is then used for ticks recorded without a rate).
+        Returns a dict of equal-length NumPy arrays.
+        """
+        seconds = parse_bucket(bucket)
+        ticks = self.snapshot(start, end)
+        if len(ticks) == 0:
+            empty = np.array([], dtype='f8')
+            return {'time': empty, 'open': empty, 'high': empty, 'low': empty,
+                    'close': empty, 'count': np.array([], dtype='i8')}
+
+        prices = ticks['usd_per_gram']
+        if fx is not None:
+            prices = prices * np.where(np.isnan(ticks['fx']), fx, ticks['fx'])
+
+        buckets = np.floor(ticks['timestamp'] / seconds).astype('i8')
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(ticks)] - 1
+
+        return {
+            'time': buckets[starts] * seconds,
+            'open': prices[starts],
+            'high': np.maximum.reduceat(prices, starts),
+            'low': np.minimum.reduceat(prices, starts),
+            'close': prices[ends],
+            'count': ends - starts + 1,
+        }
+
+    def flush(self):
+        """Push memory-mapped pages to disk"""
+        if self.path:
+            self._ticks.flush()
+            self._meta.flush()
@@ -4,161 +4,741 @@ API Routes Blueprint
 
 import sys
 import os
+import logging
 # Add the project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, project_root)
 
-from flask import Blueprint, jsonify, request
-from backend.models.gold_predict import GoldPricePredictor
+import time
+from datetime import datetime
+from itertools import islice
+import numpy as np
+from flask import Blueprint, Response, jsonify, request, url_for
+from flask_login import current_user
+from backend.config import Config
+from backend.models.aggregates import PriceAggregates
+from backend.models.gold_predict import GoldPricePredictor, predict_all_metals
+from backend.models.holdings import HoldingsBook
 from backend.models.live_price import LiveGoldPriceService
-from backend.utils.helper import handle_errors
+from backend.models.metals import METALS, DEFAULT_METAL, get_metal, history_filename
+from backend.models.prediction_archive import COLUMNS as PREDICTION_COLUMNS, PredictionArchive
+from backend.models.price_alerts import DIRECTIONS, LogSink, PriceAlertEngine, WebhookSink
+from backend.models.price_stream import PriceBroadcaster
+from backend.models.tick_buffer import TickBuffer, parse_bucket
+from backend.utils.deadline import with_deadline
+from backend.utils.export import EXPORT_FORMATS, decode_cursor, encode_cursor, stream_rows
+from backend.utils.helper import api_login_required, handle_errors
+from backend.utils.metrics import metrics
+from backend.utils.serialization import NotAcceptable, columnar_response, json_response, negotiate, records
 from supabase_client import save_today_price, save_predictions
 
+logger = logging.getLogger(__name__)
+
 api_bp = Blueprint('api', __name__)
 
 # Initialize services
-predictor = GoldPricePredictor()
-price_service = LiveGoldPriceService()
+tick_buffer = TickBuffer(capacity=Config.TICK_BUFFER_CAPACITY, path=Config.TICK_BUFFER_PATH)
+price_service = LiveGoldPriceService(tick_buffer=tick_buffer)
+prediction_archive = PredictionArchive(
+    Config.PREDICTION_ARCHIVE_PATH,
+    detail_days=Config.PREDICTION_DETAIL_DAYS,
+    retention_days=Config.PREDICTION_RETENTION_DAYS
+)
+# One predictor per metal, sharing the price service and archive
+predictors = {
+    metal: GoldPricePredictor(live_price_service=price_service, archive=prediction_archive, metal=metal,
+                              model_dir=Config.MODEL_DIR)
+    for metal in METALS
+}
+predictor = predictors[DEFAULT_METAL]
+if Config.PRELOAD_MODELS:
+    for metal_predictor in predictors.values():
+        metal_predictor.preload()
+price_broadcaster = PriceBroadcaster(price_service, claim_path=Config.PRICE_EVENT_CLAIM_PATH)
+
+
+def _save_changed_prices(price_data, inr_rate):
+    """Queue one database row per karat, only when the live price actually changes"""
+    all_karats = price_service.get_all_karat_prices(price_data['price_per_gram_24k'] * inr_rate)
+    for karat, data in all_karats.items():
+        save_today_price(karat, data['price_per_gram'])
+
+# Every worker publishes the same quote to its own clients; only one of them saves it
+price_broadcaster.add_listener(_save_changed_prices, once_per_host=True)
+
+price_alerts = PriceAlertEngine(
+    Config.ALERTS_DB_PATH,
+    sink=WebhookSink(Config.ALERT_WEBHOOK_URL) if Config.ALERT_WEBHOOK_URL else LogSink(),
+    hysteresis=Config.ALERT_HYSTERESIS
+)
+
+def _check_alerts(price_data, inr_rate):
+    """Fire the price alerts crossed by a new live price"""
+    price_alerts.evaluate(price_data['price_per_gram_24k'], price_service.gold_purities, price_service.get_fx_rates())
+
+price_broadcaster.add_listener(_check_alerts)
+
+holdings = HoldingsBook(Config.HOLDINGS_DB_PATH, purities=price_service.gold_purities)
+
+def _revalue_holdings(price_data, inr_rate):
+    """Revalue every stored portfolio at a new live price"""
+    holdings.revalue(price_data['price_per_gram_24k'])
+
+price_broadcaster.add_listener(_revalue_holdings)
+
+@api_bp.before_app_request
+def _poll_for_alerts():
+    # Alerts need prices even when no stream client is connected (started per worker)
+    if price_alerts.has_alerts:
+        price_broadcaster.keep_polling()
+
+
+def _currency_rate():
+    """
+    The `currency` query param (default INR) and its rate per USD
+    Raises ValueError for codes missing from the cached rates table
+    """
+    currency = request.args.get('currency', 'INR').strip().upper()
+    return currency, price_service.get_usd_rate(currency)
+
+def _metal():
+    """The `metal` query param (default gold); ValueError if unsupported"""
+    return get_metal(request.args.get('metal', DEFAULT_METAL))
+
+def _bad_request(e):
+    return jsonify({'success': False, 'error': str(e)}), 400
 
 @api_bp.route('/health')
 def health():
-    """Health check"""
-    return jsonify({'status': 'healthy'})
+    """Health check, including live price provider circuit breakers"""
+    return jsonify({'status': 'healthy', 'providers': price_service.provider_status()})
 
 @api_bp.route('/live-price')
 @handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
 def live_price():
-    """Get live prices"""
-    result = price_service.display_live_prices()
+    """Get live prices (query params: metal, default gold; currency, default INR)"""
+    try:
+        metal = _metal()
+        currency, _ = _currency_rate()
+    except ValueError as e:
+        return _bad_request(e)
+    result = price_service.display_live_prices(currency, metal)
     if result:
-        # Try to save historical prices to database (optional)
+        # Publish to stream clients; prices are saved only when they changed (optional)
         try:
-            for karat, data in result['all_karats'].items():
-                save_today_price(karat, data['price_per_gram'])
+            price_broadcaster.poll_once()
         except Exception as e:
             logger.warning(f"Could not save to database: {e}")
         return jsonify({'success': True, 'data': result})
     return jsonify({'success': False, 'error': 'Could not fetch live prices. Using sample data instead.'}), 200
 
+@api_bp.route('/stream/prices')
+def stream_prices():
+    """Server-Sent Events stream of live price changes"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return Response(
+        price_broadcaster.stream(last_event_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@api_bp.route('/intraday')
+@handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
+def intraday():
+    """
+    Intraday OHLC candles from recorded price ticks
+    Query params: bucket (at least the price refresh interval, e.g. 5m, 15m, 1h), hours of history (default 24),
+    format (json, npz or arrow; the Accept header works too)
+    """
+    bucket = request.args.get('bucket', '5m')
+    hours = request.args.get('hours', type=float, default=24.0)
+    try:
+        fmt = negotiate(request)
+    except NotAcceptable as e:
+        return jsonify({'success': False, 'error': str(e)}), 406
+    try:
+        seconds = parse_bucket(bucket)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    # Ticks are recorded when the live price cache refreshes; finer buckets would be mostly empty
+    minutes = price_service.cache_duration // 60
+    if seconds < price_service.cache_duration:
+        return jsonify({'success': False,
+                        'error': f'Bucket must be at least {minutes}m: live prices refresh every {minutes} minutes'}), 400
+    if hours <= 0 or hours > 24 * 31:
+        return jsonify({'success': False, 'error': 'Hours must be positive and at most 744'}), 400
+
+    # Ticks recorded before the first FX fetch fall back to the current rate
+    inr_rate = price_service.get_usd_to_inr_rate()
+    candles = tick_buffer.ohlc(bucket, start=time.time() - hours * 3600, fx=inr_rate)
+    columns = {
+        'time': candles['time'],
+        'open': candles['open'].round(2),
+        'high': candles['high'].round(2),
+        'low': candles['low'].round(2),
+        'close': candles['close'].round(2),
+        'count': candles['count']
+    }
+    if fmt != 'json':
+        return columnar_response(fmt, columns, {'success': True, 'bucket': bucket, 'currency': 'INR'})
+
+    return json_response({
+        'success': True,
+        'data': dict(columns, bucket=bucket, currency='INR')
+    })
+
 @api_bp.route('/predict')
+@with_deadline(Config.PREDICT_DEADLINE)
 def predict():
-    """Get predictions"""
+    """
+    Get predictions (query params: metal, karat, currency, intervals=1 for percentile bands)
+    metal=all forecasts every metal in one batched, parallel run
+    """
     try:
-        karat = request.args.get('karat', '24K')
-        result = predictor.get_predictions(karat, use_live_price=True)
+        try:
+            currency, _ = _currency_rate()
+            if request.args.get('metal') == 'all':
+                return _predict_all(currency)
+            metal = _metal()
+        except ValueError as e:
+            return _bad_request(e)
+        karat = request.args.get('karat', next(iter(METALS[metal]['purities'])))
+        if karat not in METALS[metal]['purities']:
+            return _bad_request(f'Invalid grade for {metal}. Must be one of: {", ".join(METALS[metal]["purities"])}')
+        intervals = request.args.get('intervals') == '1'
+        result = predictors[metal].get_predictions(karat, use_live_price=True, intervals=intervals)
         if result is None:
             return jsonify({'success': False, 'error': 'Failed to generate predictions'}), 500
-        # Try to save predictions to database (optional)
-        try:
-            save_predictions(karat, result['predictions'])
-        except Exception as e:
-            logger.warning(f"Could not save predictions to database: {e}")
-        return jsonify({'success': True, 'data': result})
+        # Try to save gold predictions to database (optional, always stored in INR)
+        if metal == 'gold':
+            try:
+                save_predictions(karat, result['predictions'])
+            except Exception as e:
+                logger.warning(f"Could not save predictions to database: {e}")
+        return jsonify({'success': True, 'data': _convert_prediction(result, currency)})
     except Exception as e:
-        print(f"Error in predict endpoint: {str(e)}")
+        logger.exception(f"Error in predict endpoint: {str(e)}")
+        metrics.inc('api_errors_total', endpoint='predict')
         return jsonify({'success': False, 'error': 'Internal server error', 'details': str(e)}), 500
 
+def _convert_prediction(result, currency):
+    """Predictions are made in INR; convert with the cached rates table"""
+    factor = price_service.get_fx_rates().cross('INR', currency)
+    prices = (np.array([result['today_price']] + result['predictions']) * factor).round(2).tolist()
+    converted = dict(result, today_price=prices[0], predictions=prices[1:], currency=currency)
+    if result.get('intervals'):
+        converted['intervals'] = {
+            key: (np.array(value) * factor).round(2).tolist() if key.startswith('p') else value
+            for key, value in result['intervals'].items()
+        }
+    return converted
+
+def _predict_all(currency):
+    results = predict_all_metals(predictors)
+    failed = [metal for metal, result in results.items() if result is None]
+    if len(failed) == len(results):
+        return jsonify({'success': False, 'error': 'Failed to generate predictions'}), 500
+    return jsonify({
+        'success': True,
+        'failed': failed,
+        'data': {metal: _convert_prediction(result, currency) for metal, result in results.items() if result}
+    })
+
+@api_bp.route('/predictions/history')
+@handle_errors
+def prediction_history():
+    """
+    Archived forecasts by target date
+    Query params: karat, start and end (YYYY-MM-DD), latest=1 for only the newest forecast per date
+    """
+    karat = request.args.get('karat')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    grades = [grade for spec in METALS.values() for grade in spec['purities']]
+    if karat and karat not in grades:
+        return jsonify({'success': False, 'error': f'Invalid karat type. Must be one of: {", ".join(grades)}'}), 400
+    try:
+        for value in (start, end):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must use the YYYY-MM-DD format'}), 400
+
+    rows = prediction_archive.range(karat, start, end, latest_only=request.args.get('latest') == '1')
+    return jsonify({'success': True, 'currency': 'INR', 'data': rows})
+
+@api_bp.route('/predictions/accuracy')
+@handle_errors
+def prediction_accuracy():
+    """
+    Production forecast error (INR) per model version, karat and horizon day
+    Query params: metal (default gold), karat, model_version
+    """
+    try:
+        accuracy = predictors[_metal()].accuracy
+    except ValueError as e:
+        return _bad_request(e)
+    return jsonify({
+        'success': True,
+        'evaluated_through': accuracy.evaluated_through(),
+        'data': accuracy.summary(request.args.get('karat'), request.args.get('model_version'))
+    })
+
 @api_bp.route('/all-prices')
 @handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
 def all_prices():
-    """Get all karat prices"""
-    price_data = price_service.get_best_live_price()
+    """Get all karat prices (query params: metal, default gold; currency, default INR)"""
+    try:
+        metal = _metal()
+        currency, rate = _currency_rate()
+    except ValueError as e:
+        return _bad_request(e)
+
+    price_data = price_service.get_best_live_price(metal)
     if not price_data:
         return jsonify({'success': False, 'error': 'Could not fetch prices'}), 500
 
-    # Get INR conversion rate
-    inr_rate = price_service.get_usd_to_inr_rate()
-
-    # Convert 24K price to INR
-    price_per_gram_24k_inr = price_data['price_per_gram_24k'] * inr_rate
+    # Convert 24K price to the requested currency
+    price_per_gram_24k_local = price_data['price_per_gram_24k'] * rate
 
-    # Get all karat prices in INR
-    all_karats_inr = price_service.get_all_karat_prices(price_per_gram_24k_inr)
+    # Get all karat prices in that currency
+    all_karats_local = price_service.get_all_karat_prices(price_per_gram_24k_local, metal)
 
     return jsonify({
         'success': True,
         'data': {
             'source': price_data['source'],
             'timestamp': price_data['date'],
-            'prices': all_karats_inr
+            'metal': metal,
+            'currency': currency,
+            'prices': all_karats_local,
+            'degraded': bool(price_data.get('degraded'))
         }
     })
 
+# Upper bound for `days` on history endpoints (about 10 years of daily closes)
+MAX_HISTORY_DAYS = 3660
+
+# Parsed history files, reloaded only when the file changes: {metal: (mtime, dates, usd prices)}
+_history_cache = {}
+
+def _history_columns(metal):
+    """Dates (datetime64[D], oldest first) and USD per gram prices from a metal's stored history"""
+    data_path = os.path.join(os.path.dirname(__file__), '..', 'data', history_filename(metal))
+    mtime = os.path.getmtime(data_path)
+    cached = _history_cache.get(metal)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+    import pandas as pd
+    df = pd.read_csv(data_path)
+    dates = pd.to_datetime(df['Date'].astype(str).str[:10]).to_numpy().astype('datetime64[D]')
+    order = np.argsort(dates, kind='stable')
+    dates, prices = dates[order], df['Price_Per_Gram'].to_numpy(dtype='f8')[order]
+    _history_cache[metal] = (mtime, dates, prices)
+    return dates, prices
+
 @api_bp.route('/historical-prices')
 @handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
 def historical_prices():
-    """Get historical prices for the last 6 days"""
+    """
+    Daily prices before today, most recent first
+    Query params: metal (default gold), currency (default INR), days (default 5),
+    format (json, npz or arrow; the Accept header works too)
+    """
     try:
-        import pandas as pd
-        data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'gold_historical_data.csv')
-        df = pd.read_csv(data_path)
-        df['Date'] = pd.to_datetime(df['Date'], utc=True)
-        
-        # Get last 5 days (excluding today), sorted descending (most recent first)
-        from datetime import datetime
-        today = datetime.now().strftime('%Y-%m-%d')
-        df = df[df['Date'] != today].sort_values('Date', ascending=False).head(5)
-        
-        # Convert to INR (assuming the prices are in USD, convert using current rate)
-        inr_rate = price_service.get_usd_to_inr_rate()
-        df['Price_Per_Gram_INR'] = df['Price_Per_Gram'] * inr_rate
+        metal = _metal()
+        currency, _ = _currency_rate()
+        fmt = negotiate(request)
+    except NotAcceptable as e:
+        return jsonify({'success': False, 'error': str(e)}), 406
+    except ValueError as e:
+        return _bad_request(e)
+    days = request.args.get('days', type=int, default=5)
+    if days <= 0 or days > MAX_HISTORY_DAYS:
+        return _bad_request(f'Days must be between 1 and {MAX_HISTORY_DAYS}')
+    try:
+        dates, prices = _history_columns(metal)
         
-        # Format for frontend
-        historical_data = []
-        for _, row in df.iterrows():
-            historical_data.append({
-                'date': row['Date'].strftime('%Y-%m-%d'),
-                'price_usd': round(row['Price_Per_Gram'], 2),
-                'price_inr': round(row['Price_Per_Gram_INR'], 2)
-            })
+        # Most recent `days` rows, excluding today
+        recent = dates != np.datetime64(datetime.now().date(), 'D')
+        dates, prices = dates[recent][::-1][:days], prices[recent][::-1][:days]
         
-        return jsonify({
-            'success': True,
-            'data': historical_data
-        })
+        # Convert to INR and the requested currency (prices are in USD) in one lookup
+        converted = price_service.get_fx_rates().convert(prices, ['INR', currency]).round(2)
+        columns = {
+            'date': dates,
+            'price_usd': prices.round(2),
+            'price_inr': converted[:, 0],
+            'price': converted[:, 1]
+        }
+        meta = {'success': True, 'metal': metal, 'currency': currency}
+        if fmt != 'json':
+            return columnar_response(fmt, columns, meta)
+        columns['date'] = np.datetime_as_string(dates, unit='D')
+        return json_response(dict(meta, data=records(columns)))
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': f'No stored history for {metal}'}), 404
     except Exception as e:
-        print(f"Error loading historical data: {e}")
+        logger.exception(f"Error loading historical data: {e}")
+        metrics.inc('api_errors_total', endpoint='historical_prices')
         return jsonify({'success': False, 'error': 'Could not load historical data'}), 500
+
+# Weekly/monthly candles and moving averages of each metal's stored history
+price_aggregates = {metal: PriceAggregates() for metal in METALS}
+
+def _aggregates(metal):
+    """A metal's aggregates, extended to its stored history (no work while the file is unchanged)"""
+    dates, prices = _history_columns(metal)
+    aggregates = price_aggregates[metal]
+    aggregates.update(dates, prices)
+    return aggregates
+
+def _date_bounds():
+    """The `start` and `end` query params as datetime64[D] or None; ValueError if malformed"""
+    bounds = []
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        if value:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError('Dates must use the YYYY-MM-DD format')
+        bounds.append(np.datetime64(value, 'D') if value else None)
+    return bounds
+
+@api_bp.route('/candles')
+@handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
+def candles():
+    """
+    Weekly or monthly OHLC candles of the stored daily history, oldest first
+    Query params: metal, currency (default INR), interval (week or month,
+    default week), start and end (YYYY-MM-DD), format (json, npz or arrow)
+    """
+    interval = request.args.get('interval', 'week')
+    try:
+        metal = _metal()
+        currency, rate = _currency_rate()
+        fmt = negotiate(request)
+        start, end = _date_bounds()
+        columns = _aggregates(metal).candles(interval, start, end)
+    except NotAcceptable as e:
+        return jsonify({'success': False, 'error': str(e)}), 406
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': f'No stored history for {request.args.get("metal", DEFAULT_METAL)}'}), 404
+    except ValueError as e:
+        return _bad_request(e)
+
+    for name in ('open', 'high', 'low', 'close'):
+        columns[name] = (columns[name] * rate).round(2)
+    meta = {'success': True, 'metal': metal, 'interval': interval, 'currency': currency}
+    if fmt != 'json':
+        return columnar_response(fmt, columns, meta)
+    columns['date'] = np.datetime_as_string(columns['date'], unit='D')
+    return json_response({'success': True, 'data': dict(columns, metal=metal, interval=interval, currency=currency)})
+
+@api_bp.route('/moving-averages')
+@handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
+def moving_averages():
+    """
+    Daily prices with their 20, 50 and 200 day simple moving averages, oldest first
+    Query params: metal, currency (default INR), windows (e.g. 20,200),
+    start and end (YYYY-MM-DD), format (json, npz or arrow)
+    Averages are null until their window has filled
+    """
+    try:
+        metal = _metal()
+        currency, rate = _currency_rate()
+        fmt = negotiate(request)
+        start, end = _date_bounds()
+        windows = request.args.get('windows')
+        if windows:
+            try:
+                windows = [int(w) for w in windows.split(',')]
+            except ValueError:
+                raise ValueError('Windows must be comma-separated day counts')
+        columns = _aggregates(metal).moving_averages(windows or None, start, end)
+    except NotAcceptable as e:
+        return jsonify({'success': False, 'error': str(e)}), 406
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': f'No stored history for {request.args.get("metal", DEFAULT_METAL)}'}), 404
+    except ValueError as e:
+        return _bad_request(e)
+
+    for name in list(columns)[1:]:
+        columns[name] = (columns[name] * rate).round(2)
+    meta = {'success': True, 'metal': metal, 'currency': currency}
+    if fmt != 'json':
+        return columnar_response(fmt, columns, meta)
+    columns['date'] = np.datetime_as_string(columns['date'], unit='D')
+    for name in list(columns)[2:]:
+        columns[name] = np.where(np.isnan(columns[name]), None, columns[name])
+    return json_response({'success': True, 'data': dict(columns, metal=metal, currency=currency)})
+
+MAX_EXPORT_PAGE = 100000
+# Price rows converted per vectorized FX call while streaming an export
+EXPORT_BATCH_ROWS = 5000
+
+def _export_prices(start, end, limit):
+    """Row generator, columns, next page key and file name for the prices export"""
+    metal = _metal()
+    currency, _ = _currency_rate()
+    after = decode_cursor(request.args.get('cursor'), 1)
+    dates, prices = _history_columns(metal)
+    lo = int(np.searchsorted(dates, np.datetime64(after[0], 'D'), 'right')) if after else 0
+    if start:
+        lo = max(lo, int(np.searchsorted(dates, np.datetime64(start, 'D'), 'left')))
+    hi = int(np.searchsorted(dates, np.datetime64(end, 'D'), 'right')) if end else len(dates)
+    next_key = None
+    if limit is not None and hi - lo > limit:
+        hi = lo + limit
+        next_key = [str(dates[hi - 1])]
+    fx_rates = price_service.get_fx_rates()
+
+    def rows():
+        for i in range(lo, hi, EXPORT_BATCH_ROWS):
+            batch = slice(i, min(i + EXPORT_BATCH_ROWS, hi))
+            converted = fx_rates.convert(prices[batch], ['INR', currency]).round(2)
+            yield from records({
+                'date': np.datetime_as_string(dates[batch], unit='D'),
+                'price_usd': prices[batch].round(2),
+                'price_inr': converted[:, 0],
+                'price': converted[:, 1]
+            })
+
+    return rows(), ['date', 'price_usd', 'price_inr', 'price'], next_key, f'{metal}-prices'
+
+def _export_predictions(start, end, limit):
+    """Row generator, columns, next page key and file name for the predictions export"""
+    karat = request.args.get('karat')
+    grades = [grade for spec in METALS.values() for grade in spec['purities']]
+    if karat and karat not in grades:
+        raise ValueError(f'Invalid karat type. Must be one of: {", ".join(grades)}')
+    after = decode_cursor(request.args.get('cursor'), 2)
+    next_key = prediction_archive.page_end(limit, karat, start, end, after) if limit else None
+    rows = prediction_archive.iter_rows(karat, start, end, after)
+    if limit:
+        rows = islice(rows, limit)
+    return rows, list(PREDICTION_COLUMNS), next_key, f'{karat or "all"}-predictions'
+
+@api_bp.route('/export/<dataset>')
+@handle_errors
+def export(dataset):
+    """
+    Bulk export, streamed oldest first: `prices` (metal, currency) or
+    `predictions` (karat, prices in INR)
+    Query params: start and end (YYYY-MM-DD), format (csv, default, or ndjson),
+    gzip=1, limit (page size) and cursor (from the previous page's X-Next-Cursor)
+    """
+    exporters = {'prices': _export_prices, 'predictions': _export_predictions}
+    if dataset not in exporters:
+        return jsonify({'success': False, 'error': f"Unknown dataset '{dataset}'. Use one of: {', '.join(exporters)}"}), 404
+    fmt = request.args.get('format', 'csv').strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f"Unknown format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}"}), 406
+    start, end = request.args.get('start'), request.args.get('end')
+    try:
+        for value in (start, end):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return _bad_request('Dates must use the YYYY-MM-DD format')
+    limit = request.args.get('limit', type=int)
+    if limit is not None and not 1 <= limit <= MAX_EXPORT_PAGE:
+        return _bad_request(f'Limit must be between 1 and {MAX_EXPORT_PAGE}')
+
+    try:
+        rows, columns, next_key, name = exporters[dataset](start, end, limit)
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': f'No stored history for {request.args.get("metal", DEFAULT_METAL)}'}), 404
+    except ValueError as e:
+        return _bad_request(e)
+
+    compress = request.args.get('gzip') == '1'
+    response = Response(stream_rows(rows, columns, fmt, compress), content_type=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    if next_key is not None:
+        cursor = encode_cursor(next_key)
+        response.headers['X-Next-Cursor'] = cursor
+        next_url = url_for('.export', dataset=dataset, **dict(request.args.to_dict(), cursor=cursor))
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
+
+def _user_id():
+    """The logged-in user's id (for routes behind api_login_required)"""
+    return str(current_user.id)
+
+@api_bp.route('/alerts', methods=['GET'])
+@handle_errors
+@api_login_required
+def list_alerts():
+    """The logged-in user's price alerts"""
+    return jsonify({'success': True, 'data': price_alerts.alerts(_user_id())})
+
+@api_bp.route('/alerts', methods=['POST'])
+@handle_errors
+@api_login_required
+def create_alert():
+    """
+    Create a price alert for the logged-in user from a JSON body: karat,
+    currency (default INR), direction (above or below) and threshold, a
+    price per gram in that currency
+    """
+    payload = request.get_json(silent=True) or {}
+    karat = payload.get('karat', '24K')
+    if karat not in price_service.gold_purities:
+        return _bad_request(f'Invalid karat type. Must be one of: {", ".join(price_service.gold_purities)}')
+    if payload.get('direction') not in DIRECTIONS:
+        return _bad_request(f"Direction must be one of: {', '.join(DIRECTIONS)}")
+    try:
+        threshold = float(payload.get('threshold'))
+    except (TypeError, ValueError):
+        return _bad_request('Threshold must be a number')
+    try:
+        currency = str(payload.get('currency', 'INR')).strip().upper()
+        price_service.get_usd_rate(currency)
+        alert = price_alerts.add(_user_id(), karat, currency, payload['direction'], threshold)
+    except ValueError as e:
+        return _bad_request(e)
+    price_broadcaster.keep_polling()
+    return jsonify({'success': True, 'data': alert}), 201
+
+@api_bp.route('/alerts/<int:alert_id>', methods=['DELETE'])
+@handle_errors
+@api_login_required
+def delete_alert(alert_id):
+    """Delete one of the logged-in user's price alerts"""
+    if not price_alerts.remove(_user_id(), alert_id):
+        return jsonify({'success': False, 'error': 'Alert not found'}), 404
+    return jsonify({'success': True})
+
+@api_bp.route('/holdings', methods=['GET'])
+@handle_errors
+@api_login_required
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
+def get_holdings():
+    """
+    The logged-in user's stored gold valued at the live price
+    Query params: currency (default INR), items=1 to list the items
+    """
+    user = _user_id()
+    try:
+        currency, rate = _currency_rate()
+    except ValueError as e:
+        return _bad_request(e)
+    # Publishes the price if it changed, which revalues every portfolio once
+    try:
+        price_broadcaster.poll_once()
+    except Exception as e:
+        logger.warning(f"Could not refresh the live price: {e}")
+
+    portfolio = holdings.portfolio(user)
+    usd_per_gram = portfolio['usd_per_gram']
+    data = {
+        'user': user,
+        'currency': currency,
+        'value': round(portfolio['value_usd'] * rate, 2) if usd_per_gram is not None else None,
+        'fine_grams': round(portfolio['fine_grams'], 4),
+        'karats': {
+            karat: {
+                'weight_grams': round(grams, 4),
+                'value': round(grams * price_service.gold_purities[karat] * usd_per_gram * rate, 2)
+                if usd_per_gram is not None else None
+            }
+            for karat, grams in portfolio['grams'].items() if grams > 0
+        },
+        'price_per_gram_24k': round(usd_per_gram * rate, 2) if usd_per_gram is not None else None,
+        'priced_at': portfolio['priced_at']
+    }
+    if request.args.get('items') == '1':
+        data['items'] = holdings.items(user)
+    return jsonify({'success': True, 'data': data})
+
+@api_bp.route('/holdings', methods=['POST'])
+@handle_errors
+@api_login_required
+def add_holding():
+    """Store an item for the logged-in user from a JSON body: karat, weight_grams, optional label"""
+    payload = request.get_json(silent=True) or {}
+    try:
+        weight = float(payload.get('weight_grams'))
+    except (TypeError, ValueError):
+        return _bad_request('Weight must be a number of grams')
+    label = payload.get('label')
+    if label is not None and (not isinstance(label, str) or len(label) > 200):
+        return _bad_request('Label must be text of at most 200 characters')
+    try:
+        item = holdings.add(_user_id(), payload.get('karat', '24K'), weight, label)
+    except ValueError as e:
+        return _bad_request(e)
+    return jsonify({'success': True, 'data': item}), 201
+
+@api_bp.route('/holdings/<int:item_id>', methods=['DELETE'])
+@handle_errors
+@api_login_required
+def delete_holding(item_id):
+    """Delete one of the logged-in user's stored items"""
+    if not holdings.remove(_user_id(), item_id):
+        return jsonify({'success': False, 'error': 'Item not found'}), 404
+    return jsonify({'success': True})
+
 @api_bp.route('/calculator')
 @handle_errors
+@with_deadline(Config.LIVE_PRICE_DEADLINE)
 def calculator():
     """
-    Gold price calculator endpoint
-    Calculate price for specific weight and karat
+    Metal price calculator endpoint
+    Calculate price for specific weight and karat (or grade for silver and
+    platinum), in `currency` (default INR)
     """
-    karat = request.args.get('karat', '24K')
     weight = request.args.get('weight', type=float, default=1.0)
+    try:
+        metal = _metal()
+        currency, rate = _currency_rate()
+    except ValueError as e:
+        return _bad_request(e)
+    purities = METALS[metal]['purities']
+    karat = request.args.get('karat', next(iter(purities)))
 
     # Input validation
-    if karat not in predictor.gold_purities:
-        return jsonify({'success': False, 'error': f'Invalid karat type. Must be one of: {", ".join(predictor.gold_purities.keys())}'}), 400
+    if karat not in purities:
+        return jsonify({'success': False, 'error': f'Invalid karat type. Must be one of: {", ".join(purities.keys())}'}), 400
 
     if weight <= 0 or weight > 10000:  # Reasonable upper limit
         return jsonify({'success': False, 'error': 'Weight must be positive and less than 10,000 grams'}), 400
     
     # Get current price
-    price_data = price_service.get_best_live_price()
+    price_data = price_service.get_best_live_price(metal)
     if not price_data:
         return jsonify({'success': False, 'error': 'Could not fetch prices'}), 500
     
-    # Get INR conversion
-    inr_rate = price_service.get_usd_to_inr_rate()
-    price_per_gram_24k = price_data['price_per_gram_24k'] * inr_rate
+    # Convert to the requested currency
+    price_per_gram_24k = price_data['price_per_gram_24k'] * rate
     
     # Convert to selected karat
-    purity = predictor.gold_purities[karat]
+    purity = purities[karat]
     price_per_gram = price_per_gram_24k * purity
     total_price = price_per_gram * weight
     
     return jsonify({
         'success': True,
         'data': {
+            'metal': metal,
             'karat': karat,
             'weight': weight,
+            'currency': currency,
             'price_per_gram': round(price_per_gram, 2),
             'total_price': round(total_price, 2),
             'purity': f"{purity * 100}%",
             'source': price_data['source'],
-            'timestamp': price_data['date']
+            'timestamp': price_data['date'],
+            'degraded': bool(price_data.get('degraded'))
         }
     })
\ No newline at end of file
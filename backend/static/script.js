@@ -8,7 +8,11 @@ class GoldPriceApp {
 
     init() {
         this.bindEvents();
-        this.loadLivePrices();
+        if (window.EventSource) {
+            this.subscribeLivePrices();
+        } else {
+            this.loadLivePrices();
+        }
         this.loadHistoricalPrices();
     }
 
@@ -38,6 +42,39 @@ class GoldPriceApp {
         }
     }
 
+    subscribeLivePrices() {
+        this.showLoading('live-prices', 'Fetching live gold prices...');
+        // The browser reconnects on its own and sends Last-Event-ID to resume
+        const source = new EventSource('/api/stream/prices');
+        let received = false;
+
+        source.addEventListener('price', (event) => {
+            received = true;
+            const update = JSON.parse(event.data);
+            const allKarats = {};
+            Object.entries(update.prices).forEach(([karat, price]) => {
+                allKarats[karat] = {
+                    price_per_gram: price,
+                    purity: `${update.purities[karat] * 100}%`
+                };
+            });
+            this.livePrices = {
+                base_data: { source: update.source, date: update.date },
+                all_karats: allKarats,
+                conversion_rate: update.fx
+            };
+            this.displayLivePrices();
+        });
+
+        source.addEventListener('error', () => {
+            if (!received) {
+                // Streaming not available; fall back to a single request
+                source.close();
+                this.loadLivePrices();
+            }
+        });
+    }
+
     displayLivePrices() {
         const container = document.getElementById('live-prices');
         container.innerHTML = '';
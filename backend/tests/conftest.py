@@ -0,0 +1,12 @@
+"""
+Shared setup for the offline unit tests (python -m pytest from the repo root)
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Repo root for `backend.*` and supabase_client, backend/ for the app's own imports
+for path in (ROOT, os.path.join(ROOT, 'backend')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
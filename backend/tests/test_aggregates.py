@@ -0,0 +1,88 @@
+"""
+Materialized candles and moving averages: incremental updates match full rebuilds
+"""
+
+import numpy as np
+import pytest
+
+from backend.models.aggregates import PriceAggregates
+
+
+def _series(days, start='2024-01-03', seed=0):
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + days)
+    prices = 100 + np.random.default_rng(seed).normal(0, 1, days).cumsum()
+    return dates, prices
+
+
+def _assert_same(incremental, rebuilt):
+    for interval in ('week', 'month'):
+        got, expected = incremental.candles(interval), rebuilt.candles(interval)
+        for name in expected:
+            np.testing.assert_array_equal(got[name], expected[name])
+    got, expected = incremental.moving_averages(), rebuilt.moving_averages()
+    np.testing.assert_array_equal(got.pop('date'), expected.pop('date'))
+    for name in expected:
+        np.testing.assert_allclose(got[name], expected[name], equal_nan=True)
+
+
+def _fresh(dates, prices, windows=(3, 20)):
+    aggregates = PriceAggregates(windows)
+    aggregates.update(dates, prices)
+    return aggregates
+
+
+@pytest.fixture
+def no_rebuild(monkeypatch):
+    """Fail if update() falls back to a full build"""
+    def build(self, dates, prices):
+        raise AssertionError('full rebuild')
+    return lambda: monkeypatch.setattr(PriceAggregates, '_build', build)
+
+
+def test_appended_bars_extend_the_tail(no_rebuild):
+    dates, prices = _series(120)
+    aggregates, expected = _fresh(dates[:100], prices[:100]), _fresh(dates, prices)
+    no_rebuild()
+    aggregates.update(dates, prices)
+    _assert_same(aggregates, expected)
+
+
+@pytest.mark.parametrize('dropped', [1, 5, 31, 60])
+def test_rolling_window_takes_the_tail_path(no_rebuild, dropped):
+    # A stored 1y/180d history shifts: old bars fall off the head as new ones arrive
+    dates, prices = _series(200)
+    window = slice(dropped, 180 + dropped // 2)
+    aggregates, expected = _fresh(dates[:180], prices[:180]), _fresh(dates[window], prices[window])
+    no_rebuild()
+    aggregates.update(dates[window], prices[window])
+    _assert_same(aggregates, expected)
+
+
+def test_unchanged_history_is_a_no_op(no_rebuild):
+    dates, prices = _series(50)
+    aggregates = _fresh(dates, prices)
+    state = aggregates._state
+    no_rebuild()
+    aggregates.update(dates, prices)
+    assert aggregates._state is state
+
+
+def test_revised_bar_rebuilds():
+    dates, prices = _series(60)
+    aggregates = _fresh(dates, prices)
+    revised = prices.copy()
+    revised[30] += 5
+    aggregates.update(dates[10:], revised[10:])
+    _assert_same(aggregates, _fresh(dates[10:], revised[10:]))
+
+
+def test_candles_and_averages_match_pandas():
+    pd = pytest.importorskip('pandas')
+    dates, prices = _series(90)
+    aggregates = _fresh(dates, prices)
+    frame = pd.Series(prices, index=pd.DatetimeIndex(dates))
+    monthly = frame.resample('MS').ohlc()
+    candles = aggregates.candles('month')
+    np.testing.assert_allclose(candles['high'], monthly['high'])
+    np.testing.assert_allclose(candles['close'], monthly['close'])
+    np.testing.assert_allclose(aggregates.moving_averages([3])['sma_3'], frame.rolling(3).mean(), equal_nan=True)
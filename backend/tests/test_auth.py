@@ -0,0 +1,94 @@
+"""
+Login load shedding: the bounded bcrypt pool and the user lookup cache
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import supabase_client
+from supabase_client import AuthBusyError, UserCache
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def pool(monkeypatch, release):
+    """One bcrypt worker and one job in flight at most, with a short timeout"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(supabase_client, '_bcrypt_pool', executor)
+    monkeypatch.setattr(supabase_client, '_bcrypt_slots', threading.BoundedSemaphore(1))
+    monkeypatch.setattr(supabase_client, 'AUTH_BCRYPT_TIMEOUT', 0.05)
+    yield executor
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def test_slot_is_held_until_a_timed_out_job_ends(pool, release):
+    with pytest.raises(AuthBusyError, match='too long'):
+        supabase_client._run_bcrypt(release.wait)
+    # The caller gave up, but the job is still running on the pool
+    with pytest.raises(AuthBusyError, match='Too many'):
+        supabase_client._run_bcrypt(lambda: 42)
+    release.set()
+    pool.submit(lambda: None).result()
+    assert supabase_client._run_bcrypt(lambda: 42) == 42
+
+
+def test_queued_job_is_dropped_on_timeout(pool, monkeypatch, release):
+    monkeypatch.setattr(supabase_client, '_bcrypt_slots', threading.BoundedSemaphore(2))
+    pool.submit(release.wait)  # Occupy the only worker
+    ran = []
+    with pytest.raises(AuthBusyError):
+        supabase_client._run_bcrypt(lambda: ran.append(1))
+    release.set()
+    pool.submit(lambda: None).result()
+    assert ran == []
+    assert supabase_client._bcrypt_slots.acquire(blocking=False)
+    assert supabase_client._bcrypt_slots.acquire(blocking=False)
+
+
+def test_busy_login_does_not_retry_bcrypt_on_the_fallback(pool, monkeypatch):
+    calls = []
+
+    class Users:
+        data = [{'id': 1, 'email': 'a@b.c', 'password_hash': 'x', 'created_at': 'now'}]
+
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: self
+
+    def slow_check(password, hashed):
+        calls.append(password)
+        threading.Event().wait(0.2)
+        return True
+
+    monkeypatch.setattr(supabase_client, 'get_supabase_client', lambda use_service_role=False: Users())
+    monkeypatch.setattr(supabase_client, '_check_password', slow_check)
+    monkeypatch.setattr(supabase_client, 'user_cache', UserCache())
+    monkeypatch.setitem(supabase_client.users_db, 'a@b.c', {'id': 1, 'password_hash': 'x', 'created_at': 'now'})
+
+    success, message = supabase_client.authenticate_user('a@b.c', 'secret')
+    assert not success
+    assert 'retry' in message
+    assert calls == ['secret']
+
+
+def test_user_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(supabase_client.time, 'monotonic', lambda: now[0])
+    cache = UserCache(ttl=60, negative_ttl=10)
+    cache.put('known@x', {'id': 1})
+    cache.put('missing@x', None)
+    assert cache.get('known@x') == (True, {'id': 1})
+    assert cache.get('missing@x') == (True, None)
+    now[0] += 30
+    assert cache.get('missing@x') == (False, None)
+    assert cache.get('known@x') == (True, {'id': 1})
+    now[0] += 30
+    assert cache.get('known@x') == (False, None)
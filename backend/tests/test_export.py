@@ -0,0 +1,90 @@
+"""
+Bulk exports: keyset pages of the prediction archive and the streaming encoders
+"""
+
+import gzip
+import json
+from itertools import islice
+
+import pytest
+
+from backend.models.prediction_archive import PredictionArchive
+from backend.utils import export
+from backend.utils.export import decode_cursor, encode_cursor, stream_rows
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = PredictionArchive(str(tmp_path / 'predictions.sqlite3'), legacy_dir=None)
+    archive.append([{'karat': karat, 'predictions': [float(run), run + 0.5, run + 0.75], 'run_at': 1.7e9 + run}
+                    for run in range(4) for karat in ('24K', '22K')])
+    return archive
+
+
+def _keys(rows):
+    return [(row['run_id'], row['horizon']) for row in rows]
+
+
+def _pages(archive, limit, karat=None):
+    """Walk the archive like a client following X-Next-Cursor"""
+    pages, cursor = [], None
+    while True:
+        after = decode_cursor(cursor, 2)
+        next_key = archive.page_end(limit, karat, after=after)
+        pages.append(_keys(islice(archive.iter_rows(karat, after=after), limit)))
+        if next_key is None:
+            return pages
+        assert next_key == pages[-1][-1]
+        cursor = encode_cursor(next_key)
+
+
+@pytest.mark.parametrize('limit', [1, 4, 5, 12, 100])
+def test_pages_cover_every_row_once(archive, limit):
+    pages = _pages(archive, limit, karat='24K')
+    everything = _keys(archive.iter_rows('24K'))
+    assert len(everything) == 12
+    assert [key for page in pages for key in page] == everything
+    assert all(len(page) == limit for page in pages[:-1])
+    assert pages[-1]
+
+
+def test_small_batches_read_the_same_rows(archive):
+    assert list(archive.iter_rows(batch_size=2)) == list(archive.iter_rows())
+
+
+def test_resuming_after_a_key_skips_it(archive):
+    keys = _keys(archive.iter_rows())
+    assert _keys(archive.iter_rows(after=keys[4])) == keys[5:]
+    assert archive.page_end(3, after=keys[-4]) is None
+
+
+# Not base64, a key of the wrong length, and a JSON object ({"a":1}) instead of a list
+@pytest.mark.parametrize('cursor, length', [('not base64!', 2), (encode_cursor([1]), 2), ('eyJhIjoxfQ', 1)])
+def test_malformed_cursors_are_rejected(cursor, length):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(cursor, length)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['2026-01-02']), 1) == ['2026-01-02']
+    assert decode_cursor('', 2) is None
+
+
+def test_stream_rows_encodes_csv_and_ndjson(monkeypatch):
+    monkeypatch.setattr(export, 'CHUNK_BYTES', 64)
+    rows = [{'date': f'2026-01-{day:02d}', 'price': day * 1.5, 'extra': 'dropped'} for day in range(1, 31)]
+
+    chunks = list(stream_rows(iter(rows), ['date', 'price']))
+    assert len(chunks) > 1
+    lines = b''.join(chunks).decode().splitlines()
+    assert lines[0] == 'date,price'
+    assert lines[1:3] == ['2026-01-01,1.5', '2026-01-02,3.0']
+    assert len(lines) == 31
+
+    ndjson = gzip.decompress(b''.join(stream_rows(iter(rows), ['date', 'price'], 'ndjson', compress=True)))
+    assert [json.loads(line) for line in ndjson.splitlines()] == [{'date': r['date'], 'price': r['price']} for r in rows]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match='Unknown export format'):
+        list(stream_rows([], ['date'], 'xml'))
@@ -0,0 +1,81 @@
+"""
+Feature pipeline: the cached transform matches a full computation and parses only new bars
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.models.features import FeaturePipeline
+
+FX = 83.0
+
+
+def _history(days, start='2025-01-01', seed=0):
+    prices = 60 + np.random.default_rng(seed).normal(0, 0.5, days).cumsum()
+    return pd.DataFrame({'Date': pd.date_range(start, periods=days, freq='D').strftime('%Y-%m-%d'),
+                         'Price_Per_Gram': prices, 'USD_INR': FX})
+
+
+def _full(df):
+    return FeaturePipeline().transform(df, FX)
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Row counts handed to series() by each transform"""
+    lengths = []
+    series = FeaturePipeline.series
+
+    def record(self, df, fx_rate, rows=slice(None)):
+        result = series(self, df, fx_rate, rows)
+        lengths.append(len(result[0]))
+        return result
+
+    monkeypatch.setattr(FeaturePipeline, 'series', record)
+    return lengths
+
+
+def test_new_bars_are_appended_without_parsing_the_history(parsed):
+    df = _history(500)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df.iloc[:-3], FX)
+    del parsed[:]
+    rows = pipeline.transform(df, FX)
+    assert parsed == [pipeline.lookback + 3]
+    np.testing.assert_allclose(rows, _full(df))
+
+
+@pytest.mark.parametrize('head, tail', [(5, 501), (0, 400), (100, 300), (0, 500)])
+def test_windows_of_the_cached_history_are_served_from_it(head, tail):
+    df = _history(501)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df.iloc[:500], FX)
+    window = df.iloc[head:tail].reset_index(drop=True)
+    rows = pipeline.transform(window, FX)
+    # Leading rows keep their full-window values from the longer history
+    np.testing.assert_allclose(rows, _full(df)[head:tail])
+
+
+def test_revised_price_near_the_end_recomputes():
+    df = _history(300)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df, FX)
+    revised = df.copy()
+    revised.loc[295, 'Price_Per_Gram'] += 1.0
+    np.testing.assert_allclose(pipeline.transform(revised, FX), _full(revised))
+
+
+def test_history_starting_earlier_recomputes():
+    df = _history(300)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df.iloc[10:], FX)
+    np.testing.assert_allclose(pipeline.transform(df, FX), _full(df))
+
+
+def test_frozen_cache_is_extended_into_new_arrays():
+    df = _history(100)
+    pipeline = FeaturePipeline()
+    pipeline.transform(df.iloc[:-1], FX)
+    pipeline.freeze()
+    np.testing.assert_allclose(pipeline.transform(df, FX), _full(df))
@@ -0,0 +1,127 @@
+"""
+Model selection feedback: shadow forecasts give every candidate a track record
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.models.forecast_accuracy import ForecastAccuracy
+from backend.models.gold_predict import GoldPricePredictor
+from backend.models.prediction_archive import PredictionArchive
+
+INR = 80.0
+PURITIES = {'24K': 1.0}
+
+
+class StubPrices:
+    def get_usd_to_inr_rate(self):
+        return INR
+
+    def get_best_live_price(self, metal):
+        return {'price_per_gram_24k': 70.0}
+
+
+class ConstantModel:
+    """Predicts the same scaled price for every window"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, X, verbose=0):
+        return np.full((len(X), 1), self.value)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return PredictionArchive(str(tmp_path / 'predictions.sqlite3'), legacy_dir=None)
+
+
+def _history(days=80, end=None):
+    end = end or datetime.now().date() - timedelta(days=1)
+    dates = pd.date_range(end=pd.Timestamp(end), periods=days, freq='D')
+    return pd.DataFrame({'Date': dates, 'Price_Per_Gram': np.linspace(60, 70, days), 'USD_INR': INR})
+
+
+def test_shadow_runs_are_scored_but_not_served(archive):
+    run_at = datetime(2026, 3, 1, 12).timestamp()
+    archive.append([
+        {'karat': '24K', 'model_version': 'lstm-1', 'predictions': [100.0], 'run_at': run_at},
+        {'karat': '24K', 'model_version': 'gru-1', 'predictions': [90.0], 'run_at': run_at, 'shadow': True},
+    ])
+    assert [row['model_version'] for row in archive.range()] == ['lstm-1']
+
+    accuracy = ForecastAccuracy(archive, PURITIES, min_samples=1)
+    history = pd.DataFrame({'Date': ['2026-03-02'], 'Price_Per_Gram': [91.0 / INR]})
+    assert accuracy.observe(history, INR) == 2
+    assert accuracy.preferred_architecture(('lstm', 'gru')) == 'gru'
+
+
+def test_selection_waits_for_every_candidate(archive):
+    accuracy = ForecastAccuracy(archive, PURITIES, min_samples=2)
+    run_at = datetime(2026, 3, 1, 12).timestamp()
+    archive.append([{'karat': '24K', 'model_version': 'lstm-1', 'predictions': [100.0, 100.0], 'run_at': run_at}])
+    accuracy.observe(pd.DataFrame({'Date': ['2026-03-02', '2026-03-03'], 'Price_Per_Gram': [1.25, 1.25]}), INR)
+    assert accuracy.preferred_architecture(('lstm', 'gru')) is None
+
+
+def test_predictions_archive_a_shadow_run_per_unselected_candidate(archive):
+    predictor = GoldPricePredictor(live_price_service=StubPrices(), archive=archive)
+    df = _history()
+    predictor.scaler.fit(df[['Price_Per_Gram']].to_numpy())
+    predictor.feature_scaler.fit(predictor.features.transform(df, INR))
+    predictor.model, predictor.model_horizon, predictor.model_version = ConstantModel(0.5), 1, 'lstm-1'
+    predictor.shadow_models = {'gru': (ConstantModel(1.0), 1, 'gru-1')}
+    predictor.preloaded = True
+
+    result = predictor.get_predictions('24K', history=df)
+    assert result['predictions'] == [65.0 * INR] * 5
+
+    rows = archive._connect().execute(
+        "SELECT model_version, shadow, predicted_price FROM predictions ORDER BY run_id, horizon"
+    ).fetchall()
+    expected = [('lstm-1', 0, 65.0 * INR)] * 5 + [('gru-1', 1, 70.0 * INR)] * 5
+    assert [tuple(row) for row in rows] == expected
+    assert {row['model_version'] for row in archive.range()} == {'lstm-1'}
+
+    # Later requests the same day, and USD forecasts, add nothing to score
+    predictor.get_predictions('24K', history=df)
+    predictor.get_predictions('24K', use_live_price=False, history=df)
+    assert archive._connect().execute("SELECT COUNT(*) FROM predictions").fetchone()[0] == 10
+
+
+def test_realized_prices_use_each_days_rate(archive):
+    run_at = datetime(2026, 3, 1, 12).timestamp()
+    archive.append([{'karat': '24K', 'model_version': 'lstm-1', 'predictions': [100.0, 100.0], 'run_at': run_at}])
+    accuracy = ForecastAccuracy(archive, PURITIES, min_samples=1)
+    history = pd.DataFrame({'Date': ['2026-03-02', '2026-03-03'], 'Price_Per_Gram': [1.0, 1.0],
+                            'USD_INR': [100.0, None]})
+    # Today's rate (50) only fills the day without one
+    assert accuracy.observe(history, 50.0) == 2
+    [day1, day2] = accuracy.summary()
+    assert (day1['horizon'], day1['bias']) == (1, 0.0)
+    assert (day2['horizon'], day2['bias']) == (2, 50.0)
+
+
+def test_processes_observing_the_same_days_count_them_once(archive, monkeypatch):
+    run_at = datetime(2026, 3, 1, 12).timestamp()
+    archive.append([{'karat': '24K', 'model_version': 'lstm-1', 'predictions': [100.0], 'run_at': run_at}])
+    history = pd.DataFrame({'Date': ['2026-03-02'], 'Price_Per_Gram': [1.25]})
+    first, second = (ForecastAccuracy(archive, PURITIES, min_samples=1) for _ in range(2))
+    real = second.evaluated_through
+    # The second process checked the watermark before the first one committed
+    monkeypatch.setattr(second, 'evaluated_through', lambda: real() if second._connect().in_transaction else None)
+    assert first.observe(history, INR) == 1
+    assert second.observe(history, INR) == 0
+    assert [row['count'] for row in first.summary()] == [1]
+
+
+def test_archive_keeps_one_run_per_model_and_day(archive):
+    morning, evening = datetime(2026, 3, 1, 9).timestamp(), datetime(2026, 3, 1, 21).timestamp()
+    run = {'karat': '24K', 'model_version': 'lstm-1', 'predictions': [1.0]}
+    assert archive.append([dict(run, run_at=morning)], daily=True) == [1]
+    ids = archive.append([dict(run, run_at=evening), dict(run, model_version='gru-1', run_at=evening)], daily=True)
+    assert ids == [None, 2]
+    assert archive.append([dict(run, run_at=evening + 86400)], daily=True) == [3]
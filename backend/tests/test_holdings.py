@@ -0,0 +1,90 @@
+"""
+Holdings book: processes sharing one database stay in sync through the change journal
+"""
+
+import pytest
+
+from backend.models.holdings import HoldingsBook
+
+PURITIES = {'24K': 1.0, '22K': 0.916}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'holdings.sqlite3')
+
+
+@pytest.fixture
+def folds(monkeypatch):
+    """Rows passed to each _fold call: journal deltas one per change, rebuilds one per user and karat"""
+    calls = []
+    fold = HoldingsBook._fold
+
+    def record(self, rows):
+        calls.append(list(rows))
+        fold(self, rows)
+
+    monkeypatch.setattr(HoldingsBook, '_fold', record)
+    return calls
+
+
+def test_changes_from_another_process_are_folded_from_the_journal(path, folds):
+    writer, reader = HoldingsBook(path, PURITIES), HoldingsBook(path, PURITIES)
+    first = writer.add('u1', '22K', 10)
+    writer.add('u1', '22K', 5)
+    writer.add('u2', '24K', 1)
+    assert writer.remove('u1', first['id'])
+
+    del folds[:]
+    portfolio = reader.portfolio('u1')
+    assert portfolio['grams'] == {'24K': 0.0, '22K': 5.0}
+    assert portfolio['fine_grams'] == pytest.approx(4.58)
+    # Four journal entries, not a rebuild from the items
+    assert folds == [[('u1', '22K', 10.0), ('u1', '22K', 5.0), ('u2', '24K', 1.0), ('u1', '22K', -10.0)]]
+    assert reader.portfolio('u2')['grams']['24K'] == 1.0
+
+
+def test_reader_behind_the_journal_rebuilds(path, folds):
+    writer, reader = HoldingsBook(path, PURITIES, journal_size=2), HoldingsBook(path, PURITIES, journal_size=2)
+    reader.portfolio('u1')
+    for grams in (1, 2, 3, 4):
+        writer.add('u1', '24K', grams)
+
+    del folds[:]
+    assert reader.portfolio('u1')['grams']['24K'] == 10.0
+    assert folds == [[('u1', '24K', 10.0)]]
+    # Back in step: the next change comes from the journal again
+    writer.add('u1', '24K', 5)
+    del folds[:]
+    assert reader.portfolio('u1')['grams']['24K'] == 15.0
+    assert folds == [[('u1', '24K', 5.0)]]
+
+
+def test_values_follow_changes_after_a_revaluation(path):
+    writer, reader = HoldingsBook(path, PURITIES), HoldingsBook(path, PURITIES)
+    assert reader.portfolio('u1')['value_usd'] is None
+    writer.add('u1', '24K', 2)
+    reader.revalue(80.0, priced_at=1.0)
+    assert reader.portfolio('u1')['value_usd'] == pytest.approx(160.0)
+    # Folded in without another revalue, at the last price
+    writer.add('u1', '22K', 10)
+    assert reader.portfolio('u1')['value_usd'] == pytest.approx(160.0 + 10 * 0.916 * 80.0)
+    assert reader.portfolio('nobody') == {'grams': {'24K': 0.0, '22K': 0.0}, 'fine_grams': 0.0,
+                                          'value_usd': 0.0, 'usd_per_gram': 80.0, 'priced_at': 1.0}
+
+
+def test_many_users_grow_the_matrix(path):
+    book = HoldingsBook(path, PURITIES)
+    for user in range(40):
+        book.add(f'u{user}', '24K', user + 1)
+    assert HoldingsBook(path, PURITIES).portfolio('u39')['grams']['24K'] == 40.0
+    assert book.portfolio('u0')['grams']['24K'] == 1.0
+
+
+def test_invalid_items_are_rejected(path):
+    book = HoldingsBook(path, PURITIES)
+    with pytest.raises(ValueError, match='karat'):
+        book.add('u1', '9K', 1)
+    with pytest.raises(ValueError, match='Weight'):
+        book.add('u1', '24K', 0)
+    assert not book.remove('u2', 1)
@@ -0,0 +1,58 @@
+"""
+Currency table caching of the live price service, without network access
+"""
+
+import pytest
+
+from backend.models import live_price
+from backend.models.live_price import LiveGoldPriceService
+
+
+class Response:
+    status_code = 200
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    def json(self):
+        return {'rates': self.rates}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(live_price.time, 'monotonic', lambda: clock[0])
+    service = LiveGoldPriceService(quota_manager=object())
+    service.clock = clock
+    return service
+
+
+def test_failed_refresh_is_not_retried_on_every_conversion(service, monkeypatch):
+    calls = []
+
+    def down(url, timeout=None):
+        calls.append(url)
+        raise ConnectionError('FX provider down')
+
+    monkeypatch.setattr(live_price.requests, 'get', down)
+    for _ in range(5):
+        assert service.get_usd_rate('INR') == 83.0
+    assert len(calls) == 1
+
+    service.clock[0] += service.fx_retry_interval
+    service.get_usd_rate('INR')
+    assert len(calls) == 2
+
+
+def test_rates_refresh_after_recovery(service, monkeypatch):
+    def down(url, timeout=None):
+        raise ConnectionError('FX provider down')
+
+    monkeypatch.setattr(live_price.requests, 'get', down)
+    service.get_usd_rate('INR')
+    monkeypatch.setattr(live_price.requests, 'get', lambda url, timeout=None: Response({'INR': 84.5, 'EUR': 0.9}))
+    with pytest.raises(ValueError):
+        service.get_usd_rate('EUR')  # Still within the retry interval: fallback table
+    service.clock[0] += service.fx_retry_interval
+    assert service.get_usd_rate('EUR') == 0.9
+    assert service.get_usd_to_inr_rate() == 84.5
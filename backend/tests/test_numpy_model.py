@@ -0,0 +1,41 @@
+"""
+NumPy forward pass: matches the Keras models it is exported from
+"""
+
+import numpy as np
+import pytest
+
+from backend.models.gold_predict import GoldPricePredictor
+from backend.models.numpy_model import NumpyRecurrentModel, export_weights
+
+tf = pytest.importorskip('tensorflow')
+
+
+@pytest.mark.parametrize('builder', ['build_lstm_model', 'build_gru_model'])
+def test_numpy_forward_pass_matches_keras(builder):
+    tf.random.set_seed(0)
+    input_shape = (20, 4)
+    model = getattr(GoldPricePredictor(), builder)(input_shape)
+    # Random, non-zero biases so every gate term is exercised
+    model.set_weights([np.random.default_rng(i).normal(0, 0.3, w.shape) for i, w in enumerate(model.get_weights())])
+    X = np.random.default_rng(42).random((8,) + input_shape, dtype='f4')
+
+    expected = model.predict(X, verbose=0)
+    got = NumpyRecurrentModel(*export_weights(model)).predict(X)
+    np.testing.assert_allclose(got, expected, rtol=1e-4, atol=1e-5)
+
+
+def test_direct_model_matches_keras():
+    model = GoldPricePredictor().build_direct_model((20, 4), 5)
+    X = np.random.default_rng(1).random((3, 20, 4), dtype='f4')
+    got = NumpyRecurrentModel(*export_weights(model)).predict(X)
+    np.testing.assert_allclose(got, model.predict(X, verbose=0), rtol=1e-4, atol=1e-5)
+
+
+def test_saved_weights_round_trip_through_a_memory_map(tmp_path):
+    model = GoldPricePredictor().build_gru_model((20, 4))
+    specs, flat = export_weights(model)
+    np.save(tmp_path / 'gold.weights.npy', flat)
+    loaded = NumpyRecurrentModel.load(str(tmp_path / 'gold.weights.npy'), specs)
+    X = np.random.default_rng(2).random((2, 20, 4), dtype='f4')
+    np.testing.assert_allclose(loaded.predict(X), model.predict(X, verbose=0), rtol=1e-4, atol=1e-5)
@@ -0,0 +1,51 @@
+"""
+Multi-metal forecasts: per-metal jobs run in parallel under the caller's deadline
+"""
+
+import threading
+
+import pytest
+
+from backend.models import gold_predict
+from backend.utils.deadline import deadline, remaining
+
+
+class StubService:
+    def get_best_live_prices(self, metals):
+        return {}
+
+
+class StubPredictor:
+    """Records the budget and thread its forecast ran with"""
+
+    purities = {'24K': 1.0}
+
+    def __init__(self, service):
+        self.live_price_service = service
+        self.seen = None
+
+    def get_predictions(self, karat, use_live_price=True, history=None):
+        self.seen = (remaining(), threading.current_thread())
+        return {'karat': karat}
+
+
+@pytest.fixture
+def predictors(monkeypatch):
+    monkeypatch.setattr(gold_predict, 'fetch_histories', lambda metals: {})
+    service = StubService()
+    return {metal: StubPredictor(service) for metal in ('gold', 'silver')}
+
+
+def test_workers_see_the_callers_remaining_budget(predictors):
+    with deadline(5):
+        results = gold_predict.predict_all_metals(predictors)
+    assert results == {'gold': {'karat': '24K'}, 'silver': {'karat': '24K'}}
+    for predictor in predictors.values():
+        left, thread = predictor.seen
+        assert thread is not threading.current_thread()
+        assert left is not None and 4 < left <= 5
+
+
+def test_workers_without_a_deadline_see_none(predictors):
+    gold_predict.predict_all_metals(predictors)
+    assert [predictor.seen[0] for predictor in predictors.values()] == [None, None]
@@ -0,0 +1,111 @@
+"""
+Prediction archive: legacy imports, retention and background compaction
+"""
+
+import glob
+import time
+import threading
+from datetime import datetime
+
+import pytest
+
+from backend.models.prediction_archive import PredictionArchive
+
+LEGACY = 'Date,Predicted_Price_24K\n2025-12-26,100.0\n2025-12-27,101.0\n'
+
+
+@pytest.fixture
+def legacy_dir(tmp_path):
+    directory = tmp_path / 'data'
+    directory.mkdir()
+    (directory / 'gold_predictions_24K_20251225.csv').write_text(LEGACY)
+    return directory
+
+
+def _legacy_runs(archive):
+    return archive._connect().execute(
+        "SELECT COUNT(DISTINCT run_id) FROM predictions WHERE model_version = 'legacy-csv'"
+    ).fetchone()[0]
+
+
+def test_legacy_csv_is_imported_once_and_kept(tmp_path, legacy_dir):
+    path = str(tmp_path / 'predictions.sqlite3')
+    archive = PredictionArchive(path, legacy_dir=str(legacy_dir))
+    assert _legacy_runs(archive) == 1
+    assert [row['predicted_price'] for row in archive.run(1)] == [100.0, 101.0]
+    assert (legacy_dir / 'gold_predictions_24K_20251225.csv').exists()
+
+    # A restart, or another worker, finds it recorded
+    assert PredictionArchive(path, legacy_dir=str(legacy_dir)).import_legacy_csv(str(legacy_dir)) == 0
+    assert _legacy_runs(archive) == 1
+
+
+def test_workers_starting_together_import_once(tmp_path, legacy_dir):
+    path = str(tmp_path / 'predictions.sqlite3')
+    archives = [PredictionArchive(path, legacy_dir=None) for _ in range(4)]
+    counts = []
+    threads = [threading.Thread(target=lambda a=a: counts.append(a.import_legacy_csv(str(legacy_dir))))
+               for a in archives]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(counts) == [0, 0, 0, 1]
+    assert _legacy_runs(archives[0]) == 1
+
+
+def test_runs_imported_before_files_were_recorded_are_not_duplicated(tmp_path, legacy_dir):
+    path = str(tmp_path / 'predictions.sqlite3')
+    archive = PredictionArchive(path, legacy_dir=None)
+    archive.append([{'karat': '24K', 'model_version': 'legacy-csv', 'predictions': [100.0, 101.0],
+                     'run_at': datetime(2025, 12, 25).timestamp()}])
+    assert archive.import_legacy_csv(str(legacy_dir)) == 0
+    assert _legacy_runs(archive) == 1
+
+
+def test_missing_and_unreadable_files_are_skipped(tmp_path, legacy_dir, monkeypatch):
+    (legacy_dir / 'gold_predictions_22K_20251226.csv').write_text('not,a\nforecast')
+    real_glob = glob.glob
+    gone = str(legacy_dir / 'gold_predictions_18K_20251227.csv')
+    monkeypatch.setattr('backend.models.prediction_archive.glob.glob', lambda pattern: real_glob(pattern) + [gone])
+    archive = PredictionArchive(str(tmp_path / 'predictions.sqlite3'), legacy_dir=str(legacy_dir))
+    assert _legacy_runs(archive) == 1
+
+
+def test_compaction_runs_in_the_background(tmp_path):
+    archive = PredictionArchive(str(tmp_path / 'predictions.sqlite3'), legacy_dir=None, compact_interval=0)
+    started, release = threading.Event(), threading.Event()
+    threads = []
+
+    def compact(now=None, vacuum=False):
+        threads.append(threading.current_thread())
+        started.set()
+        release.wait(5)
+        archive.last_compacted = time.monotonic()
+        return 0
+
+    archive.compact = compact
+    archive.append([{'karat': '24K', 'predictions': [1.0]}])
+    assert started.wait(5)
+    # A second append while compaction is running neither waits nor starts another
+    archive.append([{'karat': '24K', 'predictions': [2.0]}])
+    release.set()
+    threads[0].join(5)
+    assert len(threads) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+def test_compact_applies_retention(tmp_path):
+    archive = PredictionArchive(str(tmp_path / 'predictions.sqlite3'), legacy_dir=None,
+                                detail_days=10, retention_days=100)
+    now = datetime(2026, 6, 1, 12).timestamp()
+    day = 86400
+    archive.append([
+        {'karat': '24K', 'predictions': [1.0], 'run_at': now - 200 * day},              # past retention
+        {'karat': '24K', 'predictions': [2.0, 2.5], 'run_at': now - 31 * day},          # superseded...
+        {'karat': '24K', 'predictions': [3.0, 3.5], 'run_at': now - 31 * day + 3600},   # ...by this run
+        {'karat': '24K', 'predictions': [4.0], 'run_at': now - 5 * day},
+        {'karat': '24K', 'predictions': [5.0], 'run_at': now - 5 * day + 3600},         # within detail: kept
+    ])
+    assert archive.compact(now) == 3
+    assert [row['predicted_price'] for row in archive.range()] == [3.0, 3.5, 4.0, 5.0]
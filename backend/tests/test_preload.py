@@ -0,0 +1,61 @@
+"""
+Pre-fork preload: only files on disk are read in the master; workers fetch and refresh
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.models import gold_predict
+from backend.models.fx_rates import FxRates
+from backend.models.gold_predict import GoldPricePredictor
+
+
+class OfflinePrices:
+    """Cached FX table only; any network-backed lookup fails the test"""
+
+    def __init__(self):
+        self.fx_rates = FxRates()
+
+    def get_usd_to_inr_rate(self):
+        raise AssertionError('FX fetched during preload')
+
+
+@pytest.fixture
+def predictor(tmp_path, monkeypatch):
+    monkeypatch.setattr(gold_predict, 'DATA_DIR', str(tmp_path))
+    predictor = GoldPricePredictor(live_price_service=OfflinePrices(), metal='silver', model_dir=str(tmp_path))
+    monkeypatch.setattr(predictor, 'fetch_gold_data', lambda days=180: pytest.fail('history fetched'))
+    return predictor
+
+
+def _history(days=80):
+    dates = pd.date_range(end='2026-03-01', periods=days, freq='D')
+    return pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Price_Per_Gram': np.linspace(1, 2, days),
+                         'USD_INR': 83.0})
+
+
+def test_metal_without_stored_history_is_left_to_the_workers(predictor):
+    assert predictor.preload() is False
+    assert predictor.history is None
+
+
+def test_stored_history_is_preloaded_without_network(predictor, tmp_path):
+    _history().to_csv(tmp_path / 'silver_historical_data.csv', index=False)
+    # No saved model: history is still kept, the worker trains on first request
+    assert predictor.preload() is False
+    assert len(predictor.stored_history()) == 80
+
+
+def test_stale_preloaded_history_is_refetched_and_kept(predictor, tmp_path, monkeypatch):
+    _history().to_csv(tmp_path / 'silver_historical_data.csv', index=False)
+    predictor.preload()
+    predictor.history_loaded_at = time.time() - predictor.history_max_age - 1
+    assert predictor.stored_history() is None
+
+    fresh = _history(90)
+    monkeypatch.setattr(predictor, 'fetch_gold_data', lambda days=180: fresh)
+    assert predictor.fetch_history() is fresh
+    assert predictor.stored_history() is fresh
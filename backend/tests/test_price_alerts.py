@@ -0,0 +1,103 @@
+"""
+Price alert engine: crossing, hysteresis re-arm, delivery and currencies
+"""
+
+import pytest
+
+from backend.models.fx_rates import FxRates
+from backend.models.price_alerts import MemorySink, PriceAlertEngine
+
+PURITIES = {'24K': 1.0, '22K': 0.916}
+
+
+@pytest.fixture
+def sink():
+    return MemorySink()
+
+
+@pytest.fixture
+def engine(tmp_path, sink):
+    return PriceAlertEngine(str(tmp_path / 'alerts.sqlite3'), sink=sink, hysteresis=0.01)
+
+
+def test_alerts_in_currencies_without_a_rate_do_not_block_others(engine, sink):
+    engine.add('u1', '24K', 'INR', 'above', 100)
+    engine.add('u2', '24K', 'EUR', 'above', 1)
+    offline = FxRates()  # Fallback table: USD and INR only
+    fired = engine.evaluate(2.0, PURITIES, offline)
+    assert [n['user_id'] for n in fired] == ['u1']
+    assert engine.evaluate(2.0, PURITIES, FxRates({'INR': 83.0, 'EUR': 0.9}))[0]['user_id'] == 'u2'
+
+
+def _ids(notifications):
+    return [n['id'] for n in notifications]
+
+
+INR = FxRates({'INR': 100.0})
+
+
+def test_above_alert_fires_once_then_rearms_past_the_band(engine):
+    alert = engine.add('u1', '24K', 'INR', 'above', 200)
+    assert _ids(engine.evaluate(2.0, PURITIES, INR)) == [alert['id']]
+    assert engine.evaluate(2.05, PURITIES, INR) == []
+    # 199 is back under the threshold but within 1% of it: still disarmed
+    assert engine.evaluate(1.99, PURITIES, INR) == []
+    assert engine.evaluate(2.0, PURITIES, INR) == []
+    assert engine.evaluate(1.97, PURITIES, INR) == []
+    assert engine.alerts('u1')[0]['armed'] == 1
+    [notification] = engine.evaluate(2.01, PURITIES, INR)
+    assert notification['price'] == 201.0
+
+
+def test_below_alert_uses_the_karat_price(engine):
+    alert = engine.add('u1', '22K', 'INR', 'below', 180)
+    assert engine.evaluate(2.0, PURITIES, INR) == []                 # 183.2
+    assert _ids(engine.evaluate(1.96, PURITIES, INR)) == [alert['id']]  # 179.54
+    assert engine.evaluate(1.98, PURITIES, INR) == []                # 181.37: inside the band
+    assert engine.evaluate(1.96, PURITIES, INR) == []
+    assert engine.evaluate(1.99, PURITIES, INR) == []                # 182.28: re-armed
+    assert _ids(engine.evaluate(1.96, PURITIES, INR)) == [alert['id']]
+
+
+def test_only_crossed_thresholds_fire(engine):
+    ids = [engine.add('u1', '24K', 'INR', 'above', threshold)['id'] for threshold in (150, 250, 200, 200)]
+    assert sorted(_ids(engine.evaluate(2.0, PURITIES, INR))) == sorted([ids[0], ids[2], ids[3]])
+
+
+def test_failed_delivery_is_retried_on_the_next_price(engine, sink, monkeypatch):
+    alert = engine.add('u1', '24K', 'INR', 'above', 200)
+    deliver = sink.deliver
+
+    def fail(notifications):
+        raise ConnectionError('webhook down')
+
+    monkeypatch.setattr(sink, 'deliver', fail)
+    assert engine.evaluate(2.0, PURITIES, INR) == []
+    monkeypatch.setattr(sink, 'deliver', deliver)
+    assert _ids(engine.evaluate(2.0, PURITIES, INR)) == [alert['id']]
+    assert _ids(sink.notifications) == [alert['id']]
+
+
+def test_workers_sharing_the_database_deliver_once(engine, sink):
+    other_sink = MemorySink()
+    other = PriceAlertEngine(engine.path, sink=other_sink, hysteresis=0.01)
+    alert = engine.add('u1', '24K', 'INR', 'above', 200)
+    # Both processes see the same price; the database claim lets one deliver
+    fired = engine.evaluate(2.0, PURITIES, INR) + other.evaluate(2.0, PURITIES, INR)
+    assert _ids(fired) == [alert['id']]
+    assert _ids(sink.notifications + other_sink.notifications) == [alert['id']]
+
+    # Both re-arm on the dip; the next crossing is again delivered once
+    assert engine.evaluate(1.9, PURITIES, INR) + other.evaluate(1.9, PURITIES, INR) == []
+    fired = other.evaluate(2.0, PURITIES, INR) + engine.evaluate(2.0, PURITIES, INR)
+    assert _ids(fired) == [alert['id']]
+    assert len(sink.notifications + other_sink.notifications) == 2
+
+
+def test_alerts_added_or_removed_elsewhere_are_picked_up(engine):
+    other = PriceAlertEngine(engine.path, sink=MemorySink(), hysteresis=0.01)
+    assert engine.evaluate(2.0, PURITIES, INR) == []
+    kept = other.add('u1', '24K', 'INR', 'above', 150)
+    removed = other.add('u2', '24K', 'INR', 'above', 190)
+    assert other.remove('u2', removed['id'])
+    assert _ids(engine.evaluate(2.0, PURITIES, INR)) == [kept['id']]
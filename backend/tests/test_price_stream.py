@@ -0,0 +1,77 @@
+"""
+Price broadcaster: event ids and listeners that hold across worker processes
+"""
+
+import pytest
+
+from backend.models.price_stream import PriceBroadcaster
+
+PURITIES = {'24K': 1.0, '22K': 0.916}
+
+
+class StubPrices:
+    """The shared live price every worker would read from the provider"""
+
+    gold_purities = PURITIES
+
+    def __init__(self):
+        self.timestamp, self.price, self.fx = 1_760_000_000, 70.0, 83.0
+
+    def get_best_live_price(self):
+        return {'source': 'GoldAPI.io', 'timestamp': self.timestamp, 'date': '2025-10-09',
+                'price_per_gram_24k': self.price}
+
+    def get_usd_to_inr_rate(self):
+        return self.fx
+
+
+@pytest.fixture
+def prices():
+    return StubPrices()
+
+
+@pytest.fixture
+def workers(prices, tmp_path):
+    return [PriceBroadcaster(prices, claim_path=str(tmp_path / 'price_event.claim')) for _ in range(2)]
+
+
+def _tick(prices, workers, seconds=60, price_step=0.5):
+    prices.timestamp += seconds
+    prices.price += price_step
+    return [worker.poll_once() for worker in workers]
+
+
+def test_workers_give_a_quote_the_same_id(prices, workers):
+    first, second = _tick(prices, workers)
+    assert first['id'] == second['id'] == prices.timestamp * 1000
+    # A rate change alone is still a new, later event
+    prices.fx = 84.0
+    event = workers[0].poll_once()
+    assert event['id'] == first['id'] + 1
+
+
+def test_reconnect_to_another_worker_resumes_after_the_same_price(prices, workers):
+    seen = _tick(prices, workers)[0]['id']
+    newer = [_tick(prices, workers)[1]['id'] for _ in range(2)]
+    resumed = workers[1]._resume_point(str(seen))
+    assert [event['id'] for event in workers[1]._pending(resumed)] == newer
+
+
+def test_unknown_ids_get_the_latest_snapshot(prices, workers):
+    for _ in range(3):
+        _tick(prices, workers)
+    worker = workers[0]
+    latest = worker.latest()['id']
+    for last_event_id in (None, 'junk', '5', str(10 ** 16)):
+        assert [event['id'] for event in worker._pending(worker._resume_point(last_event_id))] == [latest]
+
+
+def test_once_per_host_listeners_run_in_one_worker(prices, workers):
+    saved, revalued = [], []
+    for worker in workers:
+        worker.add_listener(lambda data, rate: saved.append(data['timestamp']), once_per_host=True)
+        worker.add_listener(lambda data, rate: revalued.append(data['timestamp']))
+    for _ in range(3):
+        _tick(prices, workers)
+    assert len(saved) == 3 and len(set(saved)) == 3
+    assert len(revalued) == 6
@@ -0,0 +1,65 @@
+"""
+Profiling middleware: buffered bodies are profiled whole, streams pass through
+"""
+
+import itertools
+import json
+import os
+
+import pytest
+from flask import Flask, Response
+from werkzeug.test import EnvironBuilder
+
+from backend.utils.profiling import ProfilingMiddleware
+
+
+@pytest.fixture
+def middleware(tmp_path):
+    app = Flask(__name__)
+
+    @app.route('/prices')
+    def prices():
+        return {'price': 1}
+
+    @app.route('/stream')
+    def stream():
+        # Never ends, like /api/stream/prices
+        return Response((f"data: {n}\n\n" for n in itertools.count()), mimetype='text/event-stream')
+
+    return ProfilingMiddleware(app.wsgi_app, 'secret', str(tmp_path))
+
+
+def _call(middleware, path, query=None, headers=None):
+    headers = {'X-Profile': 'secret'} if headers is None else headers
+    environ = EnvironBuilder(path=path, query_string=query, headers=headers).get_environ()
+    statuses = []
+    body = middleware(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    return statuses, body
+
+
+def test_buffered_response_is_profiled_whole(middleware):
+    statuses, body = _call(middleware, '/prices')
+    assert statuses == ['200 OK']
+    assert b'"price"' in b''.join(body)
+    [capture] = middleware.list_captures()
+    assert middleware.load_capture(capture['name'])['streamed'] is False
+
+
+def test_event_stream_is_passed_through_undrained(middleware):
+    statuses, body = _call(middleware, '/stream')
+    assert statuses == ['200 OK']
+    assert list(itertools.islice(body, 2)) == [b'data: 0\n\n', b'data: 1\n\n']
+    body.close()
+    [capture] = middleware.list_captures()
+    assert middleware.load_capture(capture['name'])['streamed'] is True
+    assert len(os.listdir(middleware.capture_dir)) == 2
+
+
+def test_token_in_the_query_is_not_saved(middleware):
+    statuses, body = _call(middleware, '/prices', query='metal=gold&__profile=secret&__profile_memory=1', headers={})
+    assert statuses == ['200 OK']
+    [capture] = middleware.list_captures()
+    saved = middleware.load_capture(capture['name'])
+    assert saved['query'] == 'metal=gold'
+    assert saved['top_allocations']
+    assert 'secret' not in json.dumps(saved)
@@ -0,0 +1,58 @@
+"""
+Intraday tick buffer: one persisted ring shared by every worker process
+"""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from backend.models.tick_buffer import TickBuffer
+
+pytest.importorskip('fcntl')
+fork = multiprocessing.get_context('fork')
+
+
+def _write(path, worker, count, buffer=None):
+    if buffer is None:
+        buffer = TickBuffer(capacity=10000, path=path)
+    for i in range(count):
+        buffer.append(worker * 10000 + i, 'GoldAPI.io', 70.0, 83.0)
+    buffer.flush()
+
+
+def _run(processes):
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+
+
+def test_workers_opening_the_file_share_one_ring(tmp_path):
+    path = str(tmp_path / 'ticks.npy')
+    _run([fork.Process(target=_write, args=(path, worker, 2000)) for worker in range(4)])
+    buffer = TickBuffer(capacity=10000, path=path)
+    assert len(buffer) == 8000
+    expected = [worker * 10000 + i for worker in range(4) for i in range(2000)]
+    np.testing.assert_array_equal(buffer.snapshot()['timestamp'], expected)
+
+
+def test_buffer_opened_before_fork_is_shared_by_the_workers(tmp_path):
+    path = str(tmp_path / 'ticks.npy')
+    buffer = TickBuffer(capacity=5000, path=path)
+    _run([fork.Process(target=_write, args=(path, worker, 2000, buffer)) for worker in range(3)])
+    # 6000 ticks through a 5000-slot ring: the oldest 1000 were overwritten, none lost to a race
+    assert len(buffer) == 5000
+    assert len(np.unique(buffer.snapshot()['timestamp'])) == 5000
+
+
+def test_ohlc_buckets():
+    buffer = TickBuffer(capacity=10)
+    for timestamp, price in [(0, 1.0), (100, 3.0), (200, 2.0), (300, 4.0)]:
+        buffer.append(timestamp, 'Other', price)
+    candles = buffer.ohlc('5m')
+    np.testing.assert_array_equal(candles['time'], [0, 300])
+    np.testing.assert_array_equal(candles['high'], [3.0, 4.0])
+    np.testing.assert_array_equal(candles['close'], [2.0, 4.0])
+    np.testing.assert_array_equal(candles['count'], [3, 1])
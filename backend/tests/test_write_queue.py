@@ -0,0 +1,163 @@
+"""
+Write-behind queue: spooling, replay and load shedding without a database
+"""
+
+import os
+import json
+import time
+
+import pytest
+
+import supabase_client
+from supabase_client import WriteBehindQueue
+
+
+class FakeSupabase:
+    """Records inserted rows; fails every insert while `down` is set"""
+
+    def __init__(self):
+        self.rows = {}
+        self.down = False
+        self._table = None
+
+    def table(self, name):
+        self._table = name
+        return self
+
+    def insert(self, rows):
+        self._pending = (self._table, list(rows))
+        return self
+
+    def execute(self):
+        if self.down:
+            raise ConnectionError('Supabase unreachable')
+        table, rows = self._pending
+        self.rows.setdefault(table, []).extend(rows)
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    client = FakeSupabase()
+    monkeypatch.setattr(supabase_client, 'get_supabase_client', lambda use_service_role=False: client)
+    return client
+
+
+def _queue(tmp_path, **kwargs):
+    return WriteBehindQueue(batch_size=2, flush_interval=60, spool_dir=str(tmp_path), **kwargs)
+
+
+def _spool_files(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if name.endswith('.jsonl'))
+
+
+def test_rows_spilled_while_down_are_replayed_once(tmp_path, supabase):
+    queue = _queue(tmp_path)
+    supabase.down = True
+    queue._buffers = {'gold_price': [{'n': i} for i in range(5)]}
+    queue.flush()
+    assert supabase.rows == {}
+    assert len(_spool_files(tmp_path)) == 1
+
+    supabase.down = False
+    queue.flush()
+    assert supabase.rows['gold_price'] == [{'n': i} for i in range(5)]
+    assert _spool_files(tmp_path) == []
+    queue.flush()
+    assert len(supabase.rows['gold_price']) == 5
+
+
+def test_partial_replay_keeps_only_unwritten_rows(tmp_path, supabase, monkeypatch):
+    queue = _queue(tmp_path)
+    queue._spill('gold_price', [{'n': i} for i in range(4)])
+    calls = []
+    execute = FakeSupabase.execute
+
+    def fail_second_chunk(self):
+        calls.append(1)
+        if len(calls) == 2:
+            raise ConnectionError('dropped')
+        execute(self)
+
+    monkeypatch.setattr(FakeSupabase, 'execute', fail_second_chunk)
+    queue._replay_spool(supabase)
+    assert supabase.rows['gold_price'] == [{'n': 0}, {'n': 1}]
+    [name] = _spool_files(tmp_path)
+    with open(tmp_path / name) as f:
+        assert [json.loads(line) for line in f] == [{'n': 2}, {'n': 3}]
+
+
+def test_replay_ignores_files_still_being_written(tmp_path, supabase):
+    queue = _queue(tmp_path)
+    (tmp_path / '.gold_price.abc.jsonl.tmp').write_text('{"n": 1}\n{"n"')
+    queue._replay_spool(supabase)
+    assert supabase.rows == {}
+    assert (tmp_path / '.gold_price.abc.jsonl.tmp').exists()
+
+
+def test_malformed_file_is_quarantined_and_replay_continues(tmp_path, supabase):
+    queue = _queue(tmp_path)
+    (tmp_path / 'gold_price.0bad.jsonl').write_text('{"n": 1}\n{"n": ')
+    queue._spill('gold_price', [{'n': 2}])
+    queue._replay_spool(supabase)
+    assert supabase.rows['gold_price'] == [{'n': 2}]
+    assert _spool_files(tmp_path) == []
+    [quarantined] = os.listdir(tmp_path / 'quarantine')
+    assert quarantined.startswith('gold_price.0bad.jsonl')
+
+    # Later flushes are no longer blocked by it
+    queue._spill('gold_price', [{'n': 3}])
+    queue._replay_spool(supabase)
+    assert supabase.rows['gold_price'] == [{'n': 2}, {'n': 3}]
+
+
+def test_each_spool_file_is_claimed_by_one_worker(tmp_path, supabase):
+    first, second = _queue(tmp_path), _queue(tmp_path)
+    first._spill('gold_price', [{'n': 1}])
+    [name] = _spool_files(tmp_path)
+    assert first._claim(name) is not None
+    assert second._claim(name) is None
+    second._replay_spool(supabase)
+    assert supabase.rows == {}
+
+
+def test_claims_of_a_dead_worker_are_taken_over(tmp_path, supabase):
+    queue = _queue(tmp_path, claim_timeout=60)
+    queue._spill('gold_price', [{'n': 1}])
+    [name] = _spool_files(tmp_path)
+    claimed = queue._claim(name)
+    queue._replay_spool(supabase)
+    assert supabase.rows == {}
+
+    stale = time.time() - 120
+    os.utime(claimed, (stale, stale))
+    queue._replay_spool(supabase)
+    assert supabase.rows['gold_price'] == [{'n': 1}]
+    assert os.listdir(tmp_path) == []
+
+
+def test_rows_are_dropped_without_a_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(supabase_client, 'get_supabase_client', lambda use_service_role=False: None)
+    queue = _queue(tmp_path)
+    queue._buffers = {'gold_price': [{'n': 1}]}
+    queue._pending = 1
+    queue.flush()
+    assert os.listdir(tmp_path) == []
+    assert queue._pending == 0
+
+
+def test_spool_size_is_capped(tmp_path, supabase):
+    queue = _queue(tmp_path, max_spool_bytes=100)
+    queue._spill('gold_price', [{'n': 'x' * 200}])
+    queue._spill('gold_price', [{'n': 'dropped'}])
+    assert len(_spool_files(tmp_path)) == 1
+
+
+def test_enqueue_overflow_spills_without_holding_the_lock(tmp_path, supabase, monkeypatch):
+    queue = _queue(tmp_path, max_pending=1)
+    monkeypatch.setattr(queue, '_ensure_started', lambda: None)
+    held = []
+    spill = queue._spill
+    monkeypatch.setattr(queue, '_spill', lambda table, rows: (held.append(queue._cond._is_owned()), spill(table, rows)))
+    queue.enqueue('gold_price', [{'n': 1}, {'n': 2}])
+    assert held == [False]
+    assert len(_spool_files(tmp_path)) == 1
@@ -0,0 +1,63 @@
+"""
+Request-scoped deadlines shared by every downstream fetch
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+
+# Timeout for upstream calls made outside any deadline (background threads, scripts)
+DEFAULT_TIMEOUT = 10.0
+# Never hand a client a timeout so small it cannot even connect
+MIN_TIMEOUT = 0.2
+
+_deadline: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Run the block with a time budget; nested budgets can only shorten the outer one"""
+    expires = time.monotonic() + seconds
+    outer = _deadline.get()
+    if outer is not None:
+        expires = min(expires, outer)
+    token = _deadline.set(expires)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def with_deadline(seconds: float) -> Callable:
+    """Decorator that runs a route under `deadline(seconds)`"""
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated(*args: Any, **kwargs: Any) -> Any:
+            with deadline(seconds):
+                return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when no deadline is set"""
+    expires = _deadline.get()
+    if expires is None:
+        return None
+    return max(0.0, expires - time.monotonic())
+
+
+def expired() -> bool:
+    """True once the current budget is used up"""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def request_timeout(default: float = DEFAULT_TIMEOUT) -> float:
+    """Timeout for one upstream call: the default, capped by the remaining budget"""
+    left = remaining()
+    if left is None:
+        return default
+    return max(MIN_TIMEOUT, min(default, left))
@@ -0,0 +1,84 @@
+"""
+Streaming encoders for bulk exports: CSV or NDJSON chunks, optionally gzipped
+"""
+
+import io
+import csv
+import json
+import zlib
+import base64
+import binascii
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:
+    from .serialization import dumps
+except ImportError:
+    from utils.serialization import dumps
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Encoded bytes gathered before a chunk is handed to the server
+CHUNK_BYTES = 64 * 1024
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Opaque pagination cursor for the last row key of a page"""
+    return base64.urlsafe_b64encode(json.dumps(list(key), separators=(',', ':')).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], length: int) -> Optional[List[Any]]:
+    """Row key from a cursor made by encode_cursor; ValueError if it is malformed"""
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, list) or len(key) != length:
+        raise ValueError('Invalid cursor')
+    return key
+
+
+def stream_rows(rows: Iterable[Dict[str, Any]], columns: Sequence[str], fmt: str = 'csv',
+                compress: bool = False) -> Iterator[bytes]:
+    """
+    Encode row dicts lazily as CSV (with a header line) or NDJSON, yielding
+    chunks of about CHUNK_BYTES. With `compress`, the chunks form one gzip
+    stream. Memory stays bounded by the chunk size, not the row count.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encoded() -> Iterator[bytes]:
+        if fmt == 'ndjson':
+            buffer = bytearray()
+            for row in rows:
+                buffer += dumps({name: row[name] for name in columns})
+                buffer += b'\n'
+                if len(buffer) >= CHUNK_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+            yield bytes(buffer)
+            return
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator='\n')
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([row[name] for name in columns])
+            if text.tell() >= CHUNK_BYTES:
+                yield text.getvalue().encode('utf-8')
+                text.seek(0)
+                text.truncate()
+        yield text.getvalue().encode('utf-8')
+
+    for chunk in encoded():
+        if gzip is not None:
+            chunk = gzip.compress(chunk)
+        if chunk:
+            yield chunk
+    if gzip is not None:
+        yield gzip.flush()
@@ -0,0 +1,24 @@
+"""
+Helpers for objects created before a pre-fork server forks its workers
+"""
+
+import os
+import threading
+import weakref
+from typing import Any
+
+
+def reset_after_fork(obj: Any, attr: str = '_local') -> None:
+    """
+    Give `obj` a fresh threading.local in every forked child, so a worker
+    opens its own SQLite connection instead of reusing the parent's
+    """
+    ref = weakref.ref(obj)
+
+    def reset() -> None:
+        target = ref()
+        if target is not None:
+            setattr(target, attr, threading.local())
+
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=reset)
@@ -2,9 +2,18 @@
 Helper utilities for the Gold Price Predictor application
 """
 
+import logging
 from functools import wraps
 from typing import Callable, Any
 from flask import jsonify
+from flask_login import current_user
+
+try:
+    from .metrics import metrics
+except ImportError:
+    from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 def handle_errors(f: Callable) -> Callable:
     """
@@ -21,10 +30,25 @@ def handle_errors(f: Callable) -> Callable:
         try:
             return f(*args, **kwargs)
         except Exception as e:
-            print(f"Error in {f.__name__}: {str(e)}")
+            logger.exception(f"Error in {f.__name__}: {str(e)}")
+            metrics.inc('api_errors_total', endpoint=f.__name__)
             return jsonify({
                 'success': False,
                 'error': 'Internal server error',
                 'details': str(e)
             }), 500
     return decorated
+
+def api_login_required(f: Callable) -> Callable:
+    """
+    Decorator for API routes that act on the logged-in user's own data.
+
+    Unlike flask_login.login_required, which redirects to the login page,
+    anonymous requests get a 401 JSON error.
+    """
+    @wraps(f)
+    def decorated(*args: Any, **kwargs: Any) -> Any:
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'error': 'Login required'}), 401
+        return f(*args, **kwargs)
+    return decorated
@@ -0,0 +1,203 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition
+"""
+
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+# Latency buckets in seconds, from fast cache hits up to model training
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: LabelKey, extra: str = '') -> str:
+    parts = ['%s="%s"' % (k, _escape(v)) for k, v in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms keyed by name and labels.
+
+    Recording is a dict lookup and a few additions under one lock, so it is
+    cheap enough to wrap every provider call and request.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        """Attach HELP text to a metric"""
+        self._help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increment a counter"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge"""
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one observation in a histogram"""
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = _Histogram(len(self.buckets) + 1)
+            hist.counts[index] += 1
+            hist.total += value
+            hist.count += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """Context manager that records elapsed seconds in a histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels: Any) -> Callable:
+        """Decorator form of `timer`"""
+        def decorator(f: Callable) -> Callable:
+            @wraps(f)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.timer(name, **labels):
+                    return f(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def value(self, name: str, **labels: Any) -> float:
+        """Current value of a counter or gauge (0 if never set)"""
+        key = _label_key(labels)
+        with self._lock:
+            if name in self._gauges:
+                return self._gauges[name].get(key, 0)
+            return self._counters.get(name, {}).get(key, 0)
+
+    def histogram(self, name: str, **labels: Any) -> Dict[str, float]:
+        """Count and sum of a histogram series (zeros if never observed)"""
+        key = _label_key(labels)
+        with self._lock:
+            hist = self._histograms.get(name, {}).get(key)
+            if hist is None:
+                return {'count': 0, 'sum': 0.0}
+            return {'count': hist.count, 'sum': hist.total}
+
+    def reset(self) -> None:
+        """Drop all recorded values"""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Render everything in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, store in (('counter', self._counters), ('gauge', self._gauges)):
+                for name in sorted(store):
+                    self._header(lines, name, kind)
+                    for key, value in store[name].items():
+                        lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name in sorted(self._histograms):
+                self._header(lines, name, 'histogram')
+                for key, hist in self._histograms[name].items():
+                    cumulative = 0
+                    for bound, count in zip(self.buckets, hist.counts):
+                        cumulative += count
+                        le = 'le="%s"' % bound
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                    inf = 'le="+Inf"'
+                    lines.append(f"{name}_bucket{_format_labels(key, inf)} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.total}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines: list, name: str, kind: str) -> None:
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+metrics.describe('http_request_duration_seconds', 'Flask request latency by endpoint')
+metrics.describe('api_errors_total', 'Unhandled errors caught by API routes')
+metrics.describe('provider_request_seconds', 'Live price provider call latency')
+metrics.describe('provider_failures_total', 'Live price provider calls that returned no price')
+metrics.describe('provider_circuit_open', 'Whether a provider circuit breaker is open (1) or not (0)')
+metrics.describe('provider_quota_skips_total', 'Provider calls skipped because the host-wide quota was exhausted')
+metrics.describe('cache_requests_total', 'Price and FX cache lookups by result')
+metrics.describe('fetch_gold_data_seconds', 'Historical data fetch latency')
+metrics.describe('train_model_seconds', 'Training time per model candidate')
+metrics.describe('predict_next_days_seconds', 'Forecast generation latency')
+metrics.describe('predict_intervals_seconds', 'Monte Carlo prediction interval latency')
+metrics.describe('supabase_write_seconds', 'Bulk insert latency per table')
+metrics.describe('supabase_rows_written_total', 'Rows inserted into Supabase per table')
+metrics.describe('supabase_rows_dropped_total', 'Rows dropped because the write spool was full')
+
+
+def instrument_app(app: Any) -> None:
+    """Time every request and expose /metrics on a Flask app"""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_timer() -> None:
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response: Any) -> Any:
+        start = getattr(g, '_metrics_start', None)
+        if start is not None:
+            metrics.observe(
+                'http_request_duration_seconds',
+                time.perf_counter() - start,
+                endpoint=request.endpoint or 'unmatched',
+                method=request.method,
+                status=response.status_code
+            )
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics() -> Any:
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,224 @@
+"""
+On-demand per-request profiling with cProfile and tracemalloc
+"""
+
+import io
+import os
+import hmac
+import json
+import time
+import pstats
+import cProfile
+import logging
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, parse_qs, urlencode
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_MEMORY_HEADER = 'HTTP_X_PROFILE_MEMORY'
+PROFILE_QUERY_PARAM = '__profile'
+PROFILE_MEMORY_QUERY_PARAM = '__profile_memory'
+
+
+def _public_query(query: str) -> str:
+    """The query string without the profiling parameters, so the token is never saved"""
+    params = parse_qsl(query, keep_blank_values=True)
+    return urlencode([(k, v) for k, v in params if k not in (PROFILE_QUERY_PARAM, PROFILE_MEMORY_QUERY_PARAM)])
+
+
+class ProfilingMiddleware:
+    """
+    WSGI middleware that profiles a request only when asked to.
+
+    A request is profiled when it carries the configured token in the
+    `X-Profile` header or the `__profile` query parameter. Add
+    `X-Profile-Memory: 1` (or `__profile_memory=1`) to also trace
+    allocations. Every other request goes straight through to the app.
+    Event streams and other bodies without a Content-Length are passed
+    through undrained, so only the view that produced them is profiled.
+    Captures are written to `capture_dir`, keeping the newest `max_captures`.
+    """
+
+    def __init__(self, wsgi_app: Callable, token: str, capture_dir: str, max_captures: int = 20) -> None:
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.capture_dir = capture_dir
+        self.max_captures = max_captures
+
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Iterable[bytes]:
+        requested = environ.get(PROFILE_HEADER)
+        query = environ.get('QUERY_STRING', '')
+        if requested is None and PROFILE_QUERY_PARAM not in query:
+            return self.wsgi_app(environ, start_response)
+
+        params = parse_qs(query)
+        if requested is None:
+            requested = params.get(PROFILE_QUERY_PARAM, [''])[0]
+        if not hmac.compare_digest(requested.encode(), self.token.encode()):
+            return self.wsgi_app(environ, start_response)
+
+        trace_memory = (environ.get(PROFILE_MEMORY_HEADER) == '1'
+                        or params.get(PROFILE_MEMORY_QUERY_PARAM, [''])[0] == '1')
+        return self._profile(environ, start_response, trace_memory)
+
+    def _profile(self, environ: Dict[str, Any], start_response: Callable, trace_memory: bool) -> Iterable[bytes]:
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(25)
+
+        headers: List[Tuple[str, str]] = []
+
+        def capture_start_response(status: str, response_headers: List[Tuple[str, str]], exc_info: Any = None) -> Any:
+            headers.extend(response_headers)
+            return start_response(status, response_headers, exc_info)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        streamed = False
+        profiler.enable()
+        try:
+            app_iter = self.wsgi_app(environ, capture_start_response)
+            if self._streaming(headers):
+                # An event stream may never end: profile the view, pass the body through untouched
+                streamed = True
+                body = app_iter
+            else:
+                try:
+                    # Drain the body so streamed work is included in the profile
+                    body = list(app_iter)
+                finally:
+                    if hasattr(app_iter, 'close'):
+                        app_iter.close()
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot() if trace_memory else None
+            if started_tracing:
+                tracemalloc.stop()
+            try:
+                self._save(environ, profiler, elapsed, snapshot, streamed)
+            except Exception as e:
+                logger.error(f"Could not save profile capture: {e}")
+        return body
+
+    @staticmethod
+    def _streaming(headers: List[Tuple[str, str]]) -> bool:
+        """Server-sent events, or a body of unknown length (a generator or passed-through file)"""
+        values = {name.lower(): value for name, value in headers}
+        return values.get('content-type', '').startswith('text/event-stream') or 'content-length' not in values
+
+    def _save(self, environ: Dict[str, Any], profiler: cProfile.Profile, elapsed: float,
+              snapshot: Optional[tracemalloc.Snapshot], streamed: bool = False) -> None:
+        os.makedirs(self.capture_dir, exist_ok=True)
+        path = environ.get('PATH_INFO', '/')
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}{path.replace('/', '_')}"
+
+        profiler.dump_stats(os.path.join(self.capture_dir, f"{name}.prof"))
+
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(30)
+        allocations = []
+        if snapshot is not None:
+            for stat in snapshot.statistics('lineno')[:20]:
+                frame = stat.traceback[0]
+                allocations.append({
+                    'site': f"{frame.filename}:{frame.lineno}",
+                    'size_kb': round(stat.size / 1024, 1),
+                    'count': stat.count
+                })
+
+        summary = {
+            'name': name,
+            'method': environ.get('REQUEST_METHOD'),
+            'path': path,
+            'query': _public_query(environ.get('QUERY_STRING', '')),
+            'elapsed_ms': round(elapsed * 1000, 2),
+            # Streamed bodies are not drained: the capture covers the view only
+            'streamed': streamed,
+            'captured_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'top_functions': text.getvalue(),
+            'top_allocations': allocations
+        }
+        with open(os.path.join(self.capture_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Saved profile capture {name} ({summary['elapsed_ms']} ms)")
+        self._prune()
+
+    def _prune(self) -> None:
+        summaries = sorted(f for f in os.listdir(self.capture_dir) if f.endswith('.json'))
+        for old in summaries[:-self.max_captures]:
+            stem = old[:-len('.json')]
+            for suffix in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.capture_dir, stem + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list_captures(self) -> List[Dict[str, Any]]:
+        """Summaries of saved captures, newest first"""
+        if not os.path.isdir(self.capture_dir):
+            return []
+        captures = []
+        for fname in sorted(os.listdir(self.capture_dir), reverse=True):
+            if not fname.endswith('.json'):
+                continue
+            with open(os.path.join(self.capture_dir, fname), encoding='utf-8') as f:
+                summary = json.load(f)
+            captures.append({k: summary[k] for k in ('name', 'method', 'path', 'elapsed_ms', 'captured_at')})
+        return captures
+
+    def load_capture(self, name: str) -> Optional[Dict[str, Any]]:
+        """Full summary of one capture, or None if it does not exist"""
+        if os.path.basename(name) != name:
+            return None
+        path = os.path.join(self.capture_dir, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+
+def init_profiling(app: Any) -> Optional[ProfilingMiddleware]:
+    """
+    Install the profiling middleware and viewer routes when PROFILE_TOKEN is set.
+
+    Without a token nothing is installed, so normal requests pay nothing.
+    """
+    token = app.config.get('PROFILE_TOKEN')
+    if not token:
+        return None
+
+    from flask import abort, jsonify, request
+
+    middleware = ProfilingMiddleware(
+        app.wsgi_app,
+        token,
+        app.config.get('PROFILE_DIR'),
+        app.config.get('PROFILE_MAX_CAPTURES', 20)
+    )
+    app.wsgi_app = middleware
+
+    def _authorized() -> bool:
+        # Not X-Profile, so browsing captures does not itself get profiled
+        supplied = request.headers.get('X-Profile-Token') or request.args.get('token', '')
+        return hmac.compare_digest(supplied.encode(), token.encode())
+
+    @app.route('/debug/profiles')
+    def list_profiles() -> Any:
+        if not _authorized():
+            abort(404)
+        return jsonify({'captures': middleware.list_captures()})
+
+    @app.route('/debug/profiles/<name>')
+    def show_profile(name: str) -> Any:
+        if not _authorized():
+            abort(404)
+        capture = middleware.load_capture(name)
+        if capture is None:
+            abort(404)
+        return jsonify(capture)
+
+    logger.info(f"Request profiling enabled, captures in {middleware.capture_dir}")
+    return middleware
@@ -0,0 +1,159 @@
+"""
+Host-wide token-bucket quotas for rate-limited upstream APIs
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .fork_safety import reset_after_fork
+except ImportError:
+    from fork_safety import reset_after_fork
+
+logger = logging.getLogger(__name__)
+
+DAY = 86400
+MONTH = 30 * DAY
+
+# (capacity, period in seconds) per provider; each limit is its own bucket
+DEFAULT_LIMITS: Dict[str, List[Tuple[int, int]]] = {
+    'alphavantage': [(5, 60), (25, DAY)],
+    'goldapi': [(50, MONTH)],
+    'metals_api': [(100, MONTH)],
+}
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'quota.sqlite3')
+
+
+def _key_id(api_key: str) -> str:
+    """Short stable identifier for an API key, so secrets are not written to disk"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+class QuotaManager:
+    """
+    Token buckets per provider and API key, shared by every process on the host.
+
+    Bucket state lives in a small SQLite file and each acquire runs in an
+    immediate transaction, so worker processes see one budget. Buckets
+    refill continuously at capacity / period. Providers without configured
+    limits are always allowed.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, limits: Optional[Dict[str, List[Tuple[int, int]]]] = None) -> None:
+        self.path = path
+        self.limits = limits if limits is not None else DEFAULT_LIMITS
+        self._local = threading.local()
+        reset_after_fork(self)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _buckets(self, provider: str, api_key: str) -> List[Tuple[str, int, int]]:
+        key = _key_id(api_key)
+        return [(f"{provider}:{key}:{period}", capacity, period) for capacity, period in self.limits.get(provider, [])]
+
+    @staticmethod
+    def _refill(row: Optional[Tuple[float, float]], capacity: int, period: int, now: float) -> float:
+        if row is None:
+            return float(capacity)
+        tokens, updated = row
+        return min(float(capacity), tokens + (now - updated) * capacity / period)
+
+    def try_acquire(self, provider: str, api_key: Optional[str], cost: float = 1.0) -> bool:
+        """Take `cost` tokens from every bucket of the provider, or none if any is short"""
+        if not api_key or provider not in self.limits:
+            return True
+        buckets = self._buckets(provider, api_key)
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            now = time.time()
+            levels = []
+            for bucket, capacity, period in buckets:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE bucket = ?", (bucket,)).fetchone()
+                levels.append((bucket, self._refill(row, capacity, period, now)))
+            allowed = all(tokens >= cost for _, tokens in levels)
+            for bucket, tokens in levels:
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (bucket, tokens, updated) VALUES (?, ?, ?)",
+                    (bucket, tokens - cost if allowed else tokens, now)
+                )
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            # Never block upstream calls because the quota store is unavailable
+            logger.warning(f"Quota store error for {provider}: {e}")
+            return True
+        if not allowed:
+            logger.warning(f"{provider} quota exhausted, skipping call")
+        return allowed
+
+    def exhaust(self, provider: str, api_key: Optional[str]) -> None:
+        """Empty the provider's buckets after the API itself reports a quota error"""
+        if not api_key or provider not in self.limits:
+            return
+        try:
+            conn = self._connect()
+            now = time.time()
+            for bucket, _, _ in self._buckets(provider, api_key):
+                conn.execute(
+                    "INSERT OR REPLACE INTO buckets (bucket, tokens, updated) VALUES (?, 0, ?)",
+                    (bucket, now)
+                )
+            logger.warning(f"{provider} reported its quota as exhausted")
+        except sqlite3.Error as e:
+            logger.warning(f"Quota store error for {provider}: {e}")
+
+    def remaining(self, provider: str, api_key: Optional[str]) -> List[Dict[str, float]]:
+        """Remaining budget per limit window for one provider and key"""
+        if not api_key:
+            return []
+        now = time.time()
+        conn = self._connect()
+        report = []
+        for bucket, capacity, period in self._buckets(provider, api_key):
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE bucket = ?", (bucket,)).fetchone()
+            tokens = self._refill(row, capacity, period, now)
+            report.append({
+                'limit': capacity,
+                'period_seconds': period,
+                'remaining': round(tokens, 2),
+                'seconds_until_next': 0 if tokens >= 1 else round((1 - tokens) * period / capacity, 1)
+            })
+        return report
+
+
+_default_manager = None
+_default_lock = threading.Lock()
+
+
+def get_quota_manager() -> QuotaManager:
+    """Process-wide QuotaManager; QUOTA_DB_PATH and QUOTA_LIMITS (JSON) override the defaults"""
+    global _default_manager
+    if _default_manager is None:
+        with _default_lock:
+            if _default_manager is None:
+                limits = None
+                if os.getenv('QUOTA_LIMITS'):
+                    limits = {k: [tuple(v) for v in vs] for k, vs in json.loads(os.getenv('QUOTA_LIMITS')).items()}
+                _default_manager = QuotaManager(os.getenv('QUOTA_DB_PATH', DEFAULT_DB_PATH), limits)
+    return _default_manager
@@ -0,0 +1,95 @@
+"""
+Response encoders for data-heavy endpoints: fast JSON and columnar binary
+"""
+
+import io
+import json
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+from flask import Request, Response
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the standard library encoder
+    orjson = None
+
+try:
+    import pyarrow
+except ImportError:  # Optional: the Arrow format is offered only when installed
+    pyarrow = None
+
+MIMETYPES = {
+    'json': 'application/json',
+    'npz': 'application/x-npz',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+class NotAcceptable(ValueError):
+    """The client asked for a format this server cannot produce"""
+
+
+def negotiate(request: Request) -> str:
+    """
+    Response format from the `format` query param (json, npz, arrow) or the
+    Accept header; JSON unless a binary format is explicitly preferred
+    """
+    requested = request.args.get('format')
+    if requested is None:
+        offered = [MIMETYPES['json'], MIMETYPES['npz']] + ([MIMETYPES['arrow']] if pyarrow else [])
+        best = request.accept_mimetypes.best_match(offered, default=MIMETYPES['json'])
+        return next(name for name, mimetype in MIMETYPES.items() if mimetype == best)
+    requested = requested.strip().lower()
+    if requested not in MIMETYPES:
+        raise NotAcceptable(f"Unknown format '{requested}'. Use one of: {', '.join(MIMETYPES)}")
+    if requested == 'arrow' and pyarrow is None:
+        raise NotAcceptable("Arrow format is not available on this server (pyarrow not installed)")
+    return requested
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON bytes; NumPy arrays and scalars are encoded natively with orjson"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_to_builtin, separators=(',', ':')).encode('utf-8')
+
+
+def _to_builtin(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    return Response(dumps(payload), status=status, mimetype=MIMETYPES['json'])
+
+
+def records(columns: Mapping[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Row dicts from equal-length column arrays (for the row-oriented JSON contract)"""
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(np.asarray(c).tolist() for c in columns.values()))]
+
+
+def encode_columns(fmt: str, columns: Mapping[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Columnar binary body straight from the arrays, no per-row objects.
+    npz: one array per column plus `meta` (a JSON string), read with
+    np.load(...). arrow: an IPC stream with `meta` in the schema metadata.
+    """
+    meta_json = dumps(meta or {}).decode('utf-8')
+    if fmt == 'npz':
+        buffer = io.BytesIO()
+        np.savez(buffer, meta=np.array(meta_json), **{name: np.asarray(c) for name, c in columns.items()})
+        return buffer.getvalue()
+    if fmt == 'arrow':
+        table = pyarrow.table({name: np.asarray(c) for name, c in columns.items()}).replace_schema_metadata({'meta': meta_json})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise NotAcceptable(f"Unknown columnar format '{fmt}'")
+
+
+def columnar_response(fmt: str, columns: Mapping[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> Response:
+    return Response(encode_columns(fmt, columns, meta), mimetype=MIMETYPES[fmt])
@@ -1,8 +1,15 @@
 import os
+import json
+import uuid
+import atexit
 import logging
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import timedelta, datetime
 import bcrypt
 from dotenv import load_dotenv
+from backend.utils.metrics import metrics
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -31,29 +38,358 @@ if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     logger.info("Please set SUPABASE_URL and SUPABASE_ANON_KEY in your .env file")
     SUPABASE_AVAILABLE = False
 
+# Write-behind queue settings
+WRITE_BATCH_SIZE = int(os.getenv('SUPABASE_WRITE_BATCH_SIZE', '50'))
+WRITE_FLUSH_INTERVAL = float(os.getenv('SUPABASE_WRITE_FLUSH_INTERVAL', '5'))
+WRITE_MAX_PENDING = int(os.getenv('SUPABASE_WRITE_MAX_PENDING', '5000'))
+WRITE_SPOOL_DIR = os.getenv(
+    'SUPABASE_WRITE_SPOOL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend', 'data', 'spool')
+)
+WRITE_SPOOL_MAX_BYTES = int(os.getenv('SUPABASE_WRITE_SPOOL_MAX_BYTES', str(50 * 1024 * 1024)))
+# Claimed spool files untouched this long belong to a worker that died mid-replay
+WRITE_SPOOL_CLAIM_TIMEOUT = float(os.getenv('SUPABASE_WRITE_SPOOL_CLAIM_TIMEOUT', '600'))
+
+# Auth settings
+AUTH_BCRYPT_WORKERS = int(os.getenv('AUTH_BCRYPT_WORKERS', '4'))
+AUTH_BCRYPT_MAX_QUEUED = int(os.getenv('AUTH_BCRYPT_MAX_QUEUED', '64'))
+AUTH_BCRYPT_TIMEOUT = float(os.getenv('AUTH_BCRYPT_TIMEOUT', '10'))
+AUTH_USER_CACHE_TTL = float(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+AUTH_NEGATIVE_CACHE_TTL = float(os.getenv('AUTH_NEGATIVE_CACHE_TTL', '10'))
+USER_COLUMNS = "id, email, password_hash, created_at"
+
 # For now, use a simple in-memory storage as fallback
 users_db = {}
 
+# Long-lived Supabase clients, one per key role
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Dedicated pool for bcrypt work; the semaphore bounds how many jobs may queue
+_bcrypt_pool = ThreadPoolExecutor(max_workers=AUTH_BCRYPT_WORKERS, thread_name_prefix='bcrypt')
+_bcrypt_slots = threading.BoundedSemaphore(AUTH_BCRYPT_WORKERS + AUTH_BCRYPT_MAX_QUEUED)
+
+
+class AuthBusyError(Exception):
+    """Raised when the bcrypt pool is saturated"""
+
+
+def _run_bcrypt(func, *args):
+    """Run a bcrypt call on the dedicated pool, rejecting work beyond the queue bound"""
+    slots = _bcrypt_slots
+    if not slots.acquire(blocking=False):
+        raise AuthBusyError("Too many login attempts in progress, please retry")
+    try:
+        future = _bcrypt_pool.submit(func, *args)
+    except Exception:
+        slots.release()
+        raise
+    # The slot is freed when the job ends, not when we stop waiting for it
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=AUTH_BCRYPT_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()  # Drop it if it has not started yet
+        raise AuthBusyError("Login is taking too long, please retry")
+
+def _hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+def _check_password(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
 def hash_password(password):
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return _run_bcrypt(_hash_password, password)
 
 def check_password(password, hashed):
     """Check password against hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return _run_bcrypt(_check_password, password, hashed)
+
+
+class UserCache:
+    """
+    Short-TTL cache of user records keyed by email.
+
+    Unknown emails are cached as `None` for a shorter TTL so repeated
+    attempts against missing accounts do not hit Supabase each time.
+    """
+
+    def __init__(self, ttl=AUTH_USER_CACHE_TTL, negative_ttl=AUTH_NEGATIVE_CACHE_TTL):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, email):
+        """Return (hit, record); record is None for a cached unknown email"""
+        entry = self._entries.get(email)
+        if entry is None:
+            return False, None
+        expires, record = entry
+        if time.monotonic() >= expires:
+            with self._lock:
+                self._entries.pop(email, None)
+            return False, None
+        return True, record
+
+    def put(self, email, record):
+        ttl = self.ttl if record is not None else self.negative_ttl
+        with self._lock:
+            self._entries[email] = (time.monotonic() + ttl, record)
+
+    def invalidate(self, email):
+        with self._lock:
+            self._entries.pop(email, None)
+
+
+user_cache = UserCache()
+
+def _lookup_user(supabase, email):
+    """Fetch a user record by email through the cache; None if the user does not exist"""
+    hit, record = user_cache.get(email)
+    if hit:
+        return record
+    result = supabase.table("users").select(USER_COLUMNS).eq("email", email).limit(1).execute()
+    record = result.data[0] if result.data else None
+    user_cache.put(email, record)
+    return record
 
 def get_supabase_client(use_service_role=False):
-    """Get a Supabase client instance"""
+    """Get a shared Supabase client instance (created once per key role)"""
     if not SUPABASE_AVAILABLE:
         return None
-    try:
-        if use_service_role and SUPABASE_SERVICE_ROLE_KEY:
-            return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-        else:
-            return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-    except Exception as e:
-        logger.error(f"Failed to create Supabase client: {e}")
-        return None
+    role = 'service' if use_service_role and SUPABASE_SERVICE_ROLE_KEY else 'anon'
+    client = _clients.get(role)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(role)
+        if client is not None:
+            return client
+        try:
+            key = SUPABASE_SERVICE_ROLE_KEY if role == 'service' else SUPABASE_ANON_KEY
+            client = create_client(SUPABASE_URL, key)
+        except Exception as e:
+            logger.error(f"Failed to create Supabase client: {e}")
+            return None
+        _clients[role] = client
+        return client
+
+
+class WriteBehindQueue:
+    """
+    Buffers rows in memory and bulk-inserts them from a background thread.
+
+    A table is flushed when its buffer reaches `batch_size` rows or every
+    `flush_interval` seconds. When Supabase is unreachable, or more than
+    `max_pending` rows are waiting, rows are spilled to JSON-lines files in
+    `spool_dir` (up to `max_spool_bytes`) and replayed on the next successful
+    flush. Spool files appear atomically and are claimed by renaming before
+    replay, so several worker processes can share one spool directory; files
+    that cannot be parsed are moved to `spool_dir/quarantine`. Without a
+    configured Supabase client rows are dropped, as there is nothing to
+    replay them to. `enqueue` never touches the network, so request handlers
+    do not wait on the database.
+    """
+
+    def __init__(self, batch_size=WRITE_BATCH_SIZE, flush_interval=WRITE_FLUSH_INTERVAL,
+                 max_pending=WRITE_MAX_PENDING, spool_dir=WRITE_SPOOL_DIR, max_spool_bytes=WRITE_SPOOL_MAX_BYTES,
+                 claim_timeout=WRITE_SPOOL_CLAIM_TIMEOUT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spool_dir = spool_dir
+        self.max_spool_bytes = max_spool_bytes
+        self.claim_timeout = claim_timeout
+
+        self._buffers = {}
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stopped = False
+
+    def enqueue(self, table, rows):
+        """Queue one row (dict) or a list of rows for `table`"""
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not rows:
+            return
+        self._ensure_started()
+        with self._cond:
+            overflow = self._pending + len(rows) > self.max_pending
+            if overflow:
+                self._cond.notify()
+            else:
+                buffer = self._buffers.setdefault(table, [])
+                buffer.extend(rows)
+                self._pending += len(rows)
+                if len(buffer) >= self.batch_size:
+                    self._cond.notify()
+        if overflow:
+            # Backpressure: keep memory bounded by spilling instead of blocking (outside the lock)
+            logger.warning(f"Write queue full ({self._pending} rows), spilling {len(rows)} rows for {table}")
+            self._spill(table, rows)
+
+    def flush(self):
+        """Write out all buffered and spilled rows now"""
+        with self._cond:
+            batches = self._buffers
+            self._buffers = {}
+            self._pending = 0
+        with self._flush_lock:
+            supabase = get_supabase_client()
+            if supabase is None:
+                dropped = sum(len(rows) for rows in batches.values())
+                if dropped:
+                    logger.warning(f"Supabase not available, dropping {dropped} queued rows")
+                return
+            healthy = True
+            for table, rows in batches.items():
+                healthy = self._write(supabase, table, rows) and healthy
+            if healthy:
+                self._replay_spool(supabase)
+
+    def stop(self):
+        """Stop the background thread and flush what is left"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name='supabase-write-behind', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._stopped and not self._has_full_batch():
+                    self._cond.wait(self.flush_interval)
+                if self._stopped:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    def _has_full_batch(self):
+        return any(len(rows) >= self.batch_size for rows in self._buffers.values())
+
+    def _write(self, supabase, table, rows):
+        """Bulk insert rows, spilling whatever could not be written. Returns success."""
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            try:
+                with metrics.timer('supabase_write_seconds', table=table):
+                    supabase.table(table).insert(chunk).execute()
+                metrics.inc('supabase_rows_written_total', len(chunk), table=table)
+                logger.info(f"Flushed {len(chunk)} rows to {table}")
+            except Exception as e:
+                logger.error(f"Failed to write {len(chunk)} rows to {table}: {e}")
+                self._spill(table, rows[start:])
+                return False
+        return True
+
+    def _spill(self, table, rows, limit=True):
+        """Write rows to a new spool file; with `limit`, they are dropped when the spool is full"""
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            used = self._spool_bytes() if limit else 0
+            if limit and used >= self.max_spool_bytes:
+                logger.error(f"Write spool is full ({used} bytes), dropping {len(rows)} rows for {table}")
+                metrics.inc('supabase_rows_dropped_total', len(rows), table=table)
+                return
+            name = f"{table}.{uuid.uuid4().hex}.jsonl"
+            # Written under a name replay ignores, then renamed, so replay never sees a partial file
+            temp = os.path.join(self.spool_dir, f".{name}.tmp")
+            with open(temp, 'w', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps(row) + '\n')
+            os.replace(temp, os.path.join(self.spool_dir, name))
+        except Exception as e:
+            logger.error(f"Could not spill {len(rows)} rows for {table}: {e}")
+
+    def _spool_bytes(self):
+        total = 0
+        with os.scandir(self.spool_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    try:
+                        total += entry.stat().st_size
+                    except FileNotFoundError:
+                        pass  # Replayed by another worker meanwhile
+        return total
+
+    def _claim(self, name):
+        """
+        Rename a spool file to a name only this process replays; None if
+        another worker got it first. Claims left by a dead worker (not
+        touched for `claim_timeout` seconds) are taken over.
+        """
+        path = os.path.join(self.spool_dir, name)
+        if name.endswith('.claimed'):
+            try:
+                if time.time() - os.path.getmtime(path) < self.claim_timeout:
+                    return None
+            except FileNotFoundError:
+                return None
+            name = name.rsplit('.', 2)[0]
+        claimed = os.path.join(self.spool_dir, f"{name}.{uuid.uuid4().hex[:8]}.claimed")
+        try:
+            os.rename(path, claimed)
+            os.utime(claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def _quarantine(self, path, error):
+        quarantine = os.path.join(self.spool_dir, 'quarantine')
+        os.makedirs(quarantine, exist_ok=True)
+        os.replace(path, os.path.join(quarantine, os.path.basename(path)))
+        logger.error(f"Moved unreadable spool file {os.path.basename(path)} to {quarantine}: {error}")
+
+    def _replay_spool(self, supabase):
+        if not os.path.isdir(self.spool_dir):
+            return
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith(('.jsonl', '.claimed')):
+                continue
+            path = self._claim(name)
+            if path is None:
+                continue
+            table = name.split('.', 1)[0]
+            try:
+                with open(path, encoding='utf-8') as f:
+                    rows = [json.loads(line) for line in f if line.strip()]
+            except (ValueError, UnicodeDecodeError) as e:
+                self._quarantine(path, e)
+                continue
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                try:
+                    with metrics.timer('supabase_write_seconds', table=table):
+                        supabase.table(table).insert(chunk).execute()
+                    metrics.inc('supabase_rows_written_total', len(chunk), table=table)
+                except Exception as e:
+                    # Remote still failing; keep only the unwritten rows for the next attempt
+                    logger.warning(f"Could not replay spooled rows from {name}: {e}")
+                    self._spill(table, rows[start:], limit=False)
+                    os.remove(path)
+                    return
+            os.remove(path)
+            logger.info(f"Replayed {len(rows)} spooled rows to {table}")
+
+
+write_queue = WriteBehindQueue()
+atexit.register(write_queue.stop)
 
 def register_user(email, password, username=None):
     """Register a new user"""
@@ -69,7 +405,7 @@ def register_user(email, password, username=None):
         if supabase:
             try:
                 # Check if user exists
-                existing = supabase.table("users").select("*").eq("email", email).execute()
+                existing = supabase.table("users").select("id").eq("email", email).limit(1).execute()
                 if existing.data:
                     logger.info(f"Registration failed: User {email} already exists")
                     return False, "User already exists"
@@ -86,8 +422,12 @@ def register_user(email, password, username=None):
                 }
 
                 result = supabase.table("users").insert(user_data).execute()
+                # Drop any negative cache entry left by earlier login attempts
+                user_cache.invalidate(email)
                 logger.info(f"User {email} registered successfully in Supabase")
                 return True, "User registered successfully"
+            except AuthBusyError as e:
+                return False, str(e)
             except Exception as e:
                 logger.error(f"Supabase registration failed for {email}: {e}")
                 logger.warning("Falling back to temporary storage")
@@ -97,8 +437,12 @@ def register_user(email, password, username=None):
         logger.info(f"Registration failed: User {email} already exists in temporary storage")
         return False, "User already exists"
 
+    try:
+        hashed = hash_password(password)
+    except AuthBusyError as e:
+        return False, str(e)
     users_db[email] = {
-        'password_hash': hash_password(password),
+        'password_hash': hashed,
         'created_at': datetime.now().isoformat(),
         'id': len(users_db) + 1,
         'username': username
@@ -113,18 +457,20 @@ def authenticate_user(email, password):
 
     if supabase:
         try:
-            user = supabase.table("users").select("*").eq("email", email).execute()
-            if not user.data:
+            user_data = _lookup_user(supabase, email)
+            if user_data is None:
                 logger.info(f"Authentication failed: User {email} not found")
                 return False, "User not found"
 
-            user_data = user.data[0]
             if check_password(password, user_data['password_hash']):
                 logger.info(f"User {email} authenticated successfully")
-                return True, user_data
+                return True, {k: v for k, v in user_data.items() if k != 'password_hash'}
             else:
                 logger.info(f"Authentication failed: Invalid password for {email}")
                 return False, "Invalid password"
+        except AuthBusyError as e:
+            logger.warning(f"Authentication rejected for {email}: {e}")
+            return False, str(e)
         except Exception as e:
             logger.error(f"Supabase authentication failed for {email}: {e}")
             # Fall through to in-memory storage
@@ -132,7 +478,11 @@ def authenticate_user(email, password):
     # Fallback to in-memory storage
     if email in users_db:
         user_data = users_db[email]
-        if check_password(password, user_data['password_hash']):
+        try:
+            valid = check_password(password, user_data['password_hash'])
+        except AuthBusyError as e:
+            return False, str(e)
+        if valid:
             logger.info(f"User {email} authenticated successfully via temporary storage")
             return True, {
                 'id': user_data['id'],
@@ -143,37 +493,23 @@ def authenticate_user(email, password):
     return False, "Authentication failed"
 
 def save_today_price(karat, price):
-    """Save today's price to database (optional)"""
-    supabase = get_supabase_client()
-    if not supabase:
-        logger.warning("Supabase not available, skipping price save")
-        return
-
-    try:
-        supabase.table("gold_price").insert({
-            "timestamp": datetime.now().isoformat(),
-            "karat": karat,
-            "price_per_gram": price
-        }).execute()
-        logger.info(f"Saved today's price for {karat}: ₹{price}/gram")
-    except Exception as e:
-        logger.error(f"Failed to save price to database: {e}")
+    """Queue today's price for saving to database (optional)"""
+    write_queue.enqueue("gold_price", {
+        "timestamp": datetime.now().isoformat(),
+        "karat": karat,
+        "price_per_gram": price
+    })
+    logger.debug(f"Queued today's price for {karat}: ₹{price}/gram")
 
 def save_predictions(karat, predictions):
-    """Save predictions to database (optional)"""
-    supabase = get_supabase_client()
-    if not supabase:
-        logger.warning("Supabase not available, skipping predictions save")
-        return
-
-    try:
-        for i, price in enumerate(predictions, 1):
-            supabase.table("gold_prediction").insert({
-                "prediction_date": (datetime.now() + timedelta(days=i)).strftime("%Y-%m-%d"),
-                "karat": karat,
-                "predicted_price": price
-            }).execute()
-        logger.info(f"Saved {len(predictions)} predictions for {karat}")
-    except Exception as e:
-        logger.error(f"Failed to save predictions to database: {e}")
-      
+    """Queue predictions for saving to database as one batch (optional)"""
+    now = datetime.now()
+    write_queue.enqueue("gold_prediction", [
+        {
+            "prediction_date": (now + timedelta(days=i)).strftime("%Y-%m-%d"),
+            "karat": karat,
+            "predicted_price": price
+        }
+        for i, price in enumerate(predictions, 1)
+    ])
+    logger.debug(f"Queued {len(predictions)} predictions for {karat}")